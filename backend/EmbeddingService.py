@@ -1,19 +1,27 @@
 import os
 
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+
+from llmservice.llmGateway import llm_gateway
+from stageTiming import timed
 
 load_dotenv()
 
 class EmbeddingService:
+    """
+    Embeds text with Azure OpenAI. The client is shared through the LLM gateway, so every repository uses
+    the same connection pool and embedding deployment limits.
+    """
     def __init__(
             self,
             api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
             api_version=os.environ.get("OPENAI_API_VERSION"),
             azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            embedding_model=os.environ.get("EMBEDDING_MODEL")
+            embedding_model=os.environ.get("EMBEDDING_MODEL"),
+            caller="embedding"
     ):
-        self.client = AzureOpenAI(
+        self.client = llm_gateway.openai_client(
+            caller,
             api_key=api_key,
             api_version=api_version,
             azure_endpoint=azure_endpoint
@@ -21,6 +29,7 @@ class EmbeddingService:
         self.embedding_model = embedding_model
 
 
+    @timed("embedding")
     def embed_query(self, user_prompt):
         response = self.client.embeddings.create(input=user_prompt, model=self.embedding_model)
         return response.data[0].embedding
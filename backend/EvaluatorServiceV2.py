@@ -6,8 +6,6 @@ from typing import List
 
 
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
-from langchain_openai.embeddings import AzureOpenAIEmbeddings
 
 from ragas import SingleTurnSample
 from ragas.embeddings import LangchainEmbeddingsWrapper
@@ -19,19 +17,26 @@ from ragas.metrics import (
 )
 
 from chatservice.chatservice import ChatService
+from evaluationservice.evaluationCache import EvaluationCache, evaluation_cache
+from evaluationservice.evaluationRunner import EvaluationRunner
+from llmservice.llmGateway import llm_gateway
 
 load_dotenv()
+
+EVALUATOR_EMBEDDING_DEPLOYMENT = "text-embedding-ada-002"
+
+
 class EvaluatorService:
-    def __init__(self, chat_service: ChatService, questions=None, ground_truths=None):
+    def __init__(self, chat_service: ChatService, questions=None, ground_truths=None,
+                 cache: EvaluationCache = evaluation_cache):
         self.chat_service = chat_service
+        # Answers and judgments are reused for unchanged retrieval results (EVAL_CACHE=0 disables)
+        self.cache = cache
+        self.runner = EvaluationRunner(self, cache=cache)
 
-        self.llm_evaluator = AzureChatOpenAI(
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
-            api_version=os.environ.get("OPENAI_API_VERSION"),
-            azure_deployment=os.environ.get("YOUR_DEPLOYMENT_NAME_4O"),
-            temperature=0
-        )
+        self.llm_evaluator = llm_gateway.chat_model("evaluation", os.environ.get("YOUR_DEPLOYMENT_NAME_4O"), temperature=0)
+        # Judge deployments, part of the cached judgment keys
+        self.judge_models = (os.environ.get("YOUR_DEPLOYMENT_NAME_4O"), EVALUATOR_EMBEDDING_DEPLOYMENT)
 
         self.metrics = [
             faithfulness,
@@ -149,14 +154,10 @@ class EvaluatorService:
         for i in range(len(self.questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt_clean(video_id, self.questions[i])
             print(str(i) + " get_dataset " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.questions[i])
+            answer = await self.generate_answer("clean", self.questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.questions[i], self.ground_truths[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.questions[i], answer, self.ground_truths[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.questions[i], self.ground_truths[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -164,10 +165,7 @@ class EvaluatorService:
                 'ground_truth': self.ground_truths[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -182,14 +180,10 @@ class EvaluatorService:
         for i in range(len(self.questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt(video_id, self.questions[i])
             print(str(i) + " get_dataset_pre " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.questions[i])
+            answer = await self.generate_answer("pre", self.questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.questions[i], self.ground_truths[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.questions[i], answer, self.ground_truths[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.questions[i], self.ground_truths[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -197,10 +191,7 @@ class EvaluatorService:
                 'ground_truth': self.ground_truths[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -215,14 +206,10 @@ class EvaluatorService:
         for i in range(len(self.questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt_naive(video_id, self.questions[i])
             print(str(i) + " get_dataset_naive " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.questions[i])
+            answer = await self.generate_answer("naive", self.questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.questions[i], self.ground_truths[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.questions[i], answer, self.ground_truths[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.questions[i], self.ground_truths[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -230,10 +217,7 @@ class EvaluatorService:
                 'ground_truth': self.ground_truths[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -248,14 +232,10 @@ class EvaluatorService:
         for i in range(len(self.questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt_clean_naive(video_id, self.questions[i])
             print(str(i) + " get_dataset_naive " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.questions[i])
+            answer = await self.generate_answer("clean_naive", self.questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.questions[i], self.ground_truths[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.questions[i], answer, self.ground_truths[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.questions[i], self.ground_truths[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -263,10 +243,7 @@ class EvaluatorService:
                 'ground_truth': self.ground_truths[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -282,14 +259,10 @@ class EvaluatorService:
             start_time = time.time()
             retrieval_results, context = self.chat_service.retrieve_results_prompt_clean(video_id, self.time_sensitive_questions[i])
             print(str(i) + " get_dataset " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.time_sensitive_questions[i])
+            answer = await self.generate_answer("clean_t", self.time_sensitive_questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.time_sensitive_questions[i], self.time_sensitive_answers[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.time_sensitive_questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.time_sensitive_questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.time_sensitive_questions[i], answer, self.time_sensitive_answers[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.time_sensitive_questions[i], self.time_sensitive_answers[i], answer, context)
 
             end_time = time.time()
             time_taken = end_time - start_time
@@ -300,10 +273,7 @@ class EvaluatorService:
                 'ground_truth': self.time_sensitive_answers[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall,
+                **scores,
                 'time_taken': time_taken
             }
 
@@ -320,14 +290,10 @@ class EvaluatorService:
         for i in range(len(self.time_sensitive_questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt(video_id, self.time_sensitive_questions[i])
             print(str(i) + " get_dataset_pre " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.time_sensitive_questions[i])
+            answer = await self.generate_answer("pre_t", self.time_sensitive_questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.time_sensitive_questions[i], self.time_sensitive_answers[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.time_sensitive_questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.time_sensitive_questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.time_sensitive_questions[i], answer, self.time_sensitive_answers[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.time_sensitive_questions[i], self.time_sensitive_answers[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -335,10 +301,7 @@ class EvaluatorService:
                 'ground_truth': self.time_sensitive_answers[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -353,14 +316,10 @@ class EvaluatorService:
         for i in range(len(self.time_sensitive_questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt_naive(video_id, self.time_sensitive_questions[i])
             print(str(i) + " get_dataset_naive " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.time_sensitive_questions[i])
+            answer = await self.generate_answer("naive_t", self.time_sensitive_questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.time_sensitive_questions[i], self.time_sensitive_answers[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.time_sensitive_questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.time_sensitive_questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.time_sensitive_questions[i], answer, self.time_sensitive_answers[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.time_sensitive_questions[i], self.time_sensitive_answers[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -368,10 +327,7 @@ class EvaluatorService:
                 'ground_truth': self.time_sensitive_answers[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -386,14 +342,10 @@ class EvaluatorService:
         for i in range(len(self.time_sensitive_questions)):
             retrieval_results, context = self.chat_service.retrieve_results_prompt_clean_naive(video_id, self.time_sensitive_questions[i])
             print(str(i) + " get_dataset_naive " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.time_sensitive_questions[i])
+            answer = await self.generate_answer("clean_naive_t", self.time_sensitive_questions[i], retrieval_results, context)
 
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.time_sensitive_questions[i], self.time_sensitive_answers[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.time_sensitive_questions[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.time_sensitive_questions[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.time_sensitive_questions[i], answer, self.time_sensitive_answers[i],
-                                                                context)
+            # Evaluate metrics (in parallel, reusing cached judgments)
+            scores = await self.runner.evaluate_metrics(self.time_sensitive_questions[i], self.time_sensitive_answers[i], answer, context)
 
             # Store the results for this question in a dictionary
             result = {
@@ -401,10 +353,7 @@ class EvaluatorService:
                 'ground_truth': self.time_sensitive_answers[i],
                 'context': context,
                 'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall
+                **scores
             }
 
             results.append(result)
@@ -412,6 +361,12 @@ class EvaluatorService:
         with open("evaluation_results_naive_clean_t.json", mode='w', newline='') as jsonfile:
             json.dump(results, jsonfile, indent=4)
 
+    async def generate_answer(self, variant: str, question: str, retrieval_results, context) -> str:
+        """Generate the answer for retrieved context, reusing the cached answer when the context is unchanged."""
+        return await self.cache.cached_answer(
+            variant, self.chat_service.deployment_name, question, context,
+            lambda: asyncio.to_thread(self.chat_service.generate_video_prompt_response, retrieval_results, question))
+
     async def evaluate_context_precision(self, user_input: str, reference: str, retrieved_contexts: List[str]):
         context_precision = LLMContextPrecisionWithReference(llm=LangchainLLMWrapper(self.llm_evaluator))
         sample = SingleTurnSample(
@@ -429,11 +384,7 @@ class EvaluatorService:
             retrieved_contexts=retrieved_contexts
         )
 
-        evaluator_embeddings = AzureOpenAIEmbeddings(
-            openai_api_version="2023-05-15",
-            azure_deployment="text-embedding-ada-002",
-            model="text-embedding-ada-002",
-        )
+        evaluator_embeddings = llm_gateway.embeddings("evaluation", EVALUATOR_EMBEDDING_DEPLOYMENT, api_version="2023-05-15")
 
         scorer = ResponseRelevancy(llm=LangchainLLMWrapper(self.llm_evaluator), embeddings=LangchainEmbeddingsWrapper(evaluator_embeddings))
         result = await scorer.single_turn_ascore(sample)
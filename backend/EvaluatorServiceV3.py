@@ -6,8 +6,6 @@ from typing import List
 
 
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
-from langchain_openai.embeddings import AzureOpenAIEmbeddings
 
 from ragas import SingleTurnSample
 from ragas.embeddings import LangchainEmbeddingsWrapper
@@ -19,23 +17,30 @@ from ragas.metrics import (
 )
 
 from chatservice.chatservice import ChatService
+from llmservice.llmGateway import llm_gateway
 from brokerservice.brokerService import BrokerRepository
 from chatservice.repository import ChatDatabaseService
+from evaluationservice.evaluationCache import EvaluationCache, evaluation_cache
+from evaluationservice.evaluationRunner import EvaluationRunner, write_results
 
 load_dotenv()
+
+EVALUATOR_EMBEDDING_DEPLOYMENT = "text-embedding-ada-002"
+
+
 class EvaluatorService:
-    def __init__(self, chat_service: ChatService, broker_service: BrokerRepository, chat_db:ChatDatabaseService, questions=None, ground_truths=None):
+    def __init__(self, chat_service: ChatService, broker_service: BrokerRepository, chat_db:ChatDatabaseService, questions=None, ground_truths=None,
+                 cache: EvaluationCache = evaluation_cache):
         self.chat_service = chat_service
         self.broker_service = broker_service
         self.chat_db = chat_db
+        # Answers and judgments are reused for unchanged retrieval results (EVAL_CACHE=0 disables)
+        self.cache = cache
         
-        self.llm_evaluator = AzureChatOpenAI(
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
-            api_version=os.environ.get("OPENAI_API_VERSION"),
-            azure_deployment=os.environ.get("YOUR_DEPLOYMENT_NAME"),
-            temperature=0
-        )
+        self.llm_evaluator = llm_gateway.chat_model("evaluation", os.environ.get("YOUR_DEPLOYMENT_NAME"), temperature=0)
+        self.evaluator_embeddings = llm_gateway.embeddings("evaluation", EVALUATOR_EMBEDDING_DEPLOYMENT, api_version="2023-05-15")
+        # Judge deployments, part of the cached judgment keys
+        self.judge_models = (os.environ.get("YOUR_DEPLOYMENT_NAME"), EVALUATOR_EMBEDDING_DEPLOYMENT)
 
         self.metrics = [
             faithfulness,
@@ -281,139 +286,36 @@ class EvaluatorService:
 ################################################################################################
 
 # Generation 1 
-    async def Ragv3_only(self, course_code):
-        results = []  # This will store the results for all questions
-
-        video_mapping_result = self.broker_service.get_video_id_title_mapping(course_code)
-        video_ids = list(video_mapping_result.get("video_map", {}).values())
-        print(f"Extracted video IDs: {video_ids}")
-
-
-        # Iterate through the questions and evaluate the answers
-        for i in range(len(self.question_for_multivideos)):
-            start_time =time.time()
-
-            retrieval_results, context = self.chat_service.retrieve_results_prompt_clean_multivid(video_ids, self.question_for_multivideos[i])
-            # print(str(i) + " get_dataset " + str(context))
-            answer = self.chat_service.generate_video_prompt_response(retrieval_results, self.question_for_multivideos[i])
-
-
-            end_time = time.time()
-            time_taken = end_time-start_time
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(self.question_for_multivideos[i], self.answer_for_multivideos[i], context)
-            response_relevancy = await self.evaluate_response_relevancy(self.question_for_multivideos[i], answer, context)
-            faithfulness_result = await self.evaluate_faithfulness(self.question_for_multivideos[i], answer, context)
-            context_recall = await self.evaluate_context_recall(self.question_for_multivideos[i], answer, self.answer_for_multivideos[i],
-                                                                context)
-
-            
-            # Store the results for this question in a dictionary
-            result = {
-                'question': self.question_for_multivideos[i],
-                'ground_truth': self.answer_for_multivideos[i],
-                'context': context,
-                'answer': answer,
-                'context_precision': context_precision,
-                'response_relevancy': response_relevancy,
-                'faithfulness_result': faithfulness_result,
-                'context_recall': context_recall,
-                'time_taken': time_taken,
-                "Question_Number": i+1
-            }
-
-            results.append(result)
-            print("Iteration " + str(i+1) + " took " + str(time_taken) + " seconds")
-
-        with open("Rag3only_results.json", mode='w', newline='') as jsonfile:
-            json.dump(results, jsonfile, indent=4)
-        
-        return
-
-# Generation 2 Testing - Temporal Only
-    async def Ragv3_Temporal_only(self, course_code):
-        results = []  # This will store the results for all questions
-
-
-        video_mapping_result = self.broker_service.get_video_id_title_mapping(course_code)
-        video_ids = list(video_mapping_result.get("video_map", {}).values())
-        print(f"Extracted video IDs: {video_ids}")
-
-        questions_template = self.question_for_multivideos
-        answers_template = self.answer_for_multivideos
-       
-
-
-        for i in range(len(questions_template)):
-           
-            start_time = time.time()
-            
-            question = questions_template[i]
-            # Step 1: Check if the question is temporal
-            is_temporal_res = await self.chat_service.is_temporal_question(question)
-            is_temporal = is_temporal_res.is_temporal
-            timestamp = is_temporal_res.timestamp
-
-            context = []
-            answer = ""
-
-            if is_temporal:
-                if timestamp:
-                    # Step 3: Retrieve chunks based on the timestamp
-                    retrieval_results, context = self.chat_db.retrieve_chunks_by_timestamp(video_ids, timestamp)
-                    answer = self.chat_service.generate_video_prompt_response(retrieval_results, question)
-                else:
-                    # fallback if timestamp not extractable
-                    retrieval_results, context = self.chat_service.retrieve_results_prompt_clean_multivid(video_ids, question)
-                    answer = self.chat_service.generate_video_prompt_response(retrieval_results, question)
-            else:
-                retrieval_results, context = self.chat_service.retrieve_results_prompt_clean_multivid(video_ids, question)
-                answer = self.chat_service.generate_video_prompt_response(retrieval_results, question)
-            
-            end_time = time.time()
-            time_taken = end_time - start_time
-            
-            # Evaluate metrics
-            context_precision = await self.evaluate_context_precision(questions_template[i], answers_template[i], context)
-            context_recall = await self.evaluate_context_recall(questions_template[i], answer, answers_template[i],context)
-            faithfulness_result = await self.evaluate_faithfulness(questions_template[i], answer, context)                                                    
-            response_relevancy = await self.evaluate_response_relevancy(questions_template[i], answer, context)
-            
-            
-
-            # # Store the results for this question in a dictionary
-            result = {
-                'question': questions_template[i],
-                'ground_truth': answers_template[i],
-                'context': context,
-                'answer': answer,
-                'context_precision': context_precision,
-                'context_recall': context_recall,
-                'faithfulness_result': faithfulness_result,
-                'response_relevancy': response_relevancy,               
-                'temporal_information': is_temporal_res.dict(),  # Convert to dict for JSON serialization
-                'time_taken': time_taken,
-                'question_number': i+1
-            }
-
-            results.append(result)
-            print("Iteration " + str(i+1) + " took " + str(time_taken) + " seconds")
-            
-            
-
-        with open("Ragv3_Temporal_only_results.json", mode='w', newline='') as jsonfile:
-            json.dump(results, jsonfile, indent=4)
-
-# Generation 2 Testing - Document Scope(PreQRAG) Only
-    async def Ragv3_preQRAG_only(self, course_code: str) -> None:
+    # Per-question pipelines. Retrieval and generation are blocking, so they run in worker threads and
+    # several questions can be processed at once by the EvaluationRunner.
+    async def generate_answer(self, variant: str, question: str, retrieval_results, context) -> str:
+        """Generate the answer for retrieved context, reusing the cached answer when the context is unchanged."""
+        return await self.cache.cached_answer(
+            variant, self.chat_service.deployment_name, question, context,
+            lambda: asyncio.to_thread(self.chat_service.generate_video_prompt_response, retrieval_results, question))
+
+    async def answer_ragv3_only(self, question: str, video_ids: list) -> dict:
+        retrieval_results, context = await asyncio.to_thread(self.chat_service.retrieve_results_prompt_clean_multivid, video_ids, question)
+        answer = await self.generate_answer("ragv3_only", question, retrieval_results, context)
+        return {'context': context, 'answer': answer}
+
+    async def answer_ragv3_temporal(self, question: str, video_ids: list) -> dict:
+        # Step 1: Check if the question is temporal
+        is_temporal_res = await self.chat_service.is_temporal_question(question)
+
+        if is_temporal_res.is_temporal and is_temporal_res.timestamp:
+            # Step 2: Retrieve chunks based on the timestamp
+            retrieval_results, context = await asyncio.to_thread(self.chat_db.retrieve_chunks_by_timestamp, video_ids, is_temporal_res.timestamp)
+        else:
+            # Not temporal, or timestamp not extractable
+            retrieval_results, context = await asyncio.to_thread(self.chat_service.retrieve_results_prompt_clean_multivid, video_ids, question)
+        answer = await self.generate_answer("ragv3_temporal", question, retrieval_results, context)
+        return {'context': context, 'answer': answer, 'temporal_information': is_temporal_res.dict()}
+
+    async def answer_ragv3_preqrag(self, question: str, video_mapping: dict, temporal: bool = False) -> dict:
         """
-        Evaluate multi-document questions using PreQRAG routing and LLM-based retrieval.
-        
-        This function processes a set of multi-video questions, routes them using Document Scope(PreQRAG),
-        retrieves relevant context, generates answers, and evaluates the performance
-        using various metrics (context precision, response relevancy, faithfulness, context recall).
-        
-        
+        Route a question with Document Scope(PreQRAG), retrieve context for its query variants and answer it.
+
         Expected Document Scope(PreQRAG) Output Format:
         {
             "routing_type": "SINGLE_DOC" | "MULTI_DOC",
@@ -427,205 +329,72 @@ class EvaluatorService:
                 }
             ]
         }
-        
+
         Args:
-            course_code (str): Course code to retrieve video mappings for evaluation
-            
+            question (str): Question. Required.
+            video_mapping (dict): Video mapping of the course. Required.
+            temporal (bool): Use the temporal routing prompt and timestamp retrieval. Default: False.
+
         Returns:
-            None: Results are saved to 'evaluation_results_multidocs.json'
-            
-        Raises:
-            Exception: Logs routing errors but continues processing other questions
+            dict: Context, answer and routing type.
         """
-        # Initialize results storage
-        results = []
-        
-        # Get video mapping for the course
-        video_mapping = self.broker_service.get_video_id_title_mapping(course_code)
-        print(f"Video mapping for course {course_code}: {video_mapping}")
-        
-        # Process each multi-video question
-        for i, question in enumerate(self.question_for_multivideos):
-            start_time = time.time()
-            answers_template = self.answer_for_multivideos[i]
-            
-            try:
-                # Route question using Document Scope(PreQRAG)
-                json_results_llm = await self.chat_service.route_pre_qrag(
-                    user_query=question, 
-                    video_map=video_mapping
-                )
-                print(f"Document Scope(PreQRAG) routing result for Question {i+1}:\n{json_results_llm}")
-                
-                # Extract routing information
-                routing_type = json_results_llm.get("routing_type")
-                query_variants = json_results_llm.get("query_variants")
-                
-                # Retrieve relevant documents and generate context
-                retrieval_results, context = self.chat_service.retrival_singledocs_multidocs(query_variants)
-                
-                # Generate answer using retrieved context
-                answer = self.chat_service.generate_video_prompt_response(retrieval_results, question)
-                
-            except Exception as e:
-                print(f"[get_dataset_preQRAG_llm] Error processing Question {i+1}: {e}")
-                # Continue with next question if current one fails
-                continue
-            
-            # Calculate processing time
-            end_time = time.time()
-            time_taken = end_time - start_time
-            
-            # Evaluate answer quality using multiple metrics
-            try:
-                context_precision = await self.evaluate_context_precision(question, answers_template, context)
-                context_recall = await self.evaluate_context_recall(question, answer, answers_template, context)
-                faithfulness_result = await self.evaluate_faithfulness(question, answer, context)
-                response_relevancy = await self.evaluate_response_relevancy(question, answer, context)
-            
-            except Exception as e:
-                print(f"[get_dataset_preQRAG_llm] Error evaluating Question {i+1}: {e}")
-                # Set default values if evaluation fails
-                # context_precision = response_relevancy = faithfulness_result = context_recall = 0.0
-            
+        route = self.chat_service.route_pre_qrag_temporal if temporal else self.chat_service.route_pre_qrag
+        json_results_llm = await route(user_query=question, video_map=video_mapping)
+        query_variants = json_results_llm.get("query_variants")
 
-            # Store evaluation results
-            result = {
-                'question': question,
-                'ground_truth': answers_template,
-                'context': context,
-                'answer': answer,
-                'context_precision': context_precision,
-                'context_recall': context_recall,
-                'faithfulness_result': faithfulness_result,
-                'response_relevancy': response_relevancy,
-                'question_type': routing_type,
-                'time_taken': time_taken,
-                'question_index': i + 1
-            }
-            
-            results.append(result)
-            print(f"Question {i+1} completed in {time_taken:.2f} seconds")
-        
-        # Save all results to JSON file
-        try:
-            with open("Ragv3_PreQRAG_only_results.json", mode='w', newline='') as jsonfile:
-                json.dump(results, jsonfile, indent=4)
-        except Exception as e:
-            print(f"Error saving results to file: {e}")
-        
-        return
+        retrieve = self.chat_service.retrival_singledocs_multidocs_with_Temporal if temporal else self.chat_service.retrival_singledocs_multidocs
+        retrieval_results, context = await asyncio.to_thread(retrieve, query_variants)
+        variant = "ragv3_preqrag_temporal" if temporal else "ragv3_preqrag"
+        answer = await self.generate_answer(variant, question, retrieval_results, context)
+        return {'context': context, 'answer': answer, 'question_type': json_results_llm.get("routing_type")}
 
-# Generation 2 Testing- Temporal and Document Scope(PreQRAG)
-    async def Ragv3_preQRAG_temporal(self, course_code: str) -> None:
+    async def run_pipeline(self, pipeline, output_file: str, concurrency: int = None) -> list:
         """
-        Evaluate multi-document questions using Doc Scope(PreQRAG) routing and LLM-based retrieval.
-        
-        This function processes a set of multi-video questions, routes them using Document Scope(PreQRAG),
-        retrieves relevant context, generates answers, and evaluates the performance
-        using various metrics (context precision, response relevancy, faithfulness, context recall).
-        
-        
-        Expected Document Scope(PreQRAG) Output Format:
-        {
-            "routing_type": "SINGLE_DOC" | "MULTI_DOC",
-            "user_query": "original question",
-            "video_ids": ["video_id_1", "video_id_2"],
-            "query_variants": [
-                {
-                    "video_ids": ["video_id_1", "video_id_2"],
-                    "question": "rewritten question variant",
-                    "temporal_signal": ["hh:mm:ss"]
-                }
-            ]
-        }
-        
+        Evaluate the multi-video questions with a pipeline. Results are streamed to results/<name>.jsonl while the
+        run is in progress and written to `output_file` at the end.
+
         Args:
-            course_code (str): Course code to retrieve video mappings for evaluation
-            
+            pipeline: Async question -> {"context", "answer", ...} callable. Required.
+            output_file (str): JSON file for the final results. Required.
+            concurrency (int): Questions processed at once. Default: EVAL_CONCURRENCY or 5.
+
         Returns:
-            None: Results are saved to 'evaluation_results_multidocs.json'
-            
-        Raises:
-            Exception: Logs routing errors but continues processing other questions
+            list: Results in question order.
         """
-        # Initialize results storage
-        results = []
-        
-        # Get video mapping for the course
+        runner = EvaluationRunner(self, cache=self.cache) if concurrency is None else EvaluationRunner(self, concurrency, self.cache)
+        stream_path = os.path.join("results", os.path.splitext(os.path.basename(output_file))[0] + ".jsonl")
+        results = await runner.run(pipeline, self.question_for_multivideos, self.answer_for_multivideos, stream_path)
+        write_results(results, output_file)
+        return results
+
+    async def Ragv3_only(self, course_code, concurrency: int = None):
+        video_mapping_result = self.broker_service.get_video_id_title_mapping(course_code)
+        video_ids = list(video_mapping_result.get("video_map", {}).values())
+        print(f"Extracted video IDs: {video_ids}")
+        return await self.run_pipeline(lambda question: self.answer_ragv3_only(question, video_ids),
+                                       "Rag3only_results.json", concurrency)
+
+# Generation 2 Testing - Temporal Only
+    async def Ragv3_Temporal_only(self, course_code, concurrency: int = None):
+        video_mapping_result = self.broker_service.get_video_id_title_mapping(course_code)
+        video_ids = list(video_mapping_result.get("video_map", {}).values())
+        print(f"Extracted video IDs: {video_ids}")
+        return await self.run_pipeline(lambda question: self.answer_ragv3_temporal(question, video_ids),
+                                       "Ragv3_Temporal_only_results.json", concurrency)
+
+# Generation 2 Testing - Document Scope(PreQRAG) Only
+    async def Ragv3_preQRAG_only(self, course_code: str, concurrency: int = None):
         video_mapping = self.broker_service.get_video_id_title_mapping(course_code)
         print(f"Video mapping for course {course_code}: {video_mapping}")
-        
-        # Process each multi-video question
-        for i, question in enumerate(self.question_for_multivideos):
-            start_time = time.time()
-            answers_template = self.answer_for_multivideos[i]
-            
-            try:
-                # Route question using Document Scope(PreQRAG)
-                json_results_llm = await self.chat_service.route_pre_qrag_temporal(
-                    user_query=question, 
-                    video_map=video_mapping
-                )
-                print(f"PreQRAG routing result for Question {i+1}:\n{json_results_llm}")
-                
-                # Extract routing information
-                routing_type = json_results_llm.get("routing_type")
-                query_variants = json_results_llm.get("query_variants")
-
-                retrieval_results, context = self.chat_service.retrival_singledocs_multidocs_with_Temporal(query_variants)
-                
-                # Generate answer using retrieved context
-                answer = self.chat_service.generate_video_prompt_response(retrieval_results, question)
-                
-            except Exception as e:
-                print(f"[get_dataset_preQRAG_llm] Error processing Question {i+1}: {e}")
-                # Continue with next question if current one fails
-                continue
-            
-            # Calculate processing time
-            end_time = time.time()
-            time_taken = end_time - start_time
-            
-            # Evaluate answer quality using multiple metrics
-            try:
-                context_precision = await self.evaluate_context_precision(question, answers_template, context)
-                context_recall = await self.evaluate_context_recall(question, answer, answers_template, context)
-                faithfulness_result = await self.evaluate_faithfulness(question, answer, context)
-                response_relevancy = await self.evaluate_response_relevancy(question, answer, context)
-            
-            except Exception as e:
-                print(f"[get_dataset_preQRAG_llm] Error evaluating Question {i+1}: {e}")
-                # Set default values if evaluation fails
-                # context_precision = response_relevancy = faithfulness_result = context_recall = 0.0
-            
+        return await self.run_pipeline(lambda question: self.answer_ragv3_preqrag(question, video_mapping),
+                                       "Ragv3_PreQRAG_only_results.json", concurrency)
 
-            # Store evaluation results
-            result = {
-                'question': question,
-                'ground_truth': answers_template,
-                'context': context,
-                'answer': answer,
-                'context_precision': context_precision,
-                'context_recall': context_recall,
-                'faithfulness_result': faithfulness_result,
-                'response_relevancy': response_relevancy,
-                'question_type': routing_type,
-                'time_taken': time_taken,
-                'question_index': i + 1
-            }
-            
-            results.append(result)
-            print(f"Question {i+1} completed in {time_taken:.2f} seconds")
-        
-        # Save all results to JSON file
-        try:
-            with open("Ragv3_PreQRAG_Temporal_only_results.json", mode='w', newline='') as jsonfile:
-                json.dump(results, jsonfile, indent=4)
-        except Exception as e:
-            print(f"Error saving results to file: {e}")
-        
-        return
+# Generation 2 Testing- Temporal and Document Scope(PreQRAG)
+    async def Ragv3_preQRAG_temporal(self, course_code: str, concurrency: int = None):
+        video_mapping = self.broker_service.get_video_id_title_mapping(course_code)
+        print(f"Video mapping for course {course_code}: {video_mapping}")
+        return await self.run_pipeline(lambda question: self.answer_ragv3_preqrag(question, video_mapping, temporal=True),
+                                       "Ragv3_PreQRAG_Temporal_only_results.json", concurrency)
 
 # RAGAS Evaluation Metrics
     async def evaluate_context_precision(self, user_input: str, reference: str, retrieved_contexts: List[str]):
@@ -646,13 +415,7 @@ class EvaluatorService:
             retrieved_contexts=retrieved_contexts
         )
 
-        evaluator_embeddings = AzureOpenAIEmbeddings(
-            openai_api_version="2023-05-15",
-            azure_deployment="text-embedding-ada-002",
-            model="text-embedding-ada-002",
-        )
-
-        scorer = ResponseRelevancy(llm=LangchainLLMWrapper(self.llm_evaluator), embeddings=LangchainEmbeddingsWrapper(evaluator_embeddings))
+        scorer = ResponseRelevancy(llm=LangchainLLMWrapper(self.llm_evaluator), embeddings=LangchainEmbeddingsWrapper(self.evaluator_embeddings))
         result = await scorer.single_turn_ascore(sample)
         print(result)
         return result
@@ -699,6 +462,8 @@ async def main():
     print ("Evaluation stating.....")
 
     evaluator_service = EvaluatorService(chat_service=service, broker_service=service2, chat_db=service3)
+
+    # Questions are evaluated concurrently (EVAL_CONCURRENCY, default 5); results stream to results/*.jsonl
     
     # mutlivideo generation1 called RAGV3
     # await evaluator_service.Ragv3_only(course_code="SC1007")
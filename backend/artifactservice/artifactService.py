@@ -0,0 +1,231 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from typing import Any, BinaryIO, Optional
+
+from dotenv import load_dotenv
+
+from loggingConfig import logger
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, gzip is always available
+    zstandard = None
+
+load_dotenv()
+
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+CODEC_IDENTITY = "identity"
+
+_CODEC_EXTENSIONS = {
+    CODEC_ZSTD: ".zst",
+    CODEC_GZIP: ".gz",
+    CODEC_IDENTITY: "",
+}
+
+
+def default_codec() -> str:
+    """
+    Pick the best compression codec available in this environment.
+
+    Returns:
+        str: "zstd" when the zstandard package is installed, "gzip" otherwise.
+    """
+    return CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == CODEC_GZIP:
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def _decompressing_reader(raw: BinaryIO, codec: str) -> BinaryIO:
+    """Wraps a raw stored stream so that reads return decompressed bytes lazily."""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Artifact is zstd compressed but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    if codec == CODEC_GZIP:
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    return raw
+
+
+class ArtifactStore:
+    """
+    ArtifactStore saves large blobs (raw Video Indexer insights, frame documents, thumbnails) outside the hot
+    MongoDB collections. Blobs are compressed and content-addressed by the SHA-256 of their uncompressed bytes,
+    so storing the same blob twice is free. Callers keep the small reference dictionary returned by `put_*`
+    and read the blob back lazily through `open`.
+
+    Subclasses implement the storage primitives `_exists`, `_write` and `_open_raw`.
+
+    Args:
+        codec (str): Compression codec for new blobs. Default: zstd if available, otherwise gzip.
+    """
+    backend = "abstract"
+
+    def __init__(self, codec: Optional[str] = None):
+        self.codec = codec or default_codec()
+
+    def put_bytes(self, data: bytes, content_type: str = "application/octet-stream", compress: bool = True) -> dict:
+        """
+        Store a blob.
+
+        Args:
+            data (bytes): Uncompressed content. Required.
+            content_type (str): MIME type of the content. Default: "application/octet-stream".
+            compress (bool): Compress the blob. Disable for already compressed content such as JPEG. Default: True.
+
+        Returns:
+            dict: Reference to the stored blob, small enough to embed in any document.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        codec = self.codec if compress else CODEC_IDENTITY
+        key = f"{digest[:2]}/{digest}{_CODEC_EXTENSIONS[codec]}"
+
+        stored_size = None
+        if not self._exists(key):
+            payload = _compress(data, codec)
+            self._write(key, payload, content_type)
+            stored_size = len(payload)
+            logger.info("Artifact stored: %s (%s -> %s bytes)", key, len(data), stored_size)
+
+        return {
+            "store": self.backend,
+            "key": key,
+            "sha256": digest,
+            "codec": codec,
+            "content_type": content_type,
+            "size": len(data),
+            "stored_size": stored_size,
+        }
+
+    def put_json(self, obj: Any) -> dict:
+        """
+        Serialise and store a JSON document compactly.
+
+        Args:
+            obj (Any): JSON serialisable object. Required.
+
+        Returns:
+            dict: Reference to the stored blob.
+        """
+        data = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        return self.put_bytes(data, content_type="application/json")
+
+    def open(self, ref: dict) -> BinaryIO:
+        """
+        Open a stored blob for streaming reads. Decompression happens as the stream is read.
+
+        Args:
+            ref (dict): Reference returned by `put_bytes` or `put_json`. Required.
+
+        Returns:
+            BinaryIO: File-like object yielding the uncompressed bytes. Caller should close it.
+        """
+        return _decompressing_reader(self._open_raw(ref["key"]), ref.get("codec", CODEC_IDENTITY))
+
+    def read_bytes(self, ref: dict) -> bytes:
+        with self.open(ref) as stream:
+            return stream.read()
+
+    def load_json(self, ref: dict) -> Any:
+        with self.open(ref) as stream:
+            return json.load(io.TextIOWrapper(stream, encoding="utf-8"))
+
+    def _exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _write(self, key: str, payload: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    def _open_raw(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifact store backed by the local filesystem.
+
+    Args:
+        root (str): Directory holding the artifacts. Default: "artifacts".
+        codec (str): Compression codec for new blobs. Optional.
+    """
+    backend = "local"
+
+    def __init__(self, root: str = "artifacts", codec: Optional[str] = None):
+        super().__init__(codec)
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def _write(self, key: str, payload: bytes, content_type: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def _open_raw(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+
+class GridFSArtifactStore(ArtifactStore):
+    """
+    Artifact store backed by MongoDB GridFS, for deployments without a shared filesystem.
+
+    Args:
+        db: PyMongo database holding the GridFS bucket. Required.
+        bucket_name (str): GridFS bucket name. Default: "artifacts".
+        codec (str): Compression codec for new blobs. Optional.
+    """
+    backend = "gridfs"
+
+    def __init__(self, db, bucket_name: str = "artifacts", codec: Optional[str] = None):
+        import gridfs
+
+        super().__init__(codec)
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+
+    def _exists(self, key: str) -> bool:
+        return self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    def _write(self, key: str, payload: bytes, content_type: str) -> None:
+        self.bucket.upload_from_stream(key, payload, metadata={"content_type": content_type})
+
+    def _open_raw(self, key: str) -> BinaryIO:
+        return self.bucket.open_download_stream_by_name(key)
+
+
+def create_artifact_store() -> ArtifactStore:
+    """
+    Build the artifact store configured by the ARTIFACT_STORE_BACKEND ("local" or "gridfs")
+    and ARTIFACT_STORE_PATH environment variables.
+
+    Returns:
+        ArtifactStore: Configured artifact store.
+    """
+    backend = os.getenv("ARTIFACT_STORE_BACKEND", "local").lower()
+    if backend == "gridfs":
+        from databaseservice.databaseService import database_service
+
+        return GridFSArtifactStore(database_service.get_db())
+    if backend == "local":
+        return LocalArtifactStore(os.getenv("ARTIFACT_STORE_PATH", "artifacts"))
+    raise ValueError(f"Unsupported ARTIFACT_STORE_BACKEND: {backend}")
+
+
+artifact_store = create_artifact_store()
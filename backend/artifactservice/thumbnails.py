@@ -0,0 +1,53 @@
+import io
+from typing import Dict
+
+from artifactservice.artifactService import ArtifactStore, artifact_store
+from loggingConfig import logger
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, without it only the original thumbnail is stored
+    Image = None
+
+# Maximum width in pixels of each resized variant
+THUMBNAIL_VARIANTS = {
+    "small": 320,
+    "medium": 640,
+}
+DEFAULT_VARIANT = "small"
+
+
+def _resize(image_bytes: bytes, max_width: int) -> bytes:
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert("RGB")
+        if image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=80, optimize=True, progressive=True)
+        return output.getvalue()
+
+
+def store_thumbnail_variants(image_bytes: bytes, store: ArtifactStore = artifact_store) -> Dict[str, dict]:
+    """
+    Store a video thumbnail and its resized variants in the artifact store.
+    JPEG data is already compressed, so variants are stored without further compression.
+
+    Args:
+        image_bytes (bytes): Original thumbnail image. Required.
+        store (ArtifactStore): Artifact store. Default: shared artifact_store.
+
+    Returns:
+        Dict[str, dict]: Artifact reference per variant name, including "original".
+    """
+    variants = {"original": store.put_bytes(image_bytes, content_type="image/jpeg", compress=False)}
+    for name, max_width in THUMBNAIL_VARIANTS.items():
+        if Image is None:
+            variants[name] = variants["original"]
+            continue
+        try:
+            variants[name] = store.put_bytes(_resize(image_bytes, max_width), content_type="image/jpeg", compress=False)
+        except Exception as e:
+            logger.warning("Thumbnail resize to %s failed: %s", name, e)
+            variants[name] = variants["original"]
+    return variants
@@ -0,0 +1,353 @@
+"""
+Local stand-in for the Azure OpenAI chat-completions and embeddings endpoints, so the pipeline and the
+benchmarks can run without network access or quota.
+
+Modes:
+    - fake:   deterministic responses generated locally (default).
+              Embeddings are feature-hashed bags of words (similar texts get similar vectors), unit length,
+              VECTOR_DIMENSIONS wide. Completions are canned (--responses) or templated from the prompts
+              this backend sends: PRE-QRAG routing, temporal classification, transcript cleaning and answers.
+    - record: forward every request to the real Azure OpenAI endpoint and save the response.
+    - replay: answer from saved responses; unknown requests fall back to fake (or 404 with --strict).
+
+Latency (--latency-ms, --jitter-ms, --ms-per-token), a tokens-per-minute limit per deployment (--tpm) and
+random 429 responses (--error-rate) can be configured to exercise the LLM gateway's limits and retries.
+
+Run from the backend directory, then point the backend at it:
+    python -m benchmarks.fakeAzureOpenAI --port 8100 --latency-ms 300 --tpm 60000
+    python -m benchmarks.fakeAzureOpenAI --mode record --recordings results/recordings.jsonl
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8100 AZURE_OPENAI_API_KEY=fake python -m benchmarks.startup_benchmark
+
+Streaming responses are not supported; the backend does not request them.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+
+from llmservice.tokens import TokenBudget, count_tokens
+
+VECTOR_DIMENSIONS = 1536  # databaseservice.indexRegistry.VECTOR_DIMENSIONS
+WORD_PATTERN = re.compile(r"\w+")
+TIMESTAMP_PATTERN = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b")
+
+
+def stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def fake_embedding(text, dimensions: int = VECTOR_DIMENSIONS) -> List[float]:
+    """
+    Deterministic embedding: words (or token ids) and word bigrams are hashed into signed buckets and the
+    vector is normalised, so texts sharing words have a positive cosine similarity.
+
+    Args:
+        text (str | List[int]): Text, or token ids as sent by LangChain embeddings. Required.
+        dimensions (int): Vector size. Default: VECTOR_DIMENSIONS.
+
+    Returns:
+        List[float]: Unit-length embedding.
+    """
+    words = [str(t) for t in text] if isinstance(text, list) else WORD_PATTERN.findall(text.lower())
+    features = words + [a + " " + b for a, b in zip(words, words[1:])]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in features:
+        h = stable_hash(feature)
+        vector[h % dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector = np.random.default_rng(stable_hash(str(text))).standard_normal(dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+    return (vector / norm).tolist()
+
+
+def encode_embedding(embedding: List[float], encoding_format: Optional[str]):
+    """The OpenAI SDK requests base64 (little-endian float32) embeddings by default."""
+    if encoding_format == "base64":
+        return base64.b64encode(struct.pack(f"<{len(embedding)}f", *embedding)).decode("ascii")
+    return embedding
+
+
+def _section(prompt: str, header: str, next_header: str = "**") -> str:
+    start = prompt.find(header)
+    if start < 0:
+        return ""
+    start += len(header)
+    end = prompt.find(next_header, start)
+    return prompt[start:end if end >= 0 else None].strip()
+
+
+def _video_ids(prompt: str) -> List[str]:
+    """
+    Video IDs of the `- video_map = <json>   # ...` line of a PreQRAG prompt.
+
+    ChatService sends {"video_map": {name: video_id}}; the prompt template documents a list of
+    {"name", "video_id"} objects. Both are accepted.
+    """
+    map_match = re.search(r"- video_map\s*=\s*", prompt)
+    if not map_match:
+        return []
+    try:
+        # raw_decode stops at the end of the JSON value, before the trailing # comment
+        video_map, _ = json.JSONDecoder().raw_decode(prompt, map_match.end())
+    except ValueError:
+        return []
+    if isinstance(video_map, dict):
+        video_map = video_map.get("video_map", video_map)
+        return [str(video_id) for video_id in video_map.values()] if isinstance(video_map, dict) else []
+    if isinstance(video_map, list):
+        return [video["video_id"] for video in video_map if isinstance(video, dict) and "video_id" in video]
+    return []
+
+
+def fake_completion(prompt: str, template: str) -> str:
+    """
+    Templated completion for the prompts sent by ChatService and TranscriptService.
+
+    Args:
+        prompt (str): All message contents joined. Required.
+        template (str): Answer template with {question}, {excerpt} and {timestamp} fields. Required.
+
+    Returns:
+        str: Completion text.
+    """
+    if "PRE-QRAG router" in prompt:
+        query_match = re.search(r"- user_query = (.*)", prompt)
+        query = query_match.group(1).strip() if query_match else ""
+        video_ids = _video_ids(prompt)
+        timestamps = TIMESTAMP_PATTERN.findall(query)
+        keywords = " ".join(w for w in WORD_PATTERN.findall(query) if len(w) > 3)
+        variants = [
+            {"video_ids": video_ids, "question": query, "temporal_signal": timestamps},
+            {"video_ids": video_ids, "question": keywords or query, "temporal_signal": []},
+        ]
+        return json.dumps({"routing_type": "MULTI_DOC", "user_query": query, "video_ids": video_ids,
+                           "query_variants": variants})
+
+    if "is **temporal**" in prompt:
+        question = prompt.rsplit("Question:", 1)[-1]
+        timestamps = TIMESTAMP_PATTERN.findall(question)
+        return json.dumps({"is_temporal": bool(timestamps), "timestamp": timestamps[0] if timestamps else "None"})
+
+    if "**Transcript:**" in prompt:
+        # Transcript cleaning: return the transcript unchanged
+        return _section(prompt, "**Transcript:**", "**Your Answer:**")
+
+    question = _section(prompt, "**User's Question:**") or prompt[-200:]
+    context = _section(prompt, "**Context:**")
+    timestamp = TIMESTAMP_PATTERN.search(context)
+    excerpt = " ".join(context.split())[:300]
+    return template.format(question=question, excerpt=excerpt or "no context",
+                           timestamp=timestamp.group(0) if timestamp else "00:00")
+
+
+class Recordings:
+    """
+    Saved responses keyed by a hash of the deployment, the operation and the request body, appended to a JSONL file.
+
+    Args:
+        path (str): JSONL file. Required.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(deployment: str, operation: str, body: dict) -> str:
+        canonical = json.dumps({k: v for k, v in body.items() if k not in ("stream", "user")}, sort_keys=True)
+        return hashlib.sha256(f"{deployment}|{operation}|{canonical}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, status_code: int, response: dict) -> None:
+        entry = {"key": key, "status_code": status_code, "response": response}
+        with self._lock:
+            self._entries[key] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Fake Azure OpenAI")
+    rng = random.Random(args.seed)
+    budgets: Dict[str, TokenBudget] = {}
+    recordings = Recordings(args.recordings) if args.mode in ("record", "replay") else None
+    canned = []
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as f:
+            canned = [(re.compile(r["match"], re.S), r["content"]) for r in json.load(f)]
+    stats = {"requests": 0, "throttled": 0, "injected_errors": 0}
+
+    def rate_limited(message: str, retry_after: float) -> JSONResponse:
+        stats["throttled"] += 1
+        return JSONResponse(
+            {"error": {"code": "429", "message": message}}, status_code=429,
+            headers={"retry-after": str(max(1, round(retry_after))), "retry-after-ms": str(int(retry_after * 1000))},
+        )
+
+    async def admit(deployment: str, tokens: int) -> Optional[JSONResponse]:
+        stats["requests"] += 1
+        if args.error_rate and rng.random() < args.error_rate:
+            stats["injected_errors"] += 1
+            return rate_limited("Injected rate limit error", 1.0)
+        if args.tpm:
+            budget = budgets.setdefault(deployment, TokenBudget(args.tpm))
+            wait = budget.reserve(tokens)
+            if wait > 0:
+                return rate_limited("Requests to this deployment exceeded the token rate limit", wait)
+        return None
+
+    async def simulate_latency(completion_tokens: int = 0) -> None:
+        delay = args.latency_ms + rng.uniform(-args.jitter_ms, args.jitter_ms) + args.ms_per_token * completion_tokens
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    async def forward(request: Request, body: dict):
+        endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT", "").rstrip("/")
+        if not endpoint:
+            raise SystemExit("record mode needs AZURE_OPENAI_ENDPOINT pointing at the real service")
+        async with httpx.AsyncClient(timeout=120) as client:
+            upstream = await client.post(
+                endpoint + request.url.path, params=dict(request.query_params), json=body,
+                headers={"api-key": request.headers.get("api-key") or os.environ.get("AZURE_OPENAI_API_KEY", "")},
+            )
+        return upstream.status_code, upstream.json()
+
+    async def respond(request: Request, deployment: str, operation: str, body: dict, tokens: int, make_fake):
+        if recordings is not None:
+            key = Recordings.key(deployment, operation, body)
+            entry = recordings.get(key)
+            if entry is not None:
+                await simulate_latency()
+                return JSONResponse(entry["response"], status_code=entry["status_code"])
+            if args.mode == "record":
+                status_code, response = await forward(request, body)
+                if status_code == 200:
+                    recordings.put(key, status_code, response)
+                return JSONResponse(response, status_code=status_code)
+            if args.strict:
+                return JSONResponse({"error": {"code": "404", "message": "No recording for this request"}}, status_code=404)
+
+        rejected = await admit(deployment, tokens)
+        if rejected is not None:
+            return rejected
+        response, completion_tokens = make_fake()
+        await simulate_latency(completion_tokens)
+        return JSONResponse(response)
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        contents = []
+        for message in body.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            contents.append(content or "")
+        prompt = "\n".join(contents)
+        prompt_tokens = count_tokens(prompt)
+
+        def make_fake():
+            content = next((text for pattern, text in canned if pattern.search(prompt)), None)
+            if content is None:
+                content = fake_completion(prompt, args.template)
+            completion_tokens = count_tokens(content)
+            return {
+                "id": "chatcmpl-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:24],
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }, completion_tokens
+
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens") or 0
+        return await respond(request, deployment, "chat", body, prompt_tokens + max_tokens, make_fake)
+
+    @app.post("/openai/deployments/{deployment}/embeddings")
+    async def embeddings(deployment: str, request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        tokens = sum(count_tokens(item) if isinstance(item, str) else len(item) for item in inputs)
+        dimensions = body.get("dimensions") or args.dimensions
+
+        def make_fake():
+            data = [
+                {"object": "embedding", "index": i,
+                 "embedding": encode_embedding(fake_embedding(item, dimensions), body.get("encoding_format"))}
+                for i, item in enumerate(inputs)
+            ]
+            return {"object": "list", "data": data, "model": deployment,
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}, 0
+
+        return await respond(request, deployment, "embeddings", body, tokens, make_fake)
+
+    @app.get("/stats")
+    def get_stats():
+        result = dict(stats)
+        if recordings is not None:
+            result.update({"recorded": len(recordings._entries), "replay_hits": recordings.hits,
+                           "replay_misses": recordings.misses})
+        return result
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Azure OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mode", choices=["fake", "record", "replay"], default="fake")
+    parser.add_argument("--recordings", default="results/recordings.jsonl", help="JSONL file for record/replay")
+    parser.add_argument("--strict", action="store_true", help="In replay mode, answer unknown requests with 404")
+    parser.add_argument("--responses", help="JSON list of {\"match\": regex, \"content\": str} canned completions")
+    parser.add_argument("--template", default="Covered at [{timestamp}]: {excerpt}",
+                        help="Answer template with {question}, {excerpt} and {timestamp}")
+    parser.add_argument("--dimensions", type=int, default=VECTOR_DIMENSIONS, help="Embedding size")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Base latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform latency jitter")
+    parser.add_argument("--ms-per-token", type=float, default=0, help="Extra latency per completion token")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute per deployment (0: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 429")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and error injection")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
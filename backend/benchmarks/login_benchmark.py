@@ -0,0 +1,110 @@
+"""
+Login throughput benchmark.
+
+Two modes:
+    - hashing: bcrypt checks through PasswordHasher for several pool sizes, without a server or database.
+      Shows how many sign-ins per second one instance can verify.
+    - http: concurrent POST /auth/login requests against a running server.
+
+Run from the backend directory:
+    python -m benchmarks.login_benchmark --logins 200 --workers 1,2,4,8
+    python -m benchmarks.login_benchmark --url http://localhost:8000 --username alice --password secret --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from userservice.passwordHasher import PasswordHasher
+
+
+def report(label: str, latencies: list, elapsed: float, failures: int = 0) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0
+    print(f"{label:<14} {len(latencies) / elapsed:8.1f} logins/s  "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else 0:8.1f} ms  "
+          f"p95 {p95 * 1000:8.1f} ms  failures {failures}")
+
+
+async def run_hashing(workers: int, logins: int, concurrency: int, hashed: str) -> None:
+    """
+    Verify `logins` passwords with at most `concurrency` checks in flight.
+
+    Args:
+        workers (int): Hashing pool size. Required.
+        logins (int): Number of password checks. Required.
+        concurrency (int): Concurrent logins. Required.
+        hashed (str): bcrypt hash of "password". Required.
+    """
+    hasher = PasswordHasher(workers)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            await hasher.verify_async("password", hashed)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    report(f"workers={workers}", latencies, time.perf_counter() - start)
+    hasher.shutdown()
+
+
+def run_http(url: str, username: str, password: str, logins: int, concurrency: int) -> None:
+    """
+    Send `logins` login requests to a running server with `concurrency` clients.
+
+    Args:
+        url (str): Server base URL. Required.
+        username (str): Existing username. Required.
+        password (str): Password of the user. Required.
+        logins (int): Number of requests. Required.
+        concurrency (int): Concurrent clients. Required.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def login(_):
+        start = time.perf_counter()
+        response = session.post(f"{url.rstrip('/')}/auth/login", json={"username": username, "password": password})
+        return time.perf_counter() - start, response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    report(f"http c={concurrency}", [r[0] for r in results if r[1]], elapsed, sum(1 for r in results if not r[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure login throughput")
+    parser.add_argument("--logins", type=int, default=200, help="Number of logins per measurement")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent logins")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated hashing pool sizes")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor of the test hash")
+    parser.add_argument("--url", help="Benchmark a running server instead of the hashing pool")
+    parser.add_argument("--username", help="Username for --url")
+    parser.add_argument("--password", help="Password for --url")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.username or not args.password:
+            raise SystemExit("--url requires --username and --password")
+        run_http(args.url, args.username, args.password, args.logins, args.concurrency)
+        return
+
+    hashed = PasswordHasher.hash("password", rounds=args.rounds)
+    print(f"bcrypt cost {args.rounds}, {args.logins} logins, concurrency {args.concurrency}")
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        asyncio.run(run_hashing(workers, args.logins, args.concurrency, hashed))
+
+
+if __name__ == "__main__":
+    main()
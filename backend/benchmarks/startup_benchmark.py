@@ -0,0 +1,113 @@
+"""
+Startup benchmark for the backend.
+
+Measures, in fresh interpreter processes:
+    - import time: `import main` (routers, dependency container, models)
+    - ready time: import plus the lifespan hook (DB ping and WARM_SERVICES)
+
+Run from the backend directory:
+    python -m benchmarks.startup_benchmark --runs 5
+    python -m benchmarks.startup_benchmark --warm all --importtime
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import json
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+ready = None
+error = None
+if {ready}:
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+    try:
+        asyncio.run(run())
+        ready = time.perf_counter() - start
+    except Exception as e:
+        error = str(e)
+print(json.dumps({{"import": imported - start, "ready": ready, "error": error}}))
+"""
+
+
+def measure(ready: bool, warm: str) -> dict:
+    """
+    Time one cold start in a new process.
+
+    Args:
+        ready (bool): Also run the lifespan hook. Required.
+        warm (str): Value for WARM_SERVICES. Required.
+
+    Returns:
+        dict: Import and ready time in seconds.
+    """
+    env = {**os.environ, "WARM_SERVICES": warm}
+    process = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT.format(ready=ready)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise SystemExit("import main failed:\n" + process.stderr.strip())
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def top_imports(count: int = 15) -> list:
+    """
+    Slowest modules imported by `import main`, from `python -X importtime`.
+
+    Args:
+        count (int): Number of modules to return. Default: 15.
+
+    Returns:
+        list: (cumulative microseconds, module name) pairs, slowest first.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import and ready time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    parser.add_argument("--warm", default="", help="WARM_SERVICES value for the ready measurement")
+    parser.add_argument("--no-ready", action="store_true", help="Only measure import time")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports")
+    args = parser.parse_args()
+
+    results = [measure(not args.no_ready, args.warm) for _ in range(args.runs)]
+    import_times = [r["import"] for r in results]
+    print(f"import  median {statistics.median(import_times) * 1000:8.1f} ms  "
+          f"max {max(import_times) * 1000:8.1f} ms  ({args.runs} runs)")
+
+    ready_times = [r["ready"] for r in results if r["ready"] is not None]
+    if ready_times:
+        print(f"ready   median {statistics.median(ready_times) * 1000:8.1f} ms  "
+              f"max {max(ready_times) * 1000:8.1f} ms  (WARM_SERVICES={args.warm or '<none>'})")
+    errors = {r["error"] for r in results if r["error"]}
+    for error in errors:
+        print(f"lifespan failed: {error}")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative):")
+        for cumulative, name in top_imports():
+            print(f"{cumulative / 1000:10.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import base64
+
 from bson import ObjectId
 
+from artifactservice.thumbnails import store_thumbnail_variants
 from brokerservice.repository import BrokerRepository#, retrieve_all_video_id
 from brokerservice.status import Status
-from loggingConfig import logger
+from loggingConfig import log_context, logger
+from progressservice.progressBus import VideoProgress
 from transcriptservice.TranscriptService import TranscriptService
 from videoindexerclient.VideoService import VideoService
 from videoindexerclient.model import VideoList
@@ -13,19 +17,19 @@ class BrokerService:
     Broker service handles the orchestration of video indexing, transcript processing, and key phrase extraction for course videos.
 
     Args:
-    video_indexer_service (VideoService): Video Service Class. Default: Video Service Class with default arguments.
-    transcript_service (TranscriptService): Transcript Service Class. Default: Transcript Service Class with default arguments.
-    broker_db (BrokerRepository): Inject Broker Repository to service. Default: Broker Repository Class with default arguments.
+    video_indexer_service (VideoService): Video Service Class. Default: Video Service Class built with default arguments.
+    transcript_service (TranscriptService): Transcript Service Class. Default: Transcript Service Class built with default arguments.
+    broker_db (BrokerRepository): Inject Broker Repository to service. Default: Broker Repository Class built with default arguments.
     """
     def __init__(
             self,
-            video_indexer_service: VideoService = VideoService(),
-            transcript_service: TranscriptService = TranscriptService(),
-            broker_db: BrokerRepository = BrokerRepository()
+            video_indexer_service: VideoService = None,
+            transcript_service: TranscriptService = None,
+            broker_db: BrokerRepository = None
     ):
-        self.video_indexer_service = video_indexer_service
-        self.transcript_service = transcript_service
-        self.broker_db = broker_db
+        self.video_indexer_service = video_indexer_service or VideoService()
+        self.transcript_service = transcript_service or TranscriptService()
+        self.broker_db = broker_db or BrokerRepository()
 
     def start_video_index_process(self, video_list: VideoList):
         """
@@ -49,40 +53,77 @@ class BrokerService:
                 # video.video_id is already the MongoDB ObjectId returned in register_video;
                 # avoid re-wrapping it to prevent ObjectId constructor errors.
                 video_object_id = video.video_id if isinstance(video.video_id, ObjectId) else ObjectId(video.video_id)
-                try:
-                    logger.info("starting video indexing process for video: " + video.video_name)
+                progress = VideoProgress(video_object_id, video.video_name)
+                with log_context(video_id=video_object_id):
+                    try:
+                        logger.info("starting video indexing process for video: " + video.video_name)
 
-                    # Start video indexing process in azure video indexer
-                    video_id, insights = self.video_indexer_service.index_video(video)
+                        # Start video indexing process in azure video indexer
+                        video_id, insights = self.video_indexer_service.index_video(video, on_progress=progress)
                                     
-                    #get thumbnail from video indexer
-                    thumbnail_id = insights["summarizedInsights"]["thumbnailId"]
-                    encoded_image = self.video_indexer_service.get_video_thumbnail(video_id, thumbnail_id)
-                    self.broker_db.update_video_id_thumbnail(video_object_id, video_id, encoded_image)
-
-                    # Get prompt content from video indexer and insert the raw data + video_id into mongodb under video_index_raw 
-                    self.video_indexer_service.get_prompt_content(video_id)
-
-                    #find_one the video_id and get the raw insights 
-                    result = self.video_indexer_service.database.video_indexer_raw_collection.find_one({'video_indexer_id': video_id})
-                    insights = result["insights"]
-
-                    # Transcript cleaning process
-                    self.transcript_service.map_insights_to_transcript(insights, video_object_id)
-                    self.transcript_service.trigger_transcript_cleaning(video_object_id, course, video.video_description)
-                    self.transcript_service.update_prompt_with_clean_transcript(video_object_id, video_id)
-
-                    # Video uploading, indexing and cleaning process completed
-                    logger.info("Completed transcript cleaning process for video: " + video.video_name)
-                    logger.info(f"Completed Video Indexing Process for ID: {video_object_id}")
-                    self.broker_db.change_video_status(video_object_id, Status.COMPLETED)
+                        #get thumbnail from video indexer
+                        thumbnail_id = insights["summarizedInsights"]["thumbnailId"]
+                        encoded_image = self.video_indexer_service.get_video_thumbnail(video_id, thumbnail_id)
+                        thumbnails = store_thumbnail_variants(base64.b64decode(encoded_image)) if encoded_image else {}
+                        self.broker_db.update_video_id_thumbnail(video_object_id, video_id, thumbnails)
+
+                        # Get prompt content from video indexer and insert the raw data + video_id into mongodb under video_index_raw 
+                        progress("PROMPT_CONTENT", indexer_video_id=video_id)
+                        self.video_indexer_service.get_prompt_content(video_id)
+
+                        #find_one the video_id and get the raw insights 
+                        insights = self.video_indexer_service.database.find_video_index_raw(video_id)
+
+                        # Slide text from OCR, stored per frame for temporal retrieval
+                        progress("SLIDE_TEXT")
+                        self.video_indexer_service.map_insights_to_document(insights, video_id)
+
+                        # Transcript cleaning process
+                        progress("TRANSCRIPT")
+                        self.transcript_service.map_insights_to_transcript(insights, video_object_id)
+                        self.transcript_service.trigger_transcript_cleaning(video_object_id, course, video.video_description,
+                                                                            on_progress=progress)
+                        progress("SECTION_INDEXING")
+                        summary = self.transcript_service.update_prompt_with_clean_transcript(video_object_id, video_id)
+
+                        # Video uploading, indexing and cleaning process completed
+                        logger.info("Completed transcript cleaning process for video: " + video.video_name)
+                        logger.info("Completed Video Indexing Process for ID: %s", video_object_id)
+                        self.broker_db.change_video_status(video_object_id, Status.COMPLETED)
+                        progress(Status.COMPLETED.value, indexer_video_id=video_id, sections=summary)
                     
-                except Exception as e:
-                    self.broker_db.change_video_status(video_object_id, Status.ERROR)
-                    print(e)
+                    except Exception as e:
+                        self.broker_db.change_video_status(video_object_id, Status.ERROR)
+                        progress("ERROR", error=str(e))
+                        logger.exception("Video indexing failed: %s", e)
         except Exception as e:
             logger.info("An error occurred during start_video_index_process: " + str(e))
 
+    def reindex_video(self, video_id: str):
+        """
+        Refresh the retrieval index of a video after its cleaned transcript or description was edited.
+        Only sections whose content changed are re-embedded.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Number of sections inserted, updated, deleted and left unchanged, or None if the video does not exist.
+        """
+        video = self.broker_db.find_video_by_video_id(video_id)
+        if not video:
+            logger.info("No video found for re-index: " + video_id)
+            return None
+        progress = VideoProgress(video["_id"], video.get("name"))
+        progress("REINDEXING", indexer_video_id=video_id)
+        try:
+            summary = self.transcript_service.update_prompt_with_clean_transcript(video["_id"], video_id)
+        except Exception as e:
+            progress("ERROR", error=str(e))
+            raise
+        progress(Status.COMPLETED.value, indexer_video_id=video_id, sections=summary)
+        return summary
+
     def register_video(self, video_list: VideoList, course_id: ObjectId):
         """
         Registers video in the database.
@@ -98,26 +139,36 @@ class BrokerService:
             #this is your video collection objectid in mongodb not your video_id from video indexer, creating the document in video collection
             video_id = self.broker_db.insert_video_indexing_progress(video, course_id) 
             video.video_id = video_id
+            VideoProgress(video_id, video.video_name)("REGISTERED", course_id=str(course_id))
         logger.info("Video Registration Completed for Course ID: " + str(course_id))
         return video_list
 
-    def get_video(self):
+    def get_video(self, **page):
         """
-        Retrieve all public videos.
+        Retrieve public videos, optionally one page at a time.
+
+        Args:
+            **page: Optional `course_code`, `course_cursor`, `course_limit`, `video_cursor`, `video_limit` and `version`.
 
         Returns:
-            dict: Public Course-Video information.
+            dict: Public Course-Video information ("courses") and the next course cursor.
         """
-        return self.broker_db.get_course_videos()
+        return self.broker_db.get_course_catalog(public_only=True, **page)
 
-    def get_video_manage(self):
+    def get_video_manage(self, **page):
         """
-        Retrieve all videos to be managed.
+        Retrieve all videos to be managed, optionally one page at a time.
+
+        Args:
+            **page: Optional `course_code`, `course_cursor`, `course_limit`, `video_cursor`, `video_limit` and `version`.
 
         Returns:
-            dict: Course-Video information.
+            dict: Course-Video information ("courses") and the next course cursor.
         """
-        return self.broker_db.get_course_videos_manage()
+        return self.broker_db.get_course_catalog(public_only=False, **page)
+
+    def get_catalog_version(self) -> int:
+        return self.broker_db.get_catalog_version()
 
     def add_course(self, course_code, course_name, course_description):
         self.broker_db.add_course(course_code, course_name, course_description)
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from dotenv import load_dotenv
+
+from loggingConfig import logger
+
+load_dotenv()
+
+
+class CatalogCache:
+    """
+    In-process cache for course catalog responses.
+    Entries are rebuilt on first use after `invalidate`, which the repository calls on every catalog mutation.
+    Keys include the shared catalog version, so changes made by other workers are picked up as well;
+    the TTL is a safety net for writes made outside the repository.
+
+    Args:
+        ttl_sec (float): Maximum age of an entry in seconds. Default: CATALOG_CACHE_TTL or 300.
+        max_entries (int): Maximum number of cached pages. Default: 256.
+    """
+    def __init__(self, ttl_sec: float = float(os.environ.get("CATALOG_CACHE_TTL", 300)), max_entries: int = 256):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, int, object]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], object]):
+        """
+        Get a cached value, loading it on a miss.
+
+        Args:
+            key (str): Cache key. Required.
+            loader (Callable): Builds the value on a miss. Required.
+
+        Returns:
+            object: Cached or freshly loaded value. Callers must not modify it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None and entry[1] == generation and time.monotonic() - entry[0] < self.ttl_sec:
+            return entry[2]
+
+        value = loader()
+        with self._lock:
+            # Do not cache a value loaded while an invalidation happened
+            if generation == self._generation:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = (time.monotonic(), generation, value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        logger.info("Course catalog cache invalidated")
+
+
+catalog_cache = CatalogCache()
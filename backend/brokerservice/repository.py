@@ -1,6 +1,8 @@
 from bson import ObjectId
 from dotenv import load_dotenv
 
+from artifactservice.thumbnails import DEFAULT_VARIANT
+from brokerservice.catalogCache import catalog_cache
 from brokerservice.model import CourseDetails, VideoDetails
 from brokerservice.status import Status
 from databaseservice.databaseService import database_service
@@ -9,6 +11,30 @@ from videoindexerclient.model import Video
 
 load_dotenv()
 
+
+def thumbnail_path(video: dict, variant: str = DEFAULT_VARIANT) -> str:
+    """
+    Relative URL of the thumbnail endpoint for a video, versioned by the image hash so clients can cache it.
+
+    Args:
+        video (dict): Video Document. Required.
+        variant (str): Thumbnail variant. Default: "small".
+
+    Returns:
+        str: "/thumbnails/<video_id>?size=<variant>&v=<hash>", or "" if the video has no thumbnail.
+    """
+    video_id = video.get("video_id")
+    if not video_id:
+        return ""
+    thumbnails = video.get("thumbnails")
+    if thumbnails:
+        ref = thumbnails.get(variant) or thumbnails["original"]
+        return f"/thumbnails/{video_id}?size={variant}&v={ref['sha256'][:12]}"
+    if video.get("thumbnail"):
+        return f"/thumbnails/{video_id}?size={variant}"
+    return ""
+
+
 class BrokerRepository:
     """
     BrokerRepository is a Repository Class that interacts with Azure CosmosDB via PyMongo.
@@ -17,16 +43,20 @@ class BrokerRepository:
     Args:
         video_collection (str): Name of Video Collection. Default: "video".
         course_collection (str): Name of Course Collection. Default: "course.
+        catalog_meta_collection (str): Name of the collection holding the catalog version. Default: "catalog_meta".
     """
 
     def __init__(
             self,
             video_collection: str = "video",
-            course_collection: str = "course"
+            course_collection: str = "course",
+            catalog_meta_collection: str = "catalog_meta"
     ):
         db = database_service.get_db()
         self.video = db[video_collection]
         self.course = db[course_collection]
+        self.catalog_meta = db[catalog_meta_collection]
+        self.catalog_cache = catalog_cache
 
     def insert_video_indexing_progress(self, video: Video, course_id: ObjectId):
         """
@@ -51,6 +81,7 @@ class BrokerRepository:
             "$push": {"videos": video_id}
         }
         result = self.course.update_one(filter_query, update_data)
+        self.invalidate_catalog()
         if result.matched_count > 0:
             logger.info("Document updated successfully for insert_video_indexing_progress.")
             return video_id
@@ -58,19 +89,40 @@ class BrokerRepository:
             logger.info("Document update failed for insert_video_indexing_progress.")
             return ""
 
-    def update_video_id_thumbnail(self, video_object_id: ObjectId, video_id: str, video_thumbnail: str):
+    def update_video_id_thumbnail(self, video_object_id: ObjectId, video_id: str, thumbnails: dict):
+        """
+        Set the Video Indexer ID of a video and the artifact references of its thumbnail variants.
+
+        Args:
+            video_object_id (ObjectId): Object ID of Video. Required.
+            video_id (str): Video Indexer ID. Required.
+            thumbnails (dict): Artifact reference per thumbnail variant. Required.
+        """
         filter_query = {"_id": video_object_id}
 
         new_fields = {
             "video_id": video_id,
-            "thumbnail": "data:image/jpeg;base64," + video_thumbnail
+            "thumbnails": thumbnails
         }
-        result = self.video.update_one(filter_query, {"$set": new_fields})
+        result = self.video.update_one(filter_query, {"$set": new_fields, "$unset": {"thumbnail": ""}})
+        self.invalidate_catalog()
         if result.matched_count > 0:
             logger.info("Video Document Thumbnail updated successfully.")
         else:
             logger.info("No matching Video Document found.")
 
+    def find_video_thumbnails(self, video_id: str) -> dict:
+        """
+        Find the thumbnail fields of a video.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Video Document with "thumbnails" (artifact references) or the legacy inline "thumbnail", or None.
+        """
+        return self.video.find_one({"video_id": video_id}, {"thumbnails": 1, "thumbnail": 1})
+
     def change_video_status(self, video_object_id: ObjectId, status_new: Status):
         filter_query = {"_id": video_object_id}
 
@@ -79,12 +131,25 @@ class BrokerRepository:
             "visibility": "PRIVATE"
         }
         result = self.video.update_one(filter_query, {"$set": new_fields})
+        self.invalidate_catalog()
         if result.matched_count > 0:
             logger.info("Video Status updated successfully for ID: " + str(video_object_id))
         else:
             logger.info("No matching document found for ID: " + str(video_object_id))
             raise Exception("No matching document found for ID: " + str(video_object_id))
 
+    def find_video_by_video_id(self, video_id: str) -> dict:
+        """
+        Find a Video Document by its Video Indexer ID.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Video Document, or None if not found.
+        """
+        return self.video.find_one({"video_id": video_id})
+
     def check_if_course_exist(self, course_code: str) -> dict:
         """
         Check if Course Code exist in Course collection.
@@ -143,6 +208,7 @@ class BrokerRepository:
         filter_query = {"course_code": course_id}
         visibility_update = {"visibility": visibility}
         result = self.course.update_one(filter_query, {"$set": visibility_update})
+        self.invalidate_catalog()
         if result.matched_count > 0:
             logger.info("Course Document Visibility updated successfully.")
             return result.upserted_id
@@ -153,6 +219,7 @@ class BrokerRepository:
         filter_query = {"video_id": video_id}
         visibility_update = {"visibility": visibility}
         result = self.video.update_one(filter_query, {"$set": visibility_update})
+        self.invalidate_catalog()
         if result.matched_count > 0:
             logger.info("Video Document Visibility updated successfully.")
             return result.upserted_id
@@ -163,81 +230,181 @@ class BrokerRepository:
         filter_query = {"course_code": course_details.course_id}
         course_update = {"course_name": course_details.course_name, "summary": course_details.course_description}
         result = self.course.update_one(filter_query, {"$set": course_update})
+        self.invalidate_catalog()
         if result.matched_count > 0:
-            logger.info("Course Document updated successfully for Course Code: ", course_details.course_id)
+            logger.info("Course Document updated successfully for Course Code: " + str(course_details.course_id))
             return result.upserted_id
         else:
-            logger.info("No Course Document found for Course Code: ", course_details.course_id)
+            logger.info("No Course Document found for Course Code: " + str(course_details.course_id))
 
 
     def update_video_details(self, video: VideoDetails):
         filter_query = {"video_id": video.video_id}
         video_update = {"name": video.video_name, "summary": video.video_description}
         result = self.video.update_one(filter_query, {"$set": video_update})
+        self.invalidate_catalog()
         if result.matched_count > 0:
-            logger.info("Video Document updated successfully for Video ID: ", video.video_id)
+            logger.info("Video Document updated successfully for Video ID: " + str(video.video_id))
             return True
         else:
-            logger.info("No Video Document found for Video Code: ", video.video_id)
+            logger.info("No Video Document found for Video Code: " + str(video.video_id))
             return False
 
+    def get_catalog_version(self) -> int:
+        """
+        Get the catalog version counter, incremented on every catalog change by any worker.
+
+        Returns:
+            int: Catalog version.
+        """
+        document = self.catalog_meta.find_one({"_id": "catalog"}, {"version": 1})
+        return document.get("version", 0) if document else 0
+
+    def invalidate_catalog(self):
+        """
+        Record a catalog change: bump the shared version counter and drop the cached catalog of this worker.
+        """
+        self.catalog_meta.update_one({"_id": "catalog"}, {"$inc": {"version": 1}}, upsert=True)
+        self.catalog_cache.invalidate()
+
+    def _catalog_pipeline(self, public_only: bool, course_code: str = None, course_cursor: str = None,
+                          course_limit: int = None, video_cursor: ObjectId = None, video_limit: int = None) -> list:
+        """
+        Build the course catalog aggregation: courses joined with their videos in one `$lookup`,
+        projected down to the fields returned by the catalog endpoints. Video filtering, ordering and the
+        per-course limit run inside the `$lookup`, so videos beyond the page are never loaded.
+
+        Args:
+            public_only (bool): Only public courses with completed, public videos. Required.
+            course_code (str): Only this course. Optional.
+            course_cursor (str): Only courses with a course code after this one. Optional.
+            course_limit (int): Maximum number of courses, plus one to detect a next page. Optional.
+            video_cursor (ObjectId): Only videos with an ObjectId after this one; needs `course_code`. Optional.
+            video_limit (int): Maximum number of videos per course, plus one to detect a next page. Optional.
+
+        Returns:
+            list: Aggregation pipeline on the course collection.
+        """
+        if video_cursor is not None and course_code is None:
+            raise ValueError("video_cursor requires course_code")
+
+        course_match = {"visibility": "PUBLIC"} if public_only else {}
+        course_code_match = {}
+        if course_code is not None:
+            course_code_match["$eq"] = course_code
+        if course_cursor is not None:
+            course_code_match["$gt"] = course_cursor
+        if course_code_match:
+            course_match["course_code"] = course_code_match
+
+        video_match = {}
+        if public_only:
+            video_match.update({"status": Status.COMPLETED.value, "visibility": "PUBLIC"})
+        if video_cursor is not None:
+            video_match["_id"] = {"$gt": video_cursor}
+
+        video_pipeline = [{"$match": video_match}] if video_match else []
+        if video_cursor is not None or video_limit is not None:
+            video_pipeline.append({"$sort": {"_id": 1}})
+        if video_limit is not None:
+            video_pipeline.append({"$limit": video_limit + 1})
+        video_pipeline.append({"$project": {
+            "_id": 1,
+            "videoName": {"$ifNull": ["$name", ""]},
+            "summary": {"$ifNull": ["$video_description", ""]},
+            "video_id": 1,
+            "thumbnails": 1,
+            # Only whether a legacy inline thumbnail exists, never the base64 data itself
+            "thumbnail": {"$ne": [{"$type": "$thumbnail"}, "missing"]},
+            "visibility": {"$ifNull": ["$visibility", ""]},
+            "status": {"$ifNull": ["$status", ""]}
+        }})
+
+        pipeline = [{"$match": course_match}, {"$sort": {"course_code": 1}}]
+        if course_limit is not None:
+            pipeline.append({"$limit": course_limit + 1})
+        pipeline += [
+            {"$lookup": {
+                "from": self.video.name,
+                "localField": "videos",
+                "foreignField": "_id",
+                "pipeline": video_pipeline,
+                "as": "courseVideos"
+            }},
+            {"$project": {
+                "_id": 0,
+                "courseName": "$course_name",
+                "courseCode": "$course_code",
+                "visibility": "$visibility",
+                "courseVideos": 1
+            }}
+        ]
+        return pipeline
+
+    def _load_catalog(self, public_only: bool, course_code: str = None, course_cursor: str = None,
+                      course_limit: int = None, video_cursor: str = None, video_limit: int = None) -> dict:
+        courses = list(self.course.aggregate(self._catalog_pipeline(
+            public_only, course_code, course_cursor, course_limit,
+            ObjectId(video_cursor) if video_cursor else None, video_limit
+        )))
+
+        next_course_cursor = None
+        if course_limit is not None and len(courses) > course_limit:
+            courses = courses[:course_limit]
+            next_course_cursor = courses[-1].get("courseCode")
+
+        for course in courses:
+            for field in ("courseName", "courseCode", "visibility"):
+                course.setdefault(field, None)
+            videos = course["courseVideos"]
+            if video_limit is not None and len(videos) > video_limit:
+                videos = videos[:video_limit]
+                course["nextVideoCursor"] = str(videos[-1]["_id"])
+            for video in videos:
+                video["thumbnail"] = thumbnail_path(video)
+                video["videoId"] = video.pop("video_id", None) or ""
+                video.pop("thumbnails", None)
+                video.pop("_id", None)
+            course["courseVideos"] = videos
+
+        return {"courses": courses, "next_course_cursor": next_course_cursor}
+
+    def get_course_catalog(self, public_only: bool, version: int = None, **page) -> dict:
+        """
+        Get one page of the course catalog, served from the catalog cache.
+
+        Courses are ordered by course code and videos by creation. Without limits the whole catalog is returned.
+
+        Args:
+            public_only (bool): Only public courses with completed, public videos. Required.
+            version (int): Catalog version the page belongs to. Default: read from the database.
+            **page: Optional `course_code`, `course_cursor`, `course_limit`, `video_cursor` and `video_limit`.
+
+        Returns:
+            dict: "courses" (Course-Video information) and "next_course_cursor" (None on the last page).
+        """
+        if version is None:
+            version = self.get_catalog_version()
+        key = f"{version}:{'public' if public_only else 'manage'}:{sorted(page.items())}"
+        return self.catalog_cache.get(key, lambda: self._load_catalog(public_only, **page))
+
     def get_course_videos(self):
-        course_video_result = []
-        # TODO: Filter based on visibility
-        result = self.course.find({'visibility': 'PUBLIC'})
-        for course in result:
-            course_video_dict = {
-                "courseName": course.get("course_name"),
-                "courseCode": course.get("course_code"),
-                "visibility": course.get("visibility")
-            }
-            course_videos = []
-            # TODO: Filter based on visibility
-            video_result = self.video.find({
-                '_id': {'$in': course.get("videos", [])},
-                'status': 'COMPLETED',
-                'visibility': 'PUBLIC'
-            })
-            for video in video_result:
-                course_videos.append({
-                    "videoName": video.get("name", ""),
-                    "summary": video.get("video_description", ""),
-                    "videoId": video.get("video_id", ""),
-                    "thumbnail": video.get("thumbnail", ""),
-                    "visibility": video.get("visibility", ""),
-                    "status": video.get("status", "")
-                })
-            course_video_dict["courseVideos"] = course_videos
-            course_video_result.append(course_video_dict)
-
-        return course_video_result
+        """
+        Public course catalog: public courses with their completed, public videos.
+
+        Returns:
+            list: Course-Video information.
+        """
+        return self.get_course_catalog(public_only=True)["courses"]
 
     def get_course_videos_manage(self):
-        course_video_result = []
-        result = self.course.find()
-        for course in result:
-            course_video_dict = {
-                "courseName": course.get("course_name"),
-                "courseCode": course.get("course_code"),
-                "visibility": course.get("visibility")
-            }
-            course_videos = []
-            video_result = self.video.find({
-                '_id': {'$in': course.get("videos", [])}
-            })
-            for video in video_result:
-                course_videos.append({
-                    "videoName": video.get("name", ""),
-                    "summary": video.get("video_description", ""),
-                    "videoId": video.get("video_id", ""),
-                    "thumbnail": video.get("thumbnail", ""),
-                    "visibility": video.get("visibility", ""),
-                    "status": video.get("status", "")
-                })
-            course_video_dict["courseVideos"] = course_videos
-            course_video_result.append(course_video_dict)
-
-        return course_video_result
+        """
+        Management catalog: every course with every video.
+
+        Returns:
+            list: Course-Video information.
+        """
+        return self.get_course_catalog(public_only=False)["courses"]
 
     def add_course(self, course_code: str, course_name: str, course_description: str):
         try:
@@ -252,6 +419,7 @@ class BrokerRepository:
                 "visibility": "PRIVATE"
             }
             self.course.insert_one(course_dict)
+            self.invalidate_catalog()
             return
         except Exception as e:
             logger.info("Error when adding course: " + str(e))
@@ -270,6 +438,7 @@ class BrokerRepository:
         try:
             filter_query = {"course_code": course_code}
             result = self.course.delete_one(filter_query)
+            self.invalidate_catalog()
             if result.deleted_count > 0:
                 logger.info("Course deleted successfully for Course Code: " + str(course_code))
                 return True
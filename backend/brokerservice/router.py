@@ -1,21 +1,44 @@
+import base64
+import hashlib
+from typing import Optional
+
 from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException
-from starlette.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from starlette.responses import JSONResponse, Response
 
-from brokerservice.brokerService import BrokerService
+from artifactservice.artifactService import artifact_store
+from artifactservice.thumbnails import DEFAULT_VARIANT
 from brokerservice.model import UpdateRequestBody, CourseDetailsRequest, VideoDetailsRequest, CourseDetails
+from dependencies import get_broker_service, get_broker_repository
 from loggingConfig import logger
-from transcriptservice.TranscriptService import TranscriptService
 
 load_dotenv()
 
 router = APIRouter(tags=["broker-service"])
 
-broker_service = BrokerService()
+
+def with_thumbnail_urls(course_video: list, request: Request) -> list:
+    """
+    Turn the relative thumbnail paths of a course-video mapping into absolute URLs of this server.
+    The mapping is copied, so cached results are never modified.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    return [
+        {
+            **course,
+            "courseVideos": [
+                {**video, "thumbnail": base_url + video["thumbnail"] if video.get("thumbnail") else ""}
+                for video in course.get("courseVideos", [])
+            ]
+        }
+        for course in course_video
+    ]
+
 
 @router.put("/visibility", status_code=200)
-def get_videos(body: UpdateRequestBody):
+def get_videos(body: UpdateRequestBody, broker_service=Depends(get_broker_service)):
     """
     Updates the visibility option for either a video or course.
     
@@ -40,7 +63,7 @@ def get_videos(body: UpdateRequestBody):
         raise HTTPException(status_code=500, detail=f"Error while updating visibility: {str(e)}")
 
 @router.put("/course", status_code=200)
-def update_course(body: CourseDetailsRequest):
+def update_course(body: CourseDetailsRequest, broker_service=Depends(get_broker_service)):
     """
     Updates course details including course name and description.
     
@@ -62,7 +85,7 @@ def update_course(body: CourseDetailsRequest):
 
 
 @router.put("/video", status_code=200)
-def update_video(body: VideoDetailsRequest):
+def update_video(body: VideoDetailsRequest, broker_service=Depends(get_broker_service)):
     """
     Updates video details including video name and description.
     
@@ -82,46 +105,165 @@ def update_video(body: VideoDetailsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error while updating video: {str(e)}")
 
+@router.post("/video/{video_id}/reindex", status_code=200)
+def reindex_video(video_id: str, broker_service=Depends(get_broker_service)):
+    """
+    Incrementally re-indexes a video after its cleaned transcript or description changed.
+
+    Only sections whose content changed are re-embedded, stale sections are removed and
+    unchanged sections keep their vectors.
+
+    Args:
+        video_id (str): Video Indexer ID of the video to re-index
+
+    Returns:
+        dict: Success message with the number of sections inserted, updated, deleted and unchanged
+    """
+    try:
+        summary = broker_service.reindex_video(video_id)
+        if summary is None:
+            return JSONResponse(status_code=404, content={"message": "Video not found"})
+        return {"message": "Successfully Re-indexed Video", "summary": summary}
+    except Exception as e:
+        logger.info("Error at /video/reindex: " + str(e))
+        raise HTTPException(status_code=500, detail=f"Error while re-indexing video: {str(e)}")
+
+def catalog_response(request: Request, scope: str, load_page, version: int, page: dict):
+    """
+    Build a catalog response with a weak ETag derived from the catalog version.
+    An If-None-Match matching the current version returns 304 without loading the catalog.
+    """
+    etag = f'W/"catalog-{scope}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if page.get("video_cursor") is not None and page.get("course_code") is None:
+        # A video cursor belongs to one course; applied to every course on the page it would skip their videos
+        raise HTTPException(status_code=400, detail="video_cursor requires course_code")
+    try:
+        result = load_page(version=version, **{k: v for k, v in page.items() if v is not None})
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid video_cursor")
+    if result["courses"]:
+        content = {
+            "message": "Successfully Retrieve",
+            "course_video_mapping": with_thumbnail_urls(result["courses"], request),
+            "next_course_cursor": result["next_course_cursor"]
+        }
+    else:
+        content = {"message": "No Records Found"}
+    return JSONResponse(content=content, headers=headers)
+
 @router.get("/videos", status_code=200)
-def get_videos():
+def get_videos(
+    request: Request,
+    course_code: Optional[str] = Query(default=None, description="Only return this course"),
+    course_cursor: Optional[str] = Query(default=None, description="next_course_cursor of the previous page"),
+    course_limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of courses"),
+    video_cursor: Optional[str] = Query(default=None, description="nextVideoCursor of the course given by course_code"),
+    video_limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of videos per course"),
+    broker_service=Depends(get_broker_service)
+):
     """
-    Retrieves all public videos with their course mappings.
+    Retrieves public videos with their course mappings.
     
-    This endpoint returns a list of all videos that are marked as public/visible,
+    This endpoint returns videos that are marked as public/visible,
     organized by their associated courses. This is typically used for displaying
     available content to end users.
+
+    Courses are ordered by course code. Without limits every course and video is returned.
+    Responses carry a weak ETag of the catalog version; an unchanged catalog returns 304.
+
+    Args:
+        course_code: Only return this course (optional)
+        course_cursor: Cursor from next_course_cursor of the previous page (optional)
+        course_limit: Maximum number of courses per page (optional)
+        video_cursor: Cursor from nextVideoCursor of a course, to page through its videos; requires course_code (optional)
+        video_limit: Maximum number of videos per course (optional)
     
     Returns:
-        dict: Success message with course-video mapping if videos are found,
+        dict: Success message with course-video mapping and next_course_cursor if videos are found,
               or error message if no records are found
     """
-    course_video = broker_service.get_video()
-    if course_video:
-        return {"message": "Successfully Retrieve", "course_video_mapping": course_video}
-    else:
-        return {"message": "No Records Found"}
+    page = {"course_code": course_code, "course_cursor": course_cursor, "course_limit": course_limit,
+            "video_cursor": video_cursor, "video_limit": video_limit}
+    return catalog_response(request, "public", broker_service.get_video, broker_service.get_catalog_version(), page)
 
 @router.get("/videos/manage", status_code=200)
-def get_videos_manage():
+def get_videos_manage(
+    request: Request,
+    course_code: Optional[str] = Query(default=None, description="Only return this course"),
+    course_cursor: Optional[str] = Query(default=None, description="next_course_cursor of the previous page"),
+    course_limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of courses"),
+    video_cursor: Optional[str] = Query(default=None, description="nextVideoCursor of the course given by course_code"),
+    video_limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of videos per course"),
+    broker_service=Depends(get_broker_service)
+):
     """
-    Retrieves all videos for management purposes including private/hidden videos.
+    Retrieves videos for management purposes including private/hidden videos.
     
-    This endpoint returns a comprehensive list of all videos regardless of their
+    This endpoint returns videos regardless of their
     visibility status, organized by courses. This is typically used by administrators
     for content management and oversight purposes.
+
+    Accepts the same pagination parameters and conditional GET as /videos.
     
     Returns:
-        dict: Success message with course-video mapping if videos are found,
+        dict: Success message with course-video mapping and next_course_cursor if videos are found,
               or error message if no records are found
     """
-    course_video = broker_service.get_video_manage()
-    if course_video:
-        return {"message": "Successfully Retrieve", "course_video_mapping": course_video}
+    page = {"course_code": course_code, "course_cursor": course_cursor, "course_limit": course_limit,
+            "video_cursor": video_cursor, "video_limit": video_limit}
+    return catalog_response(request, "manage", broker_service.get_video_manage, broker_service.get_catalog_version(), page)
+
+@router.get("/thumbnails/{video_id}", status_code=200)
+def get_thumbnail(video_id: str, request: Request, size: str = DEFAULT_VARIANT, v: str = None,
+                  broker_db=Depends(get_broker_repository)):
+    """
+    Serves a video thumbnail from the artifact store.
+
+    Thumbnails are content-addressed, so the ETag is the image hash and a matching If-None-Match
+    returns 304 without a body. URLs returned by the catalog carry the hash in `v` and are cached
+    by clients as immutable.
+
+    Args:
+        video_id (str): Video Indexer ID of the video
+        size (str): Thumbnail variant: "small", "medium" or "original" (default: "small")
+        v (str): Image version from the catalog URL (optional)
+
+    Returns:
+        Response: JPEG image, or 304 if the client copy is current
+    """
+    video = broker_db.find_video_thumbnails(video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    thumbnails = video.get("thumbnails")
+    if thumbnails:
+        ref = thumbnails.get(size) or thumbnails.get("original")
+        digest, content_type = ref["sha256"], ref.get("content_type", "image/jpeg")
+        load = lambda: artifact_store.read_bytes(ref)
+    elif video.get("thumbnail"):
+        # Videos ingested before the artifact store hold the image inline as a data URL
+        data = base64.b64decode(video["thumbnail"].split(",", 1)[-1])
+        digest, content_type = hashlib.sha256(data).hexdigest(), "image/jpeg"
+        load = lambda: data
     else:
-        return {"message": "No Records Found"}
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if v else "public, max-age=3600"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=load(), media_type=content_type, headers=headers)
 
 @router.post("/course")
-def add_course(body: CourseDetails):
+def add_course(body: CourseDetails, broker_service=Depends(get_broker_service)):
     """
     Creates a new course in the system.
     
@@ -147,7 +289,7 @@ def add_course(body: CourseDetails):
         return JSONResponse(status_code=500, content={"message": "Error adding Course"})
 
 @router.delete("/course")
-def delete_course(course_code: str):
+def delete_course(course_code: str, broker_service=Depends(get_broker_service)):
     """
     Deletes a course from the system.
     
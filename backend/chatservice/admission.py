@@ -0,0 +1,222 @@
+import asyncio
+import collections
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from loggingConfig import logger
+
+load_dotenv()
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a chat request is not admitted.
+
+    Args:
+        reason (str): Why the request was rejected. Required.
+        retry_after (float): Seconds after which a retry can succeed. Required.
+    """
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second up to `capacity`.
+
+    Args:
+        rate (float): Tokens added per second. Required.
+        capacity (float): Maximum number of tokens (burst size). Required.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Refill the bucket and return the seconds until one token is available (0 if available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def refund(self) -> None:
+        """Give back a token taken for a request that was not served."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class BucketMap:
+    """Token buckets by key, least recently used keys are dropped (a dropped bucket would be full again anyway)."""
+    def __init__(self, rate_per_min: float, burst: float, max_keys: int = 10000):
+        self.rate = rate_per_min / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = collections.OrderedDict()
+
+    def get(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class AdmissionController:
+    """
+    Admission control for chat requests, which each fan out to several LLM and embedding calls.
+
+    1. Per-user and per-course token buckets limit the request rate of one student or one course.
+       A request takes a token from both buckets, or from neither if either is empty.
+       Anonymous callers, keyed by client address, share a separate and much smaller budget: several students
+       behind one NAT would otherwise share a user bucket, and their course code is not attributable to anyone,
+       so they do not take from the course buckets. With an anonymous rate of 0 they are not admitted at all.
+    2. At most `max_in_flight` admitted requests run at once. Up to `max_queue` more wait for a slot,
+       each for at most `max_wait_sec`; beyond that requests are rejected immediately.
+
+    Rejections raise AdmissionRejected with a Retry-After hint, so overload fails fast instead of growing
+    the latency of admitted requests. All methods run on the event loop, so no locking is needed.
+
+    Args:
+        user_rate_per_min (float): Sustained requests per minute per user. Default: CHAT_USER_RATE_PER_MIN or 10.
+        user_burst (float): Burst size per user. Default: CHAT_USER_BURST or 5.
+        course_rate_per_min (float): Sustained requests per minute per course. Default: CHAT_COURSE_RATE_PER_MIN or 120.
+        course_burst (float): Burst size per course. Default: CHAT_COURSE_BURST or 30.
+        anonymous_rate_per_min (float): Sustained requests per minute per anonymous client address, 0 to reject
+            anonymous callers. Default: CHAT_ANON_RATE_PER_MIN or 2.
+        anonymous_burst (float): Burst size per anonymous client address. Default: CHAT_ANON_BURST or 2.
+        max_in_flight (int): Concurrently processed requests. Default: CHAT_MAX_IN_FLIGHT or 16.
+        max_queue (int): Requests waiting for a slot. Default: CHAT_MAX_QUEUE or 32.
+        max_wait_sec (float): Maximum wait for a slot. Default: CHAT_MAX_WAIT_SEC or 5.
+    """
+    def __init__(
+            self,
+            user_rate_per_min: float = float(os.environ.get("CHAT_USER_RATE_PER_MIN", 10)),
+            user_burst: float = float(os.environ.get("CHAT_USER_BURST", 5)),
+            course_rate_per_min: float = float(os.environ.get("CHAT_COURSE_RATE_PER_MIN", 120)),
+            course_burst: float = float(os.environ.get("CHAT_COURSE_BURST", 30)),
+            anonymous_rate_per_min: float = float(os.environ.get("CHAT_ANON_RATE_PER_MIN", 2)),
+            anonymous_burst: float = float(os.environ.get("CHAT_ANON_BURST", 2)),
+            max_in_flight: int = int(os.environ.get("CHAT_MAX_IN_FLIGHT", 16)),
+            max_queue: int = int(os.environ.get("CHAT_MAX_QUEUE", 32)),
+            max_wait_sec: float = float(os.environ.get("CHAT_MAX_WAIT_SEC", 5)),
+    ):
+        self.user_buckets = BucketMap(user_rate_per_min, user_burst)
+        self.course_buckets = BucketMap(course_rate_per_min, course_burst)
+        self.anonymous_buckets = BucketMap(anonymous_rate_per_min, anonymous_burst)
+        self.allow_anonymous = anonymous_rate_per_min > 0 and anonymous_burst >= 1
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_sec = max_wait_sec
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def check_rate(self, user_key: str, course_key: Optional[str] = None, anonymous: bool = False) -> list:
+        """
+        Take a token from the user's and the course's bucket.
+
+        Args:
+            user_key (str): User identity, the client address for anonymous callers. Required.
+            course_key (str): Course code. Optional.
+            anonymous (bool): Use the anonymous budget and skip the course bucket. Default: False.
+
+        Returns:
+            list: Buckets a token was taken from, to refund if the request is not served.
+
+        Raises:
+            AdmissionRejected: If either bucket is empty.
+        """
+        now = time.monotonic()
+        if anonymous:
+            user_bucket, course_bucket = self.anonymous_buckets.get(user_key), None
+        else:
+            user_bucket = self.user_buckets.get(user_key)
+            course_bucket = self.course_buckets.get(course_key) if course_key else None
+
+        wait = user_bucket.wait_time(now)
+        if wait > 0:
+            raise AdmissionRejected("User rate limit exceeded", wait)
+        if course_bucket is not None:
+            wait = course_bucket.wait_time(now)
+            if wait > 0:
+                raise AdmissionRejected("Course rate limit exceeded", wait)
+            course_bucket.take()
+        user_bucket.take()
+        return [bucket for bucket in (user_bucket, course_bucket) if bucket is not None]
+
+    @asynccontextmanager
+    async def admit(self, user_key: str, course_key: Optional[str] = None, anonymous: bool = False):
+        """
+        Admit a request: apply the rate limits, then hold one in-flight slot for the duration of the block.
+
+        Args:
+            user_key (str): User identity, the client address for anonymous callers. Required.
+            course_key (str): Course code. Optional.
+            anonymous (bool): The caller has no token, see check_rate. Default: False.
+
+        Raises:
+            AdmissionRejected: If the request is rate limited, the queue is full or no slot frees up in time.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        taken = self.check_rate(user_key, course_key, anonymous)
+
+        # A request turned away because the server is busy does not use up the caller's or the course's rate
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self._refund(taken)
+                raise AdmissionRejected("Server busy", self.max_wait_sec)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_sec)
+            except asyncio.TimeoutError:
+                self._refund(taken)
+                raise AdmissionRejected("Server busy", self.max_wait_sec)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    @staticmethod
+    def _refund(buckets: list) -> None:
+        for bucket in buckets:
+            bucket.refund()
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "waiting": self.waiting,
+                "max_in_flight": self.max_in_flight, "max_queue": self.max_queue}
+
+
+chat_admission = AdmissionController()
+
+
+def log_rejection(user_key: str, course_key: Optional[str], rejection: AdmissionRejected) -> None:
+    logger.warning("Chat request rejected (%s) for %s in course %s, retry after %ss",
+                   rejection.reason, user_key, course_key, rejection.retry_after_header)
@@ -0,0 +1,314 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from loggingConfig import logger
+
+load_dotenv()
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have how i if in into is it its
+me my not of on or our she he so than that the their them then there these they this those to was we were
+what when where which who why will with would you your
+""".split())
+
+# Asymptotic notation such as O(N^2), O(n log n) or Θ(1), kept as a single token: o(n^2), o(nlogn), θ(1)
+BIG_O_RE = re.compile(r"(?<![A-Za-z0-9_])([OoΘθΩω])\s*\(([^()]{1,30})\)")
+# Identifiers (snake_case, camelCase, dotted.names, C++, C#) and numbers
+TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*(?:\+\+|#)?|\d+(?:\.\d+)*")
+CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+SUPERSCRIPTS = str.maketrans({"²": "^2", "³": "^3", "ⁿ": "^n"})
+
+
+def _stem(word: str) -> str:
+    """Light plural stripping of plain words, so "queues" matches "queue" and "searches" matches "search"."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize lecture text for keyword search.
+
+    Besides plain words (lower-cased, stop words removed, plurals stripped), code identifiers are indexed
+    whole and by their parts (`insert_node` -> insert_node, insert, node; `nodeList.next` -> nodelist.next,
+    node, list, next), C++ / C# keep their symbols, and complexity expressions become one token
+    (`O(N^2)` -> o(n^2)).
+
+    Args:
+        text (str): Text. Required.
+
+    Returns:
+        List[str]: Tokens, repeated as often as they occur.
+    """
+    text = text.translate(SUPERSCRIPTS)
+    tokens = []
+    for match in BIG_O_RE.finditer(text):
+        inner = re.sub(r"[\s*·]+", "", match.group(2)).lower()
+        tokens.append(f"{match.group(1).lower()}({inner})")
+    for match in TOKEN_RE.finditer(text):
+        raw = match.group(0)
+        word = raw.lower()
+        if word in STOPWORDS or (len(word) == 1 and not word.isdigit()):
+            continue
+        tokens.append(_stem(word))
+        parts = [piece for segment in raw.split(".") for part in segment.split("_") for piece in CAMEL_RE.findall(part)]
+        if len(parts) > 1:
+            tokens.extend(_stem(part.lower()) for part in parts
+                          if len(part) > 1 and part.lower() not in STOPWORDS and part.lower() != word)
+    return tokens
+
+
+class Bm25Shard:
+    """
+    In-memory BM25 inverted index over the sections of one course.
+
+    Postings map a term to {section key: term frequency}; sections are added and removed per video, so an
+    ingestion only rewrites the postings of the re-indexed video.
+
+    Args:
+        k1 (float): Term frequency saturation. Default: BM25_K1 or 1.2.
+        b (float): Length normalisation. Default: BM25_B or 0.75.
+    """
+    def __init__(self, k1: float = float(os.environ.get("BM25_K1", 1.2)),
+                 b: float = float(os.environ.get("BM25_B", 0.75))):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.docs: Dict[str, dict] = {}
+        self.lengths: Dict[str, int] = {}
+        self.terms: Dict[str, Counter] = {}
+        self.video_docs: Dict[str, set] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, doc: dict) -> None:
+        """Index a section document ({"_id", "textContent", "metadata": {"video_id", ...}})."""
+        key = str(doc["_id"])
+        counts = Counter(tokenize(doc.get("textContent") or ""))
+        video_id = (doc.get("metadata") or {}).get("video_id")
+        with self._lock:
+            if key in self.docs:
+                self._remove(key)
+            self.docs[key] = {"_id": doc["_id"], "textContent": doc.get("textContent"), "metadata": doc.get("metadata")}
+            self.terms[key] = counts
+            self.lengths[key] = sum(counts.values())
+            self.total_length += self.lengths[key]
+            self.video_docs.setdefault(video_id, set()).add(key)
+            for term, frequency in counts.items():
+                self.postings.setdefault(term, {})[key] = frequency
+
+    def _remove(self, key: str) -> None:
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(key)
+        video_id = (self.docs.pop(key).get("metadata") or {}).get("video_id")
+        self.video_docs.get(video_id, set()).discard(key)
+
+    def replace_video(self, video_id: str, docs: Iterable[dict]) -> None:
+        """Replace every section of a video with `docs`."""
+        with self._lock:
+            for key in list(self.video_docs.pop(video_id, ())):
+                self._remove(key)
+            self.video_docs[video_id] = set()
+            for doc in docs:
+                self.add(doc)
+
+    def search(self, query_terms: List[str], video_ids: set, k: int) -> List[dict]:
+        """
+        Top-k sections of the given videos by BM25 score.
+
+        Args:
+            query_terms (List[str]): Tokenized query. Required.
+            video_ids (set): Videos to search in. Required.
+            k (int): Number of results. Required.
+
+        Returns:
+            List[dict]: Section documents with a "score", best first.
+        """
+        with self._lock:
+            if not self.docs:
+                return []
+            allowed = set().union(*(self.video_docs.get(video_id, ()) for video_id in video_ids))
+            if not allowed:
+                return []
+            n = len(self.docs)
+            average_length = self.total_length / n or 1
+            scores: Dict[str, float] = {}
+            for term in set(query_terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if key not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / average_length)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [{**self.docs[key], "score": score} for key, score in best]
+
+
+class KeywordEngine:
+    """
+    Local BM25 keyword search over the cleaned prompt content sections, replacing the Mongo $text query in
+    hybrid retrieval. The index is sharded per course (the course_reference_id of each video), built in the
+    background at start-up and refreshed per video when its sections are re-indexed.
+
+    `search` returns None while the index is being built or when a video is unknown to it, and the caller falls
+    back to Mongo $text.
+
+    Args:
+        collection_name (str): Section collection. Default: "prompt_content_clean".
+        video_collection_name (str): Video collection. Default: "video".
+        top_k (int): Results returned per query. Default: KEYWORD_TOP_K or 20.
+        enabled (bool): Use the engine at all. Default: KEYWORD_ENGINE is "bm25" (the default).
+    """
+    def __init__(
+            self,
+            collection_name: str = "prompt_content_clean",
+            video_collection_name: str = "video",
+            top_k: int = int(os.environ.get("KEYWORD_TOP_K", 20)),
+            enabled: bool = os.environ.get("KEYWORD_ENGINE", "bm25").lower() == "bm25",
+    ):
+        self.collection_name = collection_name
+        self.video_collection_name = video_collection_name
+        self.top_k = top_k
+        self.enabled = enabled
+        self.shards: Dict[str, Bm25Shard] = {}
+        self.video_shard: Dict[str, str] = {}
+        self.ready = False
+        self._lock = threading.Lock()
+        self._build_thread: Optional[threading.Thread] = None
+        # Videos re-indexed while the index was being built, refreshed once it is ready
+        self._pending: set = set()
+
+    def _db(self):
+        from databaseservice.databaseService import database_service
+        return database_service.get_db()
+
+    def _shard(self, course_key: str) -> Bm25Shard:
+        with self._lock:
+            if course_key not in self.shards:
+                self.shards[course_key] = Bm25Shard()
+            return self.shards[course_key]
+
+    def build(self) -> None:
+        """Load every section from MongoDB and build the course shards."""
+        start = time.perf_counter()
+        db = self._db()
+        video_shard = {
+            video["video_id"]: str(video.get("course_reference_id"))
+            for video in db[self.video_collection_name].find(
+                {"video_id": {"$exists": True}}, {"video_id": 1, "course_reference_id": 1})
+        }
+        shards: Dict[str, Bm25Shard] = {}
+        sections = 0
+        for doc in db[self.collection_name].find({}, {"textContent": 1, "metadata": 1}):
+            video_id = (doc.get("metadata") or {}).get("video_id")
+            course_key = video_shard.setdefault(video_id, "None")
+            shards.setdefault(course_key, Bm25Shard()).add(doc)
+            sections += 1
+        with self._lock:
+            self.shards, self.video_shard = shards, video_shard
+            self.ready = True
+            pending, self._pending = self._pending, set()
+        for video_id in pending:
+            self.refresh_video(video_id)
+        logger.info("BM25 keyword index built: %s sections, %s courses, %s videos in %.1f seconds",
+                    sections, len(shards), len(video_shard), time.perf_counter() - start)
+
+    def start_background_build(self) -> None:
+        """Build the index in a daemon thread; searches fall back to Mongo $text until it is ready."""
+        if not self.enabled or self._build_thread is not None:
+            return
+
+        def run():
+            try:
+                self.build()
+            except Exception as e:
+                logger.error("BM25 keyword index build failed, using Mongo $text search: %s", e)
+
+        self._build_thread = threading.Thread(target=run, name="bm25-build", daemon=True)
+        self._build_thread.start()
+
+    def refresh_video(self, video_id: str) -> None:
+        """
+        Re-read the sections of one video from MongoDB, after ingestion re-indexed them.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self.ready:
+                self._pending.add(video_id)
+                return
+        try:
+            db = self._db()
+            video = db[self.video_collection_name].find_one({"video_id": video_id}, {"course_reference_id": 1}) or {}
+            course_key = str(video.get("course_reference_id"))
+            docs = list(db[self.collection_name].find({"metadata.video_id": video_id}, {"textContent": 1, "metadata": 1}))
+            with self._lock:
+                previous = self.video_shard.get(video_id)
+            if previous is not None and previous != course_key:
+                self._shard(previous).replace_video(video_id, [])
+            self._shard(course_key).replace_video(video_id, docs)
+            with self._lock:
+                self.video_shard[video_id] = course_key
+            logger.debug("BM25 keyword index refreshed for video %s: %s sections", video_id, len(docs))
+        except Exception as e:
+            logger.error("BM25 keyword index refresh failed for video %s: %s", video_id, e)
+
+    def search(self, video_ids: List[str], query: str, k: int = None) -> Optional[List[dict]]:
+        """
+        Top-k keyword matches among the sections of the given videos.
+
+        Args:
+            video_ids (List[str]): Video Indexer IDs. Required.
+            query (str): User query. Required.
+            k (int): Number of results. Default: top_k.
+
+        Returns:
+            Optional[List[dict]]: Section documents ({"_id", "textContent", "metadata", "score"}) best first, or
+                None when the index cannot answer (disabled, not built yet, unknown video).
+        """
+        if not self.enabled or not self.ready:
+            return None
+        with self._lock:
+            course_keys = [self.video_shard.get(video_id) for video_id in video_ids]
+            if None in course_keys:
+                return None
+            shards = {key: self.shards.get(key) for key in set(course_keys)}
+        terms = tokenize(query)
+        k = k or self.top_k
+        results = []
+        for shard in shards.values():
+            if shard is not None:
+                results.extend(shard.search(terms, set(video_ids), k))
+        # Videos of several courses: scores of different shards are merged as they are
+        return sorted(results, key=lambda doc: doc["score"], reverse=True)[:k] if len(shards) > 1 else results
+
+
+keyword_engine = KeywordEngine()
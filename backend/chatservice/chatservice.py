@@ -1,3 +1,4 @@
+import asyncio
 import os
 import concurrent.futures
 import json
@@ -6,23 +7,24 @@ from pydoc import doc
 from dotenv import load_dotenv
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.documents import Document
-from langchain_openai import AzureChatOpenAI
 
 
 from langchain_core.prompts import PromptTemplate
-from openai import AsyncAzureOpenAI
 
 from chatservice.repository import ChatDatabaseService
 from chatservice.model import ChatHistory, LLMIsTemporalResponse
 from chatservice.utils import weighted_reciprocal_rank
+from llmservice.llmGateway import llm_gateway
 from loggingConfig import logger
+from stageTiming import run_in_context, timed
 from utils import process_file, get_prompt_template, get_prompt_template_naive, prompt_template_test, get_prompt_temporal_question, timestamp_to_seconds, get_prompt_preQrag, get_prompt_preQrag_temporal
 
 load_dotenv()
 
 class ChatService:
     """
-    ChatService is a wrapper class of AsyncAzureOpenAI used for generating responses from Azure OpenAI LLM.
+    ChatService is a wrapper class of AzureChatOpenAI used for generating responses from Azure OpenAI LLM.
+    The model is created by the LLM gateway, which shares connections and rate limits with the other services.
     It provides the ability to add system message, grounding text, and a generic prompt template.
 
     Args:
@@ -44,22 +46,23 @@ class ChatService:
         self.azure_endpoint = azure_endpoint
         self.api_key = api_key
         self.api_version = api_version
-        self.client = self.initiate_client()
+        self.deployment_name = deployment_name
         try:
             self.prompt_template = get_prompt_template()
             
             self.prompt_template_temporal = get_prompt_temporal_question()
         except Exception as e:
-            print(e)
+            logger.error("%s", e)
             self.prompt_template = ""
             
             self.prompt_template_temporal = ""
-        self.chat_model = AzureChatOpenAI(
+        self.chat_model = llm_gateway.chat_model(
+            "chat",
+            deployment_name,
+            temperature=temperature,
             azure_endpoint=self.azure_endpoint,
             api_key=self.api_key,
             api_version=self.api_version,
-            azure_deployment=deployment_name,
-            temperature=temperature
         )
         self.chat_db = ChatDatabaseService()
 
@@ -77,8 +80,9 @@ class ChatService:
         """
         try:
             # Step 1: Get video mapping from CosmosDB and filter by selected video_ids
-            full_video_mapping = self.get_video_id_title_mapping(course_code)
-            print(f"Full video mapping for course {course_code}: {full_video_mapping}")
+            # Blocking Mongo and retrieval calls run in worker threads so they do not hold the event loop
+            full_video_mapping = await asyncio.to_thread(self.get_video_id_title_mapping, course_code)
+            logger.debug("Full video mapping for course %s: %s", course_code, full_video_mapping)
             
             # Filter video mapping to only include selected video_ids
             if video_ids and len(video_ids) > 0:
@@ -90,25 +94,26 @@ class ChatService:
                         video_name = video_id_to_name[video_id]
                         filtered_video_map[video_name] = video_id
                 video_mapping = {"video_map": filtered_video_map}
-                print(f"Filtered video mapping for selected videos {video_ids}: {video_mapping}")
+                logger.debug("Filtered video mapping for selected videos %s: %s", video_ids, video_mapping)
             else:
                 # If no video_ids specified, use all videos
                 video_mapping = full_video_mapping
-                print(f"Using all videos for course {course_code}: {video_mapping}")
+                logger.debug("Using all videos for course %s: %s", course_code, video_mapping)
             
             # Step 2: Route question using Doc Scope(PreQRAG)
             json_results_llm = await self.route_pre_qrag_temporal(
                 user_query=question, 
                 video_map=video_mapping
             )
-            print(f"Doc Scope(PreQRAG) routing result:\n{json_results_llm}")
+            logger.debug("Doc Scope(PreQRAG) routing result:\n%s", json_results_llm)
             
             # Step 3: Extract routing information
             # routing_type = json_results_llm.get("routing_type")
             query_variants = json_results_llm.get("query_variants")
             
             # Step 4: Retrieve documents using the routed query variants
-            retrieval_results, context = self.retrival_singledocs_multidocs_with_Temporal(query_variants)
+            retrieval_results, context = await asyncio.to_thread(
+                self.retrival_singledocs_multidocs_with_Temporal, query_variants)
             
             return retrieval_results, context
             
@@ -116,29 +121,7 @@ class ChatService:
             logger.error(f"Error in query_evaluation: {str(e)}")
             raise e
 
-    def initiate_client(self):
-        """
-        Initialises a AsyncAzureOpenAI instance to interact with Azure OpenAI services.
-        Uses provided Azure endpoint, API key, and API version.
-        If an error occurs during initialization, the Azure endpoint and the exception are printed for debugging.
-
-        Returns:
-            AsyncAzureOpenAI: An initialised instance of the AsyncAzureOpenAI class.
-
-        Raises:
-            Exception: For any errors that occur during initialization.
-        """
-        try:
-            return AsyncAzureOpenAI(
-                azure_endpoint=self.azure_endpoint,
-                api_key=self.api_key,
-                api_version=self.api_version,
-            )
-        except Exception as ex:
-            print("something happened here")
-            print(ex)
-
-      
+    @timed("generation")
     def generate_video_prompt_response(self, retrieval_results, user_input, previous_messages=None):
         
         """
@@ -179,7 +162,7 @@ class ChatService:
                 "history": formatted_history
             })
         except Exception as ex:
-            print("Something happened: ", ex)
+            logger.error("Something happened: %s", ex)
             return ex
 
     def get_video_id_title_mapping(self, course_code: str) -> dict:
@@ -218,14 +201,14 @@ class ChatService:
     # Semantic Search on Uncleaned results
     def retrieve_results_prompt_naive(self, video_id, message, top_n: int = 5):
         docs_semantic = self.chat_db.retrieve_results_prompt_semantic(video_id, message)[:top_n]
-        logger.info(list(docs_semantic))
+        logger.debug("Semantic results: %s", docs_semantic)
         retrieval_results = [Document(page_content=doc['textContent']) for doc in docs_semantic]
         return retrieval_results, [doc['textContent'] for doc in docs_semantic]
 
     def retrieve_results_prompt_clean_naive(self, video_id, message, top_n: int = 5):
-        print("hei1",video_id)
+        logger.debug("Naive clean retrieval for video %s", video_id)
         docs_semantic = self.chat_db.retrieve_results_prompt_semantic_v2(video_id, message)[:top_n]
-        logger.info(list(docs_semantic))
+        logger.debug("Semantic results: %s", docs_semantic)
         retrieval_results = [Document(page_content=doc['textContent']) for doc in docs_semantic]
         return retrieval_results, [doc['textContent'] for doc in docs_semantic]
 
@@ -233,8 +216,8 @@ class ChatService:
     def retrieve_results_prompt(self, video_id, message, top_n: int = 5):
         docs_semantic = self.chat_db.retrieve_results_prompt_semantic(video_id, message)
         docs_text = self.chat_db.retrieve_results_prompt_text(video_id, message)
-        logger.info(list(docs_semantic))
-        logger.info(list(docs_text))
+        logger.debug("Semantic results: %s", docs_semantic)
+        logger.debug("Text results: %s", docs_text)
         doc_lists = [docs_semantic, docs_text]
         # Enforce that retrieved docs are the same form for each list in retriever_docs
         for i in range(len(doc_lists)):
@@ -243,7 +226,7 @@ class ChatService:
                 for doc in doc_lists[i]]
         fused_documents = weighted_reciprocal_rank(doc_lists)[:top_n]
         retrieval_results = [Document(page_content=doc['text']) for doc in fused_documents]
-        print(retrieval_results)
+        logger.debug("Retrieval results: %s", retrieval_results)
         return retrieval_results, [doc['text'] for doc in fused_documents]
 
     # Text + Semantic Search on Cleaned results
@@ -281,6 +264,7 @@ class ChatService:
         return retrieval_results, [doc['text'] for doc in fused_documents]
 
     # Check for temporal anchors from the question
+    @timed("temporal")
     async def is_temporal_question(self, question: str) -> LLMIsTemporalResponse:
         try:
             prompt = PromptTemplate(
@@ -291,7 +275,7 @@ class ChatService:
             chain = prompt | self.chat_model  # Using LangChain operator chaining
             result = await chain.ainvoke({"question": question})
 
-            print('llm result', result)
+            logger.debug("Temporal classification result: %s", result)
 
             # Parse JSON-style result (be sure your LLM returns structured JSON)
             
@@ -299,11 +283,12 @@ class ChatService:
             return LLMIsTemporalResponse(**parsed)
         
         except Exception as e:
-            print(f"[is_temporal_question] Error: {e}")
+            logger.error("[is_temporal_question] Error: %s", e)
             return False
          
 
     # Document Scope(PreQRAG) router that takes user_query and video_map and returns structured JSON
+    @timed("routing")
     async def route_pre_qrag(self, user_query: str, video_map: list) -> dict:
         """
         Call LLM with the PRE-QRAG routing prompt, injecting the user query and the video map.
@@ -333,9 +318,10 @@ class ChatService:
             content = result.content if hasattr(result, "content") else str(result)
             return json.loads(content)
         except Exception as e:
-            print(f"[route_pre_qrag] Error: {e}")
+            logger.error("[route_pre_qrag] Error: %s", e)
             
     # Doc Scope(PreQRAG) with Temporal checker
+    @timed("routing")
     async def route_pre_qrag_temporal(self, user_query: str, video_map: list) -> dict:
         """
         Call LLM with the PRE-QRAG routing prompt, injecting the user query and the video map.
@@ -365,7 +351,7 @@ class ChatService:
             content = result.content if hasattr(result, "content") else str(result)
             return json.loads(content)
         except Exception as e:
-            print(f"[route_pre_qrag] Error: {e}")
+            logger.error("[route_pre_qrag] Error: %s", e)
             
             
     def retrival_singledocs_multidocs(self, queryVariants, top_n: int=5):
@@ -388,11 +374,11 @@ class ChatService:
                 ]
             fused_documents_local = weighted_reciprocal_rank(doc_lists)[:top_n]
             retrieval_results_local = [Document(page_content=doc['text']) for doc in fused_documents_local]
-            print(f"Query variant {i}: {len(retrieval_results_local)} chunks")
+            logger.debug("Query variant %s: %s chunks", i, len(retrieval_results_local))
             return retrieval_results_local, fused_documents_local
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=len(queryVariants) or 1) as executor:
-            futures = [executor.submit(process_variant, (i, queryVariants[i])) for i in range(len(queryVariants))]
+            futures = [executor.submit(run_in_context(process_variant), (i, queryVariants[i])) for i in range(len(queryVariants))]
             for future in concurrent.futures.as_completed(futures):
                 retrieval_results_local, fused_documents_local = future.result()
                 all_retrieval_results.extend(retrieval_results_local)
@@ -417,7 +403,7 @@ class ChatService:
 
                 if temporal_signal:
                     docs_temporal, temporal_fused_docs = self.chat_db.retrieve_chunks_by_timestamp(vid_list, temporal_signal)
-                    print(f"Query variant {i}: {len(docs_temporal)} chunks")
+                    logger.debug("Query variant %s: %s chunks", i, len(docs_temporal))
                     retrieval_results_local.extend(docs_temporal)
                     fused_documents_local.extend(temporal_fused_docs)
 
@@ -431,7 +417,7 @@ class ChatService:
                     ]
                 fused_documents_rerank = weighted_reciprocal_rank(doc_lists)[:top_n]
                 retrieval_results_rerank = [Document(page_content=doc['text']) for doc in fused_documents_rerank]
-                print(f"Query variant {i}: {len(retrieval_results_rerank)} chunks")
+                logger.debug("Query variant %s: %s chunks", i, len(retrieval_results_rerank))
 
                 retrieval_results_local.extend(retrieval_results_rerank)
                 fused_documents_local.extend(fused_documents_rerank)
@@ -439,7 +425,7 @@ class ChatService:
                 return retrieval_results_local, fused_documents_local
 
             with concurrent.futures.ThreadPoolExecutor(max_workers=len(queryVariants) or 1) as executor:
-                futures = [executor.submit(process_variant, (i, queryVariants[i])) for i in range(len(queryVariants))]
+                futures = [executor.submit(run_in_context(process_variant), (i, queryVariants[i])) for i in range(len(queryVariants))]
                 for future in concurrent.futures.as_completed(futures):
                     retrieval_results_local, fused_documents_local = future.result()
                     all_retrieval_results.extend(retrieval_results_local)
@@ -6,19 +6,22 @@ from typing import Dict, Any
 import pymongo
 from bson import ObjectId
 from dotenv import load_dotenv
-from langchain_community.vectorstores.azure_cosmos_db import CosmosDBSimilarityType, CosmosDBVectorSearchType
 from langchain_core.documents import Document
-from sqlalchemy.testing.suite.test_reflection import metadata
 
 from EmbeddingService import EmbeddingService
+from chatservice.bm25 import keyword_engine
 from databaseservice.databaseService import DatabaseService, database_service
+from databaseservice.indexRegistry import VECTOR_INDEX_NAME, VECTOR_NUM_CANDIDATES, VECTOR_SEARCH_LIMIT
 from loggingConfig import logger
-from utils import timestamp_to_seconds
-from langchain_community.vectorstores import AzureCosmosDBVectorSearch
-from langchain_openai import AzureOpenAIEmbeddings
+from stageTiming import stage, timed
+from utils import timestamp_to_seconds, seconds_to_timestamp
 
 load_dotenv()
 
+# Slide-text frames added to the context of a temporal question, after duplicates are removed
+FRAME_CONTEXT_LIMIT = int(os.environ.get("FRAME_CONTEXT_LIMIT", 5))
+
+
 class ChatDatabaseService:
     """
     AzureDatabaseService is a service that interacts with Azure CosmosDB Vector store.
@@ -36,51 +39,16 @@ class ChatDatabaseService:
             self,
             video_collection_name: str = "video",
             prompt_content_index: str = "prompt_content_index",
-            prompt_collection_clean_name: str = "prompt_content_clean"
+            prompt_collection_clean_name: str = "prompt_content_clean",
+            frame_collection_name: str = "frames_full"
     ):
         db = database_service.get_db()
         self.video_collection = db[video_collection_name]
+        self.frame_collection = db[frame_collection_name]
         self.embedding_function = EmbeddingService()
         self.prompt_content_index_collection = db[prompt_content_index]
-        self.prompt_content_index_collection.create_index("metadata.video_id")
-        self.prompt_content_index_collection.create_index([("textContent", "text")], name="prompt_text_index")
         self.prompt_content_clean_index_collection = db[prompt_collection_clean_name]
-        self.prompt_content_clean_index_collection.create_index("metadata.video_id")
-        self.prompt_content_clean_index_collection.create_index([("textContent", "text")], name="prompt_text_index")
-
-        self.azure_openai_embeddings: AzureOpenAIEmbeddings = AzureOpenAIEmbeddings(
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
-            openai_api_version=os.environ.get("OPENAI_API_VERSION"),
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            model=os.environ.get("EMBEDDING_MODEL")
-        )
-
-        self.vector_store_prompt_index: AzureCosmosDBVectorSearch = AzureCosmosDBVectorSearch.from_connection_string(
-            connection_string=database_service.get_mongo_connection_string(),
-            namespace=f"{database_service.get_database_name()}.{prompt_content_index}",
-            embedding=self.azure_openai_embeddings,
-        )
-
-        self.vector_store_prompt_clean_index: AzureCosmosDBVectorSearch = AzureCosmosDBVectorSearch.from_connection_string(
-            connection_string=database_service.get_mongo_connection_string(),
-            namespace=f"{database_service.get_database_name()}.{prompt_collection_clean_name}",
-            embedding=self.azure_openai_embeddings,
-        )
-
-        num_lists = 100
-        dimensions = 1536
-        similarity_algorithm = CosmosDBSimilarityType.COS
-        kind = CosmosDBVectorSearchType.VECTOR_IVF
-        m = 16
-        ef_construction = 64
 
-        self.vector_store_prompt_index.create_index(
-            num_lists, dimensions, similarity_algorithm, kind, m, ef_construction
-        )
-        self.vector_store_prompt_clean_index.create_index(
-            num_lists, dimensions, similarity_algorithm, kind, m, ef_construction
-        )
-        
         # Add course collection access
         self.course_collection = db["course"]
 
@@ -98,24 +66,25 @@ class ChatDatabaseService:
             course_doc = self.course_collection.find_one({"course_code": course_code})
             return course_doc
         except Exception as e:
-            print(f"Error checking course existence: {e}")
+            logger.error("Error checking course existence: %s", e)
             return None
 
-    def retrieve_results_prompt_semantic(self, video_id: str, user_prompt: str):
+    def retrieve_results_prompt_semantic(self, video_id: str, user_prompt: str,
+                                         limit: int = VECTOR_SEARCH_LIMIT, num_candidates: int = VECTOR_NUM_CANDIDATES):
         video_reference_id = self.video_collection.find_one({"video_id": video_id})
         if not video_reference_id:
             raise Exception("Invalid Video ID when retrieving prompt.")
         else:
             pipeline = [{
                 "$vectorSearch": {
-                    "index": self.vector_store_prompt_index.get_index_name(),
+                    "index": VECTOR_INDEX_NAME,
                     "filter": {
                         "metadata.video_id": {
                             "$eq": video_reference_id.get('video_id')
                         }
                     },
-                    "limit": 20,
-                    "numCandidates": 10,
+                    "limit": limit,
+                    "numCandidates": num_candidates,
                     "path": "vectorContent",
                     "queryVector": self.embedding_function.embed_query(user_prompt)
                 }},
@@ -128,8 +97,8 @@ class ChatDatabaseService:
                             "score": {"$meta": "vectorSearchScore"}
                         }
                 }]
-            docs = self.prompt_content_index_collection.aggregate(pipeline)
-            return list(docs)
+            with stage("vector_search"):
+                return list(self.prompt_content_index_collection.aggregate(pipeline))
 
     def retrieve_results_prompt_text(self, video_id, user_query):
         video_reference_id = self.video_collection.find_one({"video_id": video_id})
@@ -149,24 +118,26 @@ class ChatDatabaseService:
                     "score": {"$meta": "textScore"}
                 }
             ).sort("score", -1)
-            return list(docs)
+            with stage("text_search"):
+                return list(docs)
 
-    def retrieve_results_prompt_semantic_v2(self, video_id: str, user_prompt: str):
-        print(video_id)
+    def retrieve_results_prompt_semantic_v2(self, video_id: str, user_prompt: str,
+                                            limit: int = VECTOR_SEARCH_LIMIT, num_candidates: int = VECTOR_NUM_CANDIDATES):
+        logger.debug("Semantic retrieval for video %s", video_id)
         video_reference_id = self.video_collection.find_one({"video_id": video_id})
         if not video_reference_id:
             raise Exception("Invalid Video ID when retrieving prompt.")
         else:
             pipeline = [{
                 "$vectorSearch": {
-                    "index": self.vector_store_prompt_clean_index.get_index_name(),
+                    "index": VECTOR_INDEX_NAME,
                     "filter": {
                         "metadata.video_id": {
                             "$eq": video_reference_id.get('video_id')
                         }
                     },
-                    "limit": 20,
-                    "numCandidates": 10,
+                    "limit": limit,
+                    "numCandidates": num_candidates,
                     "path": "vectorContent",
                     "queryVector": self.embedding_function.embed_query(user_prompt)
                 }},
@@ -179,13 +150,14 @@ class ChatDatabaseService:
                             "score": {"$meta": "vectorSearchScore"}
                         }
                 }]
-            docs = self.prompt_content_clean_index_collection.aggregate(pipeline)
-            return list(docs)
+            with stage("vector_search"):
+                return list(self.prompt_content_clean_index_collection.aggregate(pipeline))
         
 
     # mutlivideo 
-    def retrieve_results_prompt_semantic_v2_multivid(self, video_ids: list, user_prompt: str):
-        print(f"Input video_ids: {video_ids}, type: {type(video_ids)}")
+    def retrieve_results_prompt_semantic_v2_multivid(self, video_ids: list, user_prompt: str,
+                                                     limit: int = VECTOR_SEARCH_LIMIT, num_candidates: int = VECTOR_NUM_CANDIDATES):
+        logger.debug("Input video_ids: %s, type: %s", video_ids, type(video_ids))
         
         # Input validation: ensure video_ids is a list
         if not isinstance(video_ids, list):
@@ -193,14 +165,14 @@ class ChatDatabaseService:
                 # If it's a dict, try to extract values
                 if "video_map" in video_ids:
                     video_ids = list(video_ids["video_map"].values())
-                    print(f"Extracted video_ids from dict: {video_ids}")
+                    logger.debug("Extracted video_ids from dict: %s", video_ids)
                 else:
                     video_ids = list(video_ids.values())
-                    print(f"Extracted video_ids from dict values: {video_ids}")
+                    logger.debug("Extracted video_ids from dict values: %s", video_ids)
             else:
                 # Convert single value to list
                 video_ids = [video_ids]
-                print(f"Converted single value to list: {video_ids}")
+                logger.debug("Converted single value to list: %s", video_ids)
         
         # Ensure we have at least one video ID
         if not video_ids:
@@ -218,10 +190,10 @@ class ChatDatabaseService:
             
             pipeline = [{
                 "$vectorSearch": {
-                    "index": self.vector_store_prompt_clean_index.get_index_name(),
+                    "index": VECTOR_INDEX_NAME,
                     "filter": video_id_filter,
-                    "limit": 20, # <- total 20 chuncks retrieved
-                    "numCandidates": 10, # <- Examines 10 candidate documents per video (for efficiency)
+                    "limit": limit,
+                    "numCandidates": num_candidates,
                     "path": "vectorContent", 
                     "queryVector": self.embedding_function.embed_query(user_prompt)
                 }},
@@ -234,10 +206,23 @@ class ChatDatabaseService:
                             "score": {"$meta": "vectorSearchScore"}
                         }
                 }]
-            docs = self.prompt_content_clean_index_collection.aggregate(pipeline)
-            return list(docs)
+            with stage("vector_search"):
+                return list(self.prompt_content_clean_index_collection.aggregate(pipeline))
+
+    def _keyword_search(self, video_ids: list, user_query: str):
+        """
+        Top-k sections from the local BM25 index, or None when the caller has to fall back to the $text query
+        (engine disabled or still building, video not indexed yet, or a collection other than the indexed one).
+        """
+        if self.prompt_content_clean_index_collection.name != keyword_engine.collection_name:
+            return None
+        with stage("text_search"):
+            return keyword_engine.search(video_ids, user_query)
 
     def retrieve_results_prompt_text_v2(self, video_id, user_query):
+        docs = self._keyword_search([video_id], user_query)
+        if docs is not None:
+            return docs
         video_reference_id = self.video_collection.find_one({"video_id": video_id})
         if not video_reference_id:
             return ""
@@ -255,11 +240,12 @@ class ChatDatabaseService:
                     "score": {"$meta": "textScore"}
                 }
             ).sort("score", -1)
-            return list(docs)
+            with stage("text_search"):
+                return list(docs)
         
     #multivideo
     def retrieve_results_prompt_text_v2_multivid(self, video_ids, user_query):
-        print(f"Input video_ids (text): {video_ids}, type: {type(video_ids)}")
+        logger.debug("Input video_ids (text): %s, type: %s", video_ids, type(video_ids))
         
         # Input validation: ensure video_ids is a list
         if not isinstance(video_ids, list):
@@ -267,18 +253,22 @@ class ChatDatabaseService:
                 # If it's a dict, try to extract values
                 if "video_map" in video_ids:
                     video_ids = list(video_ids["video_map"].values())
-                    print(f"Extracted video_ids from dict (text): {video_ids}")
+                    logger.debug("Extracted video_ids from dict (text): %s", video_ids)
                 else:
                     video_ids = list(video_ids.values())
-                    print(f"Extracted video_ids from dict values (text): {video_ids}")
+                    logger.debug("Extracted video_ids from dict values (text): %s", video_ids)
             else:
                 # Convert single value to list
                 video_ids = [video_ids]
-                print(f"Converted single value to list (text): {video_ids}")
+                logger.debug("Converted single value to list (text): %s", video_ids)
         
         # Ensure we have at least one video ID
         if not video_ids:
             raise ValueError("video_ids cannot be empty")
+
+        docs = self._keyword_search(video_ids, user_query)
+        if docs is not None:
+            return docs
             
         # Find all video documents that match any of the video IDs in the list
         video_reference_ids = self.video_collection.find({"video_id": {"$in": video_ids}})
@@ -303,21 +293,59 @@ class ChatDatabaseService:
                     "score": {"$meta": "textScore"}
                 }
             ).sort("score", -1)
-            return list(docs)
+            with stage("text_search"):
+                return list(docs)
 
     def retrieve_results_prompt_semantic_only(self, video_id: str, query: str, top_n: int=5):
-        print ("hei", video_id)
         docs_semantic = self.retrieve_results_prompt_semantic_v2(video_id, query)[:top_n]
 
 
         # Enforce that retrieved docs are the same form for each list in retriever_docs
         retrieval_results = [Document(page_content=doc['textContent']) for doc in docs_semantic]
-        print(retrieval_results)
+        logger.debug("Retrieval results: %s", retrieval_results)
         return retrieval_results, [doc['textContent'] for doc in docs_semantic]
 
 
         
     
+    def retrieve_frames_by_time(self, video_ids: list, search_start: float, search_end: float,
+                                limit: int = FRAME_CONTEXT_LIMIT) -> list:
+        """
+        Retrieve slide-text frames of videos overlapping a time range.
+        A slide stays on screen across many OCR timestamps, so frames repeating the text of an earlier one are
+        dropped, and at most `limit` frames are kept, those closest to the middle of the range first.
+
+        Args:
+            video_ids (list): Video Indexer IDs. Required.
+            search_start (float): Range start in seconds. Required.
+            search_end (float): Range end in seconds. Required.
+            limit (int): Maximum number of frames. Default: FRAME_CONTEXT_LIMIT or 5.
+
+        Returns:
+            list: Frame documents ordered by video and start time.
+        """
+        frames = self.frame_collection.find(
+            {
+                "video_id": {"$in": video_ids},
+                "start_ms": {"$lte": int(search_end * 1000)},
+                "end_ms": {"$gte": int(search_start * 1000)}
+            },
+            {"video_id": 1, "start_ms": 1, "end_ms": 1, "textContent": 1}
+        ).sort([("video_id", 1), ("start_ms", 1)])
+
+        unique, seen = [], set()
+        for frame in frames:
+            text = " ".join((frame.get("textContent") or "").split()).lower()
+            if text and text not in seen:
+                seen.add(text)
+                unique.append(frame)
+        if len(unique) <= limit:
+            return unique
+        middle_ms = (search_start + search_end) * 500
+        closest = sorted(unique, key=lambda frame: abs((frame["start_ms"] + frame["end_ms"]) / 2 - middle_ms))[:limit]
+        return sorted(closest, key=lambda frame: (frame["video_id"], frame["start_ms"]))
+
+    @timed("temporal")
     def retrieve_chunks_by_timestamp(self, video_ids: list, timestamp: list):
         """
         Retrieve chunks from prompt_content_clean collection based on timestamp(s).
@@ -342,10 +370,10 @@ class ChatDatabaseService:
                 if video_reference:
                     valid_video_ids.append(video_id)
                 else:
-                    print(f"Video ID {video_id} not found")
+                    logger.warning("Video ID %s not found", video_id)
             
             if not valid_video_ids:
-                print("No valid video IDs found")
+                logger.warning("No valid video IDs found")
                 return []
             
             # Determine timestamp range logic
@@ -354,14 +382,14 @@ class ChatDatabaseService:
                 target_seconds = timestamp_to_seconds(timestamp[0])
                 search_start = target_seconds - 120  # 2 minutes before
                 search_end = target_seconds + 120    # 2 minutes after
-                print(f"Searching within ±2 minutes of {timestamp[0]} (range: {search_start}s to {search_end}s)")
+                logger.debug("Searching within ±2 minutes of %s (range: %ss to %ss)", timestamp[0], search_start, search_end)
             elif len(timestamp) == 2:
                 # Two timestamps: search within range
                 search_start = timestamp_to_seconds(timestamp[0])
                 search_end = timestamp_to_seconds(timestamp[1])
-                print(f"Searching within range {timestamp[0]} to {timestamp[1]} (range: {search_start}s to {search_end}s)")
+                logger.debug("Searching within range %s to %s (range: %ss to %ss)", timestamp[0], timestamp[1], search_start, search_end)
             else:
-                print(f"Invalid timestamp list length: {len(timestamp)}. Expected 1 or 2 timestamps.")
+                logger.warning("Invalid timestamp list length: %s. Expected 1 or 2 timestamps.", len(timestamp))
                 return []
             
             # Query the prompt_content_clean collection for all valid video IDs
@@ -393,13 +421,26 @@ class ChatDatabaseService:
                         if doc_start_seconds <= search_end and doc_end_seconds >= search_start:
                             matching_docs.append(doc)
                             metadata_list.append(metadata)
-                            print(f"Found matching doc: video_id={metadata.get('video_id')}, start={start_time_str}, end={end_time_str}")
+                            logger.debug("Found matching doc: video_id=%s, start=%s, end=%s", metadata.get('video_id'), start_time_str, end_time_str)
                             
                     except Exception as e:
-                        print(f"Error parsing timestamp for doc {doc.get('_id')}: {e}")
+                        logger.error("Error parsing timestamp for doc %s: %s", doc.get('_id'), e)
                         continue
             
-            print(f"Found {len(matching_docs)} documents matching timestamp criteria across {len(valid_video_ids)} videos")
+            logger.debug("Found %s documents matching timestamp criteria across %s videos", len(matching_docs), len(valid_video_ids))
+
+            # Slide text shown on screen during the same time range
+            for frame in self.retrieve_frames_by_time(valid_video_ids, search_start, search_end):
+                matching_docs.append({
+                    "_id": frame["_id"],
+                    "textContent": "[Slide Text] " + frame["textContent"],
+                    "metadata": {
+                        "video_id": frame["video_id"],
+                        "start": seconds_to_timestamp(frame["start_ms"] / 1000),
+                        "end": seconds_to_timestamp(frame["end_ms"] / 1000),
+                        "source": "slide"
+                    }
+                })
             
             # Create Document objects with metadata
             retrieval_results = []
@@ -424,5 +465,5 @@ class ChatDatabaseService:
             return retrieval_results, fused_documents
             
         except Exception as e:
-            print(f"[retrieve_chunks_by_timestamp] Error: {e}")
+            logger.error("[retrieve_chunks_by_timestamp] Error: %s", e)
             return []
\ No newline at end of file
@@ -1,10 +1,15 @@
+import asyncio
 import logging
+from typing import Tuple
 
 from dotenv import load_dotenv
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
-from chatservice.chatservice import ChatService
+from chatservice.admission import AdmissionRejected, chat_admission, log_rejection
 from chatservice.model import ChatRequestBody
+from dependencies import get_chat_service
+from loggingConfig import logger
+from stageTiming import collect_stages
 
 
 load_dotenv()
@@ -13,9 +18,6 @@ ROUTE_PREFIX = "/chat"
 router = APIRouter(prefix=ROUTE_PREFIX, tags=["chat-service"])
 
 
-chat_service = ChatService()
-
-
 # @router.post("/{video_id}", status_code=200)
 # async def get_videos(video_id: str, body: ChatRequestBody):
 #     retrieval_results, _ = chat_service.retrieve_results_prompt_clean(video_id, body.message)
@@ -26,11 +28,52 @@ chat_service = ChatService()
 #         return {"message": "No Records Found"}
 
 
+def caller_identity(request: Request) -> Tuple[str, bool]:
+    """
+    Rate limit key of the caller: the JWT subject verified by the auth middleware, or the client address
+    for anonymous callers.
+
+    Returns:
+        Tuple[str, bool]: Key and whether the caller is anonymous.
+
+    Raises:
+        HTTPException: 401 if the request carries an invalid or expired token, or is anonymous while
+            anonymous chat is disabled (CHAT_ANON_RATE_PER_MIN=0).
+    """
+    user = getattr(request.state, "user", None)
+    if user and user.get("sub"):
+        return "user:" + user["sub"], False
+    auth_error = getattr(request.state, "auth_error", None)
+    if auth_error or not chat_admission.allow_anonymous:
+        raise HTTPException(status_code=401, detail=auth_error or "Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return "ip:" + (request.client.host if request.client else "unknown"), True
+
+
 @router.post("/", status_code=200)
-async def evaluate_question(body: ChatRequestBody):
+async def evaluate_question(body: ChatRequestBody, request: Request, response: Response, chat_service=Depends(get_chat_service)):
     """
     Evaluate a single question using Document Scope(PreQRAG) routing and multi-video retrieval.
+    Requests go through admission control first and are answered with 429 and Retry-After when
+    the caller or the course is over its rate limit or the server is saturated.
+    The time spent per pipeline stage is logged and returned in the Server-Timing header.
     """
+    user_key, anonymous = caller_identity(request)
+    try:
+        async with chat_admission.admit(user_key, body.course_code, anonymous):
+            with collect_stages() as timings:
+                try:
+                    return await answer_question(body, chat_service)
+                finally:
+                    response.headers["Server-Timing"] = timings.server_timing()
+                    logger.info("Chat stage timings: %s", timings.as_dict())
+    except AdmissionRejected as rejection:
+        log_rejection(user_key, body.course_code, rejection)
+        raise HTTPException(status_code=429, detail=rejection.reason,
+                            headers={"Retry-After": rejection.retry_after_header})
+
+
+async def answer_question(body: ChatRequestBody, chat_service):
     question = body.message
     video_ids = body.video_ids  # Get list of video IDs from request body
     course_code = body.course_code  # Get course code from request body
@@ -44,7 +87,9 @@ async def evaluate_question(body: ChatRequestBody):
         )
         
         # Step 5: Generate answer using retrieved context
-        response = chat_service.generate_video_prompt_response(retrieval_results, question)
+        # Retrieval and generation are blocking, so they run in worker threads; on the event loop they would
+        # serialize every admitted request and the in-flight limit and queue wait would never take effect
+        response = await asyncio.to_thread(chat_service.generate_video_prompt_response, retrieval_results, question)
         
         if response:
             return {"message": "Successfully Retrieve", "answer": response}
@@ -52,17 +97,18 @@ async def evaluate_question(body: ChatRequestBody):
             return {"message": "No Records Found"}
             
     except Exception as e:
-        print(f"Error processing question: {e}")
+        logger.error("Error processing question: %s", e)
         # Fallback to simple retrieval if Document Scope(PreQRAG) fails
         try:
-            retrieval_results, _ = chat_service.retrieve_results_prompt_clean_multivid(video_ids, question)
-            response = chat_service.generate_video_prompt_response(retrieval_results, question)
+            retrieval_results, _ = await asyncio.to_thread(
+                chat_service.retrieve_results_prompt_clean_multivid, video_ids, question)
+            response = await asyncio.to_thread(chat_service.generate_video_prompt_response, retrieval_results, question)
             
             if response:
                 return {"message": "Successfully Retrieve", "answer": response}
             else:
                 return {"message": "No Records Found"}
         except Exception as fallback_error:
-            print(f"Fallback retrieval also failed: {fallback_error}")
+            logger.error("Fallback retrieval also failed: %s", fallback_error)
             return {"message": "Error processing request"}
 
@@ -1,9 +1,49 @@
 from typing import List, Dict, Any, Optional
 import logging
+import os
+
+from dotenv import load_dotenv
+
+from stageTiming import timed
+
+load_dotenv()
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+
+def parse_fusion_weights(value: str) -> List[float]:
+    """
+    Parse "semantic:keyword" fusion weights, e.g. "1:0.2", the format of FUSION_WEIGHTS and of the
+    retrievalSweep --weights values and report.
+
+    Args:
+        value (str): Two numbers separated by ':'. Required.
+
+    Returns:
+        List[float]: [semantic weight, keyword weight].
+
+    Raises:
+        ValueError: If the value is not exactly two numbers separated by ':'.
+    """
+    parts = value.strip().split(":")
+    try:
+        weights = [float(part) for part in parts]
+    except ValueError:
+        weights = []
+    if len(weights) != 2:
+        raise ValueError(f"Invalid fusion weights {value!r}: expected 'semantic:keyword', e.g. '1:0.2'")
+    return weights
+
+
+# Weights of the semantic and keyword rank lists in hybrid retrieval; choose with evaluationservice.retrievalSweep
+try:
+    FUSION_WEIGHTS = parse_fusion_weights(os.environ.get("FUSION_WEIGHTS", "1:0.2"))
+except ValueError as e:
+    raise ValueError(f"FUSION_WEIGHTS: {e}") from None
+
+
+@timed("fusion")
 def weighted_reciprocal_rank(doc_lists, weights=None):
     """
     This is a modified version of the function in the langchain repo
@@ -23,7 +63,7 @@ def weighted_reciprocal_rank(doc_lists, weights=None):
     """
     c = 60  # c comes from the paper
     if not weights:
-        weights = [1, 0.2]
+        weights = FUSION_WEIGHTS
 
     if len(doc_lists) != len(weights):
         raise ValueError(
@@ -0,0 +1,196 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Name of the IVF vector index on every vector collection, used by the $vectorSearch stages
+VECTOR_INDEX_NAME = "vectorSearchIndex"
+# Name of the full text index used by the $text keyword retrieval
+TEXT_INDEX_NAME = "prompt_text_index"
+
+VECTOR_DIMENSIONS = 1536
+# IVF clusters; about rows / 1000 is the usual starting point. Applies to newly created indexes only
+VECTOR_NUM_LISTS = int(os.environ.get("VECTOR_NUM_LISTS", 100))
+# Defaults of the $vectorSearch stages; choose with evaluationservice.retrievalSweep
+VECTOR_SEARCH_LIMIT = int(os.environ.get("VECTOR_SEARCH_LIMIT", 20))
+VECTOR_NUM_CANDIDATES = int(os.environ.get("VECTOR_NUM_CANDIDATES", 10))
+
+
+@dataclass
+class IndexSpec:
+    """
+    Declarative description of one index.
+
+    Args:
+        collection (str): Collection name. Required.
+        keys (List[Tuple[str, object]]): Index keys, as passed to `create_index`. Required.
+        name (str): Index name. Default: MongoDB generated name.
+        options (dict): Extra `create_index` options. Default: none.
+        vector (bool): Cosmos DB vCore vector index, created with the createIndexes command. Default: False.
+    """
+    collection: str
+    keys: List[Tuple[str, object]]
+    name: Optional[str] = None
+    options: Dict = field(default_factory=dict)
+    vector: bool = False
+
+    @property
+    def index_name(self) -> str:
+        return self.name or "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+def vector_index(collection: str, num_lists: int = VECTOR_NUM_LISTS) -> IndexSpec:
+    return IndexSpec(
+        collection=collection,
+        keys=[("vectorContent", "cosmosSearch")],
+        name=VECTOR_INDEX_NAME,
+        options={"cosmosSearchOptions": {
+            "kind": "vector-ivf",
+            "numLists": num_lists,
+            "similarity": "COS",
+            "dimensions": VECTOR_DIMENSIONS
+        }},
+        vector=True
+    )
+
+
+INDEXES: List[IndexSpec] = [
+    # Retrieval indexes
+    IndexSpec("prompt_content_index", [("metadata.video_id", 1)]),
+    IndexSpec("prompt_content_index", [("textContent", "text")], name=TEXT_INDEX_NAME),
+    vector_index("prompt_content_index"),
+    IndexSpec("prompt_content_clean", [("metadata.video_id", 1)]),
+    IndexSpec("prompt_content_clean", [("textContent", "text")], name=TEXT_INDEX_NAME),
+    vector_index("prompt_content_clean"),
+
+    # Lookups on every chat and ingestion request
+    IndexSpec("video", [("video_id", 1)]),
+    IndexSpec("course", [("course_code", 1)]),
+    IndexSpec("transcript_full", [("video_reference_id", 1)]),
+    IndexSpec("user", [("username", 1)]),
+    IndexSpec("prompt_content_raw", [("video_id", 1)]),
+    IndexSpec("video_indexer_raw", [("video_indexer_id", 1)]),
+    IndexSpec("frames_full", [("video_id", 1), ("start_ms", 1)]),
+]
+
+# Representative repository queries that must be index backed: (collection, filter, description)
+HOT_QUERIES: List[Tuple[str, dict, str]] = [
+    ("video", {"video_id": "sample"}, "ChatDatabaseService / BrokerRepository video lookup"),
+    ("video", {"video_id": {"$in": ["sample"]}}, "multi-video retrieval lookup"),
+    ("video", {"_id": {"$in": [ObjectId()]}}, "course catalog video listing"),
+    ("course", {"course_code": "sample"}, "course lookup"),
+    ("transcript_full", {"video_reference_id": ObjectId()}, "TranscriptRepositoryService transcript lookup"),
+    ("user", {"username": "sample"}, "login"),
+    ("prompt_content_raw", {"video_id": "sample"}, "prompt content lookup"),
+    ("video_indexer_raw", {"video_indexer_id": "sample"}, "raw insights lookup"),
+    ("frames_full", {"video_id": {"$in": ["sample"]}, "start_ms": {"$lte": 60000}, "end_ms": {"$gte": 0}},
+     "temporal slide text retrieval"),
+    ("prompt_content_clean", {"metadata.video_id": {"$in": ["sample"]}}, "temporal retrieval"),
+    ("prompt_content_clean", {"$and": [{"metadata.video_id": "sample"}, {"$text": {"$search": "sample"}}]},
+     "keyword retrieval (clean)"),
+    ("prompt_content_index", {"metadata.video_id": "sample"}, "incremental index sync"),
+    ("prompt_content_index", {"$and": [{"metadata.video_id": "sample"}, {"$text": {"$search": "sample"}}]},
+     "keyword retrieval (raw)"),
+]
+
+
+def _existing_index_names(db, collection: str) -> set:
+    if collection not in db.list_collection_names():
+        return set()
+    return {index["name"] for index in db[collection].list_indexes()}
+
+
+def ensure_indexes(db, indexes: List[IndexSpec] = None) -> List[str]:
+    """
+    Create every registered index that does not exist yet. Existing indexes are left untouched.
+
+    Args:
+        db: PyMongo database. Required.
+        indexes (List[IndexSpec]): Indexes to create. Default: INDEXES.
+
+    Returns:
+        List[str]: "<collection>.<index name>" of the indexes created.
+    """
+    created = []
+    for spec in indexes or INDEXES:
+        if spec.index_name in _existing_index_names(db, spec.collection):
+            continue
+        if spec.vector:
+            db.command({
+                "createIndexes": spec.collection,
+                "indexes": [{
+                    "name": spec.index_name,
+                    "key": dict(spec.keys),
+                    "cosmosSearchOptions": spec.options["cosmosSearchOptions"]
+                }]
+            })
+        else:
+            db[spec.collection].create_index(spec.keys, name=spec.index_name, **spec.options)
+        created.append(f"{spec.collection}.{spec.index_name}")
+    return created
+
+
+def verify_indexes(db, indexes: List[IndexSpec] = None) -> List[str]:
+    """
+    Check that every registered index exists.
+
+    Args:
+        db: PyMongo database. Required.
+        indexes (List[IndexSpec]): Indexes to check. Default: INDEXES.
+
+    Returns:
+        List[str]: "<collection>.<index name>" of the missing indexes.
+    """
+    missing = []
+    existing = {}
+    for spec in indexes or INDEXES:
+        if spec.collection not in existing:
+            existing[spec.collection] = _existing_index_names(db, spec.collection)
+        if spec.index_name not in existing[spec.collection]:
+            missing.append(f"{spec.collection}.{spec.index_name}")
+    return missing
+
+
+def _plan_stages(plan) -> List[str]:
+    """Collect every "stage" value of an explain plan, at any depth."""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def explain_hot_queries(db, queries: List[Tuple[str, dict, str]] = None) -> List[dict]:
+    """
+    Run `explain` on the hot repository queries and flag the ones answered by a collection scan.
+
+    Args:
+        db: PyMongo database. Required.
+        queries (List[Tuple[str, dict, str]]): (collection, filter, description). Default: HOT_QUERIES.
+
+    Returns:
+        List[dict]: One entry per query with its plan stages and whether it is index backed.
+    """
+    report = []
+    for collection, query_filter, description in queries or HOT_QUERIES:
+        entry = {"collection": collection, "description": description}
+        try:
+            plan = db.command("explain", {"find": collection, "filter": query_filter}, verbosity="queryPlanner")
+            stages = _plan_stages(plan.get("queryPlanner", plan))
+            entry["stages"] = stages
+            entry["index_backed"] = bool(stages) and "COLLSCAN" not in stages
+        except Exception as e:
+            entry["stages"] = []
+            entry["index_backed"] = False
+            entry["error"] = str(e)
+        report.append(entry)
+    return report
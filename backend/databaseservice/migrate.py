@@ -0,0 +1,66 @@
+"""
+One-shot schema migration for the MongoDB database.
+
+Creates the indexes declared in `databaseservice.indexRegistry`, verifies that they exist and checks with
+`explain` that the hot repository queries are index backed. The application no longer issues index DDL
+at startup, so run this once per environment (and again whenever the registry changes):
+
+    python -m databaseservice.migrate            # create, verify and explain
+    python -m databaseservice.migrate create
+    python -m databaseservice.migrate verify
+    python -m databaseservice.migrate explain
+"""
+import argparse
+import sys
+
+from databaseservice.databaseService import database_service
+from databaseservice.indexRegistry import ensure_indexes, explain_hot_queries, verify_indexes
+
+
+def create(db) -> bool:
+    created = ensure_indexes(db)
+    for name in created:
+        print(f"created   {name}")
+    print(f"{len(created)} index(es) created")
+    return True
+
+
+def verify(db) -> bool:
+    missing = verify_indexes(db)
+    for name in missing:
+        print(f"missing   {name}")
+    print("all registered indexes exist" if not missing else f"{len(missing)} index(es) missing")
+    return not missing
+
+
+def explain(db) -> bool:
+    report = explain_hot_queries(db)
+    for entry in report:
+        status = "ok       " if entry["index_backed"] else "COLLSCAN "
+        detail = entry.get("error") or " > ".join(entry["stages"])
+        print(f"{status} {entry['collection']:<22} {entry['description']:<50} {detail}")
+    scans = [entry for entry in report if not entry["index_backed"]]
+    print("all hot queries are index backed" if not scans else f"{len(scans)} hot query(ies) not index backed")
+    return not scans
+
+
+COMMANDS = {"create": create, "verify": verify, "explain": explain}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    parser.add_argument("command", nargs="?", choices=[*COMMANDS, "all"], default="all")
+    args = parser.parse_args()
+
+    db = database_service.get_db()
+    steps = list(COMMANDS) if args.command == "all" else [args.command]
+    ok = True
+    for step in steps:
+        print(f"== {step}")
+        ok = COMMANDS[step](db) and ok
+    database_service.close_connection()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from loggingConfig import logger
+
+
+class ServiceContainer:
+    """
+    Lazy dependency container.
+    Each service is registered with a factory and built once, on first use or when `warm_up` is called
+    from the application lifespan hook. Factories import their service modules themselves, so heavy
+    dependencies (LangChain, Azure SDKs) are only imported when a service is actually needed.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._instances: Dict[str, object] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str):
+        """
+        Get a service, building it on first use. Construction is serialised so every caller gets the same instance.
+
+        Args:
+            name (str): Registered service name. Required.
+
+        Returns:
+            object: The service instance.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+                logger.info("Service initialised: %s", name)
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Build services ahead of the first request.
+
+        Args:
+            names (Iterable[str]): Services to build. Default: all registered services.
+        """
+        for name in names if names is not None else list(self._factories):
+            self.get(name)
+
+
+container = ServiceContainer()
+
+
+def _video_service():
+    from videoindexerclient.VideoService import VideoService
+    return VideoService()
+
+
+def _transcript_service():
+    from transcriptservice.TranscriptService import TranscriptService
+    return TranscriptService()
+
+
+def _broker_repository():
+    from brokerservice.repository import BrokerRepository
+    return BrokerRepository()
+
+
+def _broker_service():
+    from brokerservice.brokerService import BrokerService
+    return BrokerService(
+        video_indexer_service=get_video_service(),
+        transcript_service=get_transcript_service(),
+        broker_db=get_broker_repository()
+    )
+
+
+def _chat_service():
+    from chatservice.chatservice import ChatService
+    return ChatService()
+
+
+def _user_repository():
+    from userservice.repository import UserRepositoryService
+    return UserRepositoryService()
+
+
+container.register("video_service", _video_service)
+container.register("transcript_service", _transcript_service)
+container.register("broker_repository", _broker_repository)
+container.register("broker_service", _broker_service)
+container.register("chat_service", _chat_service)
+container.register("user_repository", _user_repository)
+
+
+def get_video_service():
+    return container.get("video_service")
+
+
+def get_transcript_service():
+    return container.get("transcript_service")
+
+
+def get_broker_repository():
+    return container.get("broker_repository")
+
+
+def get_broker_service():
+    return container.get("broker_service")
+
+
+def get_chat_service():
+    return container.get("chat_service")
+
+
+def get_user_repository():
+    return container.get("user_repository")
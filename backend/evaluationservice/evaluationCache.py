@@ -0,0 +1,150 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def content_hash(value) -> str:
+    """Stable SHA-256 of a string or JSON-serialisable value (e.g. a list of retrieved contexts)."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    SQLite cache of generated answers and RAGAS judgments, so evaluation reruns only pay for what changed.
+
+    - Answers are keyed by (cache version, pipeline variant, generator deployment, question, hash of the retrieved
+      context): a question whose retrieval is unchanged is not sent to the generator again.
+    - Judgments are keyed by (cache version, metric, judge LLM and embedding deployments, question, ground truth,
+      context hash, answer hash): an unchanged (context, answer) pair is not judged again by the same judge,
+      whichever variant produced it.
+
+    Models are part of the keys, so evaluators judging with different deployments never share scores.
+    Bump EVAL_CACHE_VERSION when the generation prompt or a metric implementation changes.
+    Failed generations and NaN scores are never cached.
+
+    Args:
+        path (str): SQLite file. Default: EVAL_CACHE_PATH or "results/eval_cache.sqlite".
+        version (str): Cache version, part of every key. Default: EVAL_CACHE_VERSION or "1".
+        enabled (bool): Read and write the cache. Default: EVAL_CACHE is not "0".
+    """
+    def __init__(
+            self,
+            path: str = os.environ.get("EVAL_CACHE_PATH", "results/eval_cache.sqlite"),
+            version: str = os.environ.get("EVAL_CACHE_VERSION", "1"),
+            enabled: bool = os.environ.get("EVAL_CACHE", "1") != "0",
+    ):
+        self.path = path
+        self.version = version
+        self.enabled = enabled
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.stats = {"answer_hits": 0, "answer_misses": 0, "judgment_hits": 0, "judgment_misses": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, variant TEXT, question TEXT, answer TEXT, created REAL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS judgments (key TEXT PRIMARY KEY, metric TEXT, question TEXT, score REAL, created REAL)")
+        return self._connection
+
+    def answer_key(self, variant: str, generator: str, question: str, context) -> str:
+        return content_hash([self.version, "answer", variant, generator, question, content_hash(context)])
+
+    def judgment_key(self, metric: str, judge_models, question: str, ground_truth: str, context, answer: str) -> str:
+        return content_hash([self.version, "judgment", metric, list(judge_models), question, ground_truth,
+                             content_hash(context), content_hash(answer or "")])
+
+    def _get(self, table: str, column: str, key: str):
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db().execute(f"SELECT {column} FROM {table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _put(self, sql: str, values: tuple) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._db()
+            db.execute(sql, values)
+            db.commit()
+
+    async def cached_answer(self, variant: str, generator: str, question: str, context,
+                            generate: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached answer for (variant, generator, question, context), generating and storing it on a miss.
+
+        Args:
+            variant (str): Pipeline variant, e.g. "ragv3_preqrag_temporal". Required.
+            generator (str): Deployment generating the answer. Required.
+            question (str): Question. Required.
+            context: Retrieved context the answer is generated from. Required.
+            generate (Callable): Coroutine function producing the answer. Required.
+
+        Returns:
+            str: Answer.
+        """
+        key = self.answer_key(variant, generator, question, context)
+        answer = self._get("answers", "answer", key)
+        if answer is not None:
+            self.stats["answer_hits"] += 1
+            return answer
+        self.stats["answer_misses"] += 1
+        answer = await generate()
+        if isinstance(answer, str) and answer:
+            self._put("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                      (key, variant, question, answer, time.time()))
+        return answer
+
+    async def cached_judgment(self, metric: str, judge_models, question: str, ground_truth: str, context, answer: str,
+                              judge: Callable[[], Awaitable[float]]) -> float:
+        """
+        Return the cached score of a metric, judging and storing it on a miss.
+
+        Args:
+            metric (str): Metric name. Required.
+            judge_models (Sequence[str]): LLM and embedding deployments of the judge. Required.
+            question (str): Question. Required.
+            ground_truth (str): Reference answer. Required.
+            context: Retrieved context. Required.
+            answer (str): Generated answer. Required.
+            judge (Callable): Coroutine function computing the score. Required.
+
+        Returns:
+            float: Score.
+        """
+        key = self.judgment_key(metric, judge_models, question, ground_truth, context, answer)
+        score = self._get("judgments", "score", key)
+        if score is not None:
+            self.stats["judgment_hits"] += 1
+            return score
+        self.stats["judgment_misses"] += 1
+        score = await judge()
+        if isinstance(score, (int, float)) and not math.isnan(score):
+            self._put("INSERT OR REPLACE INTO judgments VALUES (?, ?, ?, ?, ?)",
+                      (key, metric, question, float(score), time.time()))
+        return score
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+evaluation_cache = EvaluationCache()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from evaluationservice.evaluationCache import EvaluationCache
+from loggingConfig import logger
+from stageTiming import collect_stages
+
+load_dotenv()
+
+# RAGAS metrics, by their key in the result
+METRICS = ("context_precision", "context_recall", "faithfulness_result", "response_relevancy")
+
+Pipeline = Callable[[str], Awaitable[dict]]
+
+
+class EvaluationRunner:
+    """
+    Runs an evaluation pipeline over a question set concurrently.
+
+    - Up to `concurrency` questions are answered and judged at the same time.
+    - The four RAGAS metrics of a question are computed in parallel.
+    - Each result is appended to a JSONL file as soon as its question completes, so partial runs are kept.
+
+    A pipeline is an async callable taking a question and returning at least {"context": [...], "answer": str};
+    any other keys (e.g. "question_type") are copied into the result. Blocking retrieval and generation calls
+    should be wrapped in `asyncio.to_thread` by the pipeline so they do not stall the other questions.
+
+    Args:
+        evaluator: Object with the evaluate_context_precision, evaluate_context_recall, evaluate_faithfulness and
+            evaluate_response_relevancy coroutines and the `judge_models` deployments they use
+            (EvaluatorServiceV3.EvaluatorService). Required.
+        concurrency (int): Questions processed at once. Default: EVAL_CONCURRENCY or 5.
+        cache (EvaluationCache): Judgment cache; unchanged (context, answer) pairs are not judged again. Optional.
+    """
+    def __init__(self, evaluator, concurrency: int = int(os.environ.get("EVAL_CONCURRENCY", 5)),
+                 cache: Optional[EvaluationCache] = None):
+        self.evaluator = evaluator
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+
+    async def evaluate_metrics(self, question: str, ground_truth: str, answer: str, context: List[str]) -> Dict[str, object]:
+        """
+        Compute the four RAGAS metrics of one answer in parallel. A failing metric is reported as None.
+
+        Returns:
+            Dict[str, object]: Score per metric, plus "metric_errors" when any metric failed.
+        """
+        judges = {
+            "context_precision": lambda: self.evaluator.evaluate_context_precision(question, ground_truth, context),
+            "context_recall": lambda: self.evaluator.evaluate_context_recall(question, answer, ground_truth, context),
+            "faithfulness_result": lambda: self.evaluator.evaluate_faithfulness(question, answer, context),
+            "response_relevancy": lambda: self.evaluator.evaluate_response_relevancy(question, answer, context),
+        }
+
+        def judge(name):
+            if self.cache is None:
+                return judges[name]()
+            return self.cache.cached_judgment(name, self.evaluator.judge_models, question, ground_truth, context, answer,
+                                              judges[name])
+
+        scores = await asyncio.gather(*(judge(name) for name in METRICS), return_exceptions=True)
+        result, errors = {}, {}
+        for name, score in zip(METRICS, scores):
+            if isinstance(score, BaseException):
+                result[name], errors[name] = None, str(score)
+            else:
+                result[name] = score
+        if errors:
+            result["metric_errors"] = errors
+        return result
+
+    async def run(self, pipeline: Pipeline, questions: List[str], ground_truths: List[str],
+                  output_path: Optional[str] = None, run_info: Optional[dict] = None) -> List[dict]:
+        """
+        Answer and judge every question.
+
+        Args:
+            pipeline (Pipeline): Async question -> {"context", "answer", ...} callable. Required.
+            questions (List[str]): Questions. Required.
+            ground_truths (List[str]): Reference answer per question. Required.
+            output_path (str): JSONL file results are appended to as they complete. Optional.
+            run_info (dict): Fields copied into every result, e.g. {"cached": False}. Optional.
+
+        Returns:
+            List[dict]: Results in question order. Questions whose pipeline failed have an "error" field.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        write_lock = asyncio.Lock()
+        output = None
+        if output_path:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            output = open(output_path, "w", encoding="utf-8")
+
+        async def process(index: int, question: str, ground_truth: str) -> dict:
+            async with semaphore:
+                result = {"question": question, "ground_truth": ground_truth, "question_index": index + 1,
+                          **(run_info or {})}
+                start_time = time.time()
+                # Same stage timers as production chat requests; judging is timed outside of them so its
+                # LLM tokens are not counted as pipeline tokens
+                with collect_stages() as timings:
+                    try:
+                        generated = await pipeline(question)
+                    except Exception as e:
+                        logger.error("Evaluation pipeline failed for question %s: %s", index + 1, e)
+                        result.update({"error": str(e), "time_taken": time.time() - start_time})
+                        generated = None
+                    else:
+                        result.update(generated)
+                        result["time_taken"] = time.time() - start_time
+                result["stage_timings"] = timings.as_dict()
+                if generated is not None:
+                    judge_start = time.perf_counter()
+                    result.update(await self.evaluate_metrics(
+                        question, ground_truth, generated.get("answer") or "", generated.get("context") or []))
+                    result["stage_timings"]["stages"]["judging"] = time.perf_counter() - judge_start
+
+            if output is not None:
+                async with write_lock:
+                    output.write(json.dumps(result, default=str) + "\n")
+                    output.flush()
+            logger.info("Question %s completed in %.2f seconds", index + 1, result["time_taken"])
+            return result
+
+        start = time.time()
+        try:
+            results = await asyncio.gather(*(
+                process(i, question, ground_truth)
+                for i, (question, ground_truth) in enumerate(zip(questions, ground_truths))
+            ))
+        finally:
+            if output is not None:
+                output.close()
+        logger.info("Evaluated %s questions in %.1f seconds (concurrency %s)", len(results), time.time() - start, self.concurrency)
+        return list(results)
+
+
+def write_results(results: List[dict], path: str) -> None:
+    """Write the final results as an indented JSON array, the format of the earlier evaluation files."""
+    with open(path, mode='w', newline='') as jsonfile:
+        json.dump(results, jsonfile, indent=4, default=str)
@@ -0,0 +1,189 @@
+"""
+Per-stage latency report of evaluation runs, with regression checks against a stored baseline.
+
+Reads the per-variant JSONL results of a pipeline-matrix run (results/<run>/<variant>.jsonl), computes p50/p95 of
+the question latency, of every pipeline stage (routing, temporal, embedding, vector_search, text_search, fusion,
+generation, judging) and of the LLM tokens in/out, and compares the latencies with results/latency_baseline.json.
+
+Measure with the caches disabled (pipelineMatrix --no-cache): cached retrieval and answers skip their stages, so
+runs whose results are not marked "cached": false are reported but neither compared with nor stored as the baseline.
+
+Run from the backend directory:
+    python -m evaluationservice.latencyReport results/<run>
+    python -m evaluationservice.latencyReport results/<run> --update-baseline
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from typing import Dict, List
+
+from stageTiming import STAGES
+
+BASELINE_PATH = os.path.join("results", "latency_baseline.json")
+REPORT_STAGES = ("total",) + STAGES + ("judging",)
+TOKEN_FIELDS = ("tokens_in", "tokens_out")
+
+
+def percentile(values: List[float], q: float):
+    """Linear-interpolated percentile `q` (0-100) of `values`, None when empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def latency_report(results: List[dict]) -> Dict[str, dict]:
+    """
+    p50/p95 per stage of one variant.
+
+    "total" is the pipeline latency of a question (time_taken). A stage is reported over the questions that ran it,
+    e.g. routing only over the questions of the PreQRAG variants. Failed questions are left out.
+
+    Args:
+        results (List[dict]): EvaluationRunner results of one variant. Required.
+
+    Returns:
+        Dict[str, dict]: {stage: {"p50": seconds, "p95": seconds, "n": questions}}, plus tokens_in/tokens_out counts.
+    """
+    samples = {name: [] for name in REPORT_STAGES + TOKEN_FIELDS}
+    for result in results:
+        if "error" in result:
+            continue
+        timings = result.get("stage_timings") or {}
+        if "time_taken" in result:
+            samples["total"].append(result["time_taken"])
+        for name, seconds in (timings.get("stages") or {}).items():
+            samples.setdefault(name, []).append(seconds)
+        for field in TOKEN_FIELDS:
+            if field in timings:
+                samples[field].append(timings[field])
+    return {name: {"p50": percentile(values, 50), "p95": percentile(values, 95), "n": len(values)}
+            for name, values in samples.items() if values}
+
+
+def measured_without_cache(runs: Dict[str, List[dict]]) -> bool:
+    """Whether every result of a run was produced with the retrieval and evaluation caches disabled."""
+    return all(result.get("cached") is False for results in runs.values() for result in results)
+
+
+def compare_to_baseline(report: Dict[str, Dict[str, dict]], baseline: Dict[str, Dict[str, dict]],
+                        tolerance: float = 0.2, min_delta: float = 0.05) -> List[dict]:
+    """
+    Find the stage latencies that got slower than the baseline.
+
+    Args:
+        report (Dict): {variant: latency_report(...)} of the current run. Required.
+        baseline (Dict): Same layout, from the baseline file. Required.
+        tolerance (float): Allowed relative slowdown of p50 and p95. Default: 0.2 (20%).
+        min_delta (float): Slowdowns smaller than this many seconds are ignored as noise. Default: 0.05.
+
+    Returns:
+        List[dict]: One entry per regression, with variant, stage, percentile, baseline and current values.
+    """
+    regressions = []
+    for variant, stages in report.items():
+        for name, current in stages.items():
+            if name in TOKEN_FIELDS:
+                continue
+            previous = baseline.get(variant, {}).get(name)
+            if not previous:
+                continue
+            for pct in ("p50", "p95"):
+                before, after = previous.get(pct), current.get(pct)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + tolerance) and after - before > min_delta:
+                    regressions.append({"variant": variant, "stage": name, "percentile": pct,
+                                        "baseline": before, "current": after,
+                                        "change": (after - before) / before if before else None})
+    return regressions
+
+
+def format_report(report: Dict[str, Dict[str, dict]], regressions: List[dict] = ()) -> str:
+    """Render the p50/p95 of every stage per variant as a markdown table, regressions marked with '!'."""
+    flagged = {(r["variant"], r["stage"], r["percentile"]) for r in regressions}
+    names = [name for name in REPORT_STAGES + TOKEN_FIELDS if any(name in stages for stages in report.values())]
+    lines = ["| variant | " + " | ".join(f"{name} p50 / p95" for name in names) + " |",
+             "|" + "---|" * (len(names) + 1)]
+    for variant, stages in report.items():
+        cells = []
+        for name in names:
+            if name not in stages:
+                cells.append("-")
+                continue
+            unit = "" if name in TOKEN_FIELDS else "s"
+            values = []
+            for pct in ("p50", "p95"):
+                mark = "!" if (variant, name, pct) in flagged else ""
+                values.append(f"{stages[name][pct]:.{0 if name in TOKEN_FIELDS else 2}f}{unit}{mark}")
+            cells.append(" / ".join(values))
+        lines.append(f"| {variant} | " + " | ".join(cells) + " |")
+    if regressions:
+        lines.append("")
+    for r in regressions:
+        lines.append(f"REGRESSION {r['variant']} {r['stage']} {r['percentile']}: "
+                     f"{r['baseline']:.2f}s -> {r['current']:.2f}s")
+    return "\n".join(lines)
+
+
+def load_run(run_dir: str) -> Dict[str, List[dict]]:
+    """Read results/<run>/<variant>.jsonl files into {variant: results}."""
+    runs = {}
+    for path in sorted(glob.glob(os.path.join(run_dir, "*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            runs[os.path.splitext(os.path.basename(path))[0]] = [json.loads(line) for line in f if line.strip()]
+    return runs
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Dict[str, dict]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("variants", {})
+
+
+def save_baseline(report: Dict[str, Dict[str, dict]], path: str = BASELINE_PATH, source: str = None) -> None:
+    """Merge the variants of `report` into the baseline file, replacing the ones measured again."""
+    variants = load_baseline(path)
+    variants.update(report)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": source, "variants": variants}, f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles of an evaluation run")
+    parser.add_argument("run_dir", help="Run directory with <variant>.jsonl results, e.g. results/<run>")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignored slowdown in seconds")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    args = parser.parse_args()
+
+    runs = load_run(args.run_dir)
+    report = {variant: latency_report(results) for variant, results in runs.items()}
+    if not report:
+        parser.error(f"no results in {args.run_dir}")
+    if not measured_without_cache(runs):
+        print(format_report(report))
+        if args.update_baseline:
+            parser.error("refusing to store a baseline from a run with caches enabled, rerun with --no-cache")
+        print("run used the retrieval/evaluation caches, not compared with the baseline (rerun with --no-cache)")
+        return
+    regressions = compare_to_baseline(report, load_baseline(args.baseline), args.tolerance, args.min_delta)
+    print(format_report(report, regressions))
+    if args.update_baseline:
+        save_baseline(report, args.baseline, source=args.run_dir)
+        print(f"baseline written to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Pipeline-matrix evaluation: run several retrieval/routing variants over one question file in a single run.
+
+All variants run concurrently and share one RetrievalCache, so identical Mongo searches and query embeddings
+are issued once, and one EvaluationCache, so unchanged answers and judgments are reused across runs.
+Each variant streams its results to results/<run>/<variant>.jsonl; a summary table is printed at the end
+and written to results/<run>/summary.json and summary.md. Per-stage latency percentiles are written to
+latency.md; runs with --no-cache are also compared with results/latency_baseline.json (see latencyReport).
+Cache hits skip their stages, so the latency of a cached run is not representative.
+
+Variants:
+    clean, pre, naive, clean_naive            single-video pipelines of EvaluatorServiceV2 (need --video-id)
+    ragv3_only, ragv3_temporal,
+    ragv3_preqrag, ragv3_preqrag_temporal     multi-video pipelines of EvaluatorServiceV3 (need --course)
+
+Question file: JSON list of {"question": ..., "ground_truth": ...}, JSON object {"questions": [...],
+"ground_truths": [...]} or JSONL of question objects. Without --questions, the multi-video questions of
+EvaluatorServiceV3 are used.
+
+Run from the backend directory:
+    python -m evaluationservice.pipelineMatrix --course SC1007 --variants ragv3_only,ragv3_preqrag_temporal
+    python -m evaluationservice.pipelineMatrix --video-id zwb6lqhpzl --variants clean,pre,naive,clean_naive \\
+        --questions questions_t.json --run temporal-v2
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from evaluationservice.evaluationCache import EvaluationCache
+from evaluationservice.evaluationRunner import METRICS, EvaluationRunner
+from evaluationservice.latencyReport import (BASELINE_PATH, compare_to_baseline, format_report, latency_report,
+                                             load_baseline, percentile)
+from evaluationservice.retrievalCache import RetrievalCache, share_retrieval
+from loggingConfig import logger
+
+SINGLE_VIDEO_VARIANTS = {
+    # variant -> ChatService retrieval method taking (video_id, question)
+    "clean": "retrieve_results_prompt_clean",
+    "pre": "retrieve_results_prompt",
+    "naive": "retrieve_results_prompt_naive",
+    "clean_naive": "retrieve_results_prompt_clean_naive",
+}
+MULTI_VIDEO_VARIANTS = ("ragv3_only", "ragv3_temporal", "ragv3_preqrag", "ragv3_preqrag_temporal")
+VARIANTS = tuple(SINGLE_VIDEO_VARIANTS) + MULTI_VIDEO_VARIANTS
+
+
+def load_questions(path: str) -> Tuple[List[str], List[str]]:
+    """
+    Read a question file.
+
+    Args:
+        path (str): JSON or JSONL file, see the module docstring for the accepted layouts. Required.
+
+    Returns:
+        Tuple[List[str], List[str]]: Questions and their ground truths.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        return list(data["questions"]), list(data["ground_truths"])
+    return [item["question"] for item in data], [item.get("ground_truth", "") for item in data]
+
+
+def build_pipelines(evaluator, variants: List[str], video_id: str = None,
+                    video_mapping: dict = None) -> Dict[str, Callable[[str], Awaitable[dict]]]:
+    """
+    Build the question -> {"context", "answer", ...} pipeline of each variant.
+
+    Args:
+        evaluator: EvaluatorServiceV3.EvaluatorService used for generation. Required.
+        variants (List[str]): Variant names from VARIANTS. Required.
+        video_id (str): Video of the single-video variants. Optional.
+        video_mapping (dict): {"video_map": {name: video_id}} of the course, for the multi-video variants. Optional.
+
+    Returns:
+        Dict[str, Callable]: Pipeline per variant.
+    """
+    pipelines = {}
+    for variant in variants:
+        if variant in SINGLE_VIDEO_VARIANTS:
+            if not video_id:
+                raise ValueError(f"Variant {variant} needs --video-id")
+            retrieve = getattr(evaluator.chat_service, SINGLE_VIDEO_VARIANTS[variant])
+
+            async def single_video(question, variant=variant, retrieve=retrieve):
+                retrieval_results, context = await asyncio.to_thread(retrieve, video_id, question)
+                answer = await evaluator.generate_answer(variant, question, retrieval_results, context)
+                return {'context': context, 'answer': answer}
+            pipelines[variant] = single_video
+        elif variant in MULTI_VIDEO_VARIANTS:
+            if video_mapping is None:
+                raise ValueError(f"Variant {variant} needs --course")
+            video_ids = list(video_mapping.get("video_map", {}).values())
+            pipelines[variant] = {
+                "ragv3_only": lambda question: evaluator.answer_ragv3_only(question, video_ids),
+                "ragv3_temporal": lambda question: evaluator.answer_ragv3_temporal(question, video_ids),
+                "ragv3_preqrag": lambda question: evaluator.answer_ragv3_preqrag(question, video_mapping),
+                "ragv3_preqrag_temporal": lambda question: evaluator.answer_ragv3_preqrag(question, video_mapping, temporal=True),
+            }[variant]
+        else:
+            raise ValueError(f"Unknown variant {variant}, expected one of {', '.join(VARIANTS)}")
+    return pipelines
+
+
+def _mean(values: List[float]):
+    values = [v for v in values if isinstance(v, (int, float)) and not math.isnan(v)]
+    return statistics.fmean(values) if values else None
+
+
+def summarize(results: List[dict]) -> dict:
+    """Mean of each RAGAS metric (failed and NaN scores excluded), error count and question latency."""
+    times = [r["time_taken"] for r in results if "time_taken" in r]
+    summary = {"questions": len(results), "errors": sum(1 for r in results if "error" in r)}
+    for metric in METRICS:
+        summary[metric] = _mean([r.get(metric) for r in results])
+    summary["time_p50"] = percentile(times, 50)
+    summary["time_p95"] = percentile(times, 95)
+    summary["time_mean"] = _mean(times)
+    return summary
+
+
+def format_table(summaries: Dict[str, dict]) -> str:
+    """Render variant summaries as a markdown table."""
+    columns = ["questions", "errors", *METRICS, "time_p50", "time_p95"]
+    lines = ["| variant | " + " | ".join(columns) + " |", "|" + "---|" * (len(columns) + 1)]
+    for variant, summary in summaries.items():
+        cells = [f"{summary[c]:.3f}" if isinstance(summary[c], float) else ("-" if summary[c] is None else str(summary[c]))
+                 for c in columns]
+        lines.append(f"| {variant} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+async def run_matrix(evaluator, pipelines: Dict[str, Callable], questions: List[str], ground_truths: List[str],
+                     output_dir: str, concurrency: int = int(os.environ.get("EVAL_CONCURRENCY", 5)),
+                     baseline_path: str = BASELINE_PATH, cached: bool = True) -> Dict[str, dict]:
+    """
+    Evaluate every pipeline concurrently and write the per-variant JSONL results, the summary and the latency report.
+
+    Args:
+        evaluator: Evaluator with the RAGAS metric coroutines and the evaluation cache. Required.
+        pipelines (Dict[str, Callable]): Pipeline per variant, see build_pipelines. Required.
+        questions (List[str]): Questions. Required.
+        ground_truths (List[str]): Reference answer per question. Required.
+        output_dir (str): Run directory, e.g. results/<run>. Required.
+        concurrency (int): Questions processed at once per variant. Default: EVAL_CONCURRENCY or 5.
+        baseline_path (str): Latency baseline the stage percentiles are compared with. Default: BASELINE_PATH.
+        cached (bool): The retrieval or evaluation cache is enabled. Recorded in every result; cached runs are
+            not compared with the baseline. Default: True.
+
+    Returns:
+        Dict[str, dict]: Summary per variant, with its per-stage latency percentiles under "latency" and the
+            stages slower than the baseline under "latency_regressions" (None for cached runs).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    runner = EvaluationRunner(evaluator, concurrency, evaluator.cache)
+    start = time.time()
+    all_results = await asyncio.gather(*(
+        runner.run(pipeline, questions, ground_truths, os.path.join(output_dir, f"{variant}.jsonl"), {"cached": cached})
+        for variant, pipeline in pipelines.items()
+    ))
+    summaries = {variant: summarize(results) for variant, results in zip(pipelines, all_results)}
+    latency = {variant: latency_report(results) for variant, results in zip(pipelines, all_results)}
+    regressions = [] if cached else compare_to_baseline(latency, load_baseline(baseline_path))
+    for variant, summary in summaries.items():
+        summary["latency"] = latency[variant]
+        summary["latency_regressions"] = None if cached else [r for r in regressions if r["variant"] == variant]
+
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"variants": summaries, "questions": len(questions), "elapsed": time.time() - start}, f, indent=4)
+    with open(os.path.join(output_dir, "summary.md"), "w", encoding="utf-8") as f:
+        f.write(format_table(summaries) + "\n")
+    with open(os.path.join(output_dir, "latency.md"), "w", encoding="utf-8") as f:
+        f.write(format_report(latency, regressions) + "\n")
+        if cached:
+            f.write("\nCaches were enabled: cache hits skip stages, not compared with the baseline (use --no-cache).\n")
+    logger.info("Pipeline matrix of %s variants finished in %.1f seconds", len(pipelines), time.time() - start)
+    return summaries
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Evaluate several RAG pipeline variants in one run")
+    parser.add_argument("--variants", default=",".join(MULTI_VIDEO_VARIANTS),
+                        help=f"Comma separated variants or 'all' ({', '.join(VARIANTS)})")
+    parser.add_argument("--questions", help="Question file (JSON or JSONL)")
+    parser.add_argument("--course", help="Course code for the multi-video variants")
+    parser.add_argument("--video-id", help="Video ID for the single-video variants")
+    parser.add_argument("--run", default=time.strftime("matrix-%Y%m%d-%H%M%S"), help="Run name, the output directory under results/")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the retrieval and evaluation caches, for latency measurements")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("EVAL_CONCURRENCY", 5)),
+                        help="Questions processed at once per variant")
+    args = parser.parse_args()
+
+    variants = list(VARIANTS) if args.variants == "all" else [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants {unknown}, expected {', '.join(VARIANTS)}")
+    if any(v in SINGLE_VIDEO_VARIANTS for v in variants) and not args.video_id:
+        parser.error("single-video variants need --video-id")
+    if any(v in MULTI_VIDEO_VARIANTS for v in variants) and not args.course:
+        parser.error("multi-video variants need --course")
+
+    # Imported here so --help works without the Azure and Mongo configuration
+    from brokerservice.brokerService import BrokerRepository
+    from chatservice.bm25 import keyword_engine
+    from chatservice.chatservice import ChatService
+    from chatservice.repository import ChatDatabaseService
+    from EvaluatorServiceV3 import EvaluatorService
+
+    # Same keyword retrieval as the server, which builds the BM25 index at start-up
+    if keyword_engine.enabled:
+        keyword_engine.build()
+    chat_service = ChatService()
+    broker_service = BrokerRepository()
+    evaluator = EvaluatorService(chat_service=chat_service, broker_service=broker_service, chat_db=ChatDatabaseService())
+    retrieval_cache = RetrievalCache()
+    if args.no_cache:
+        evaluator.cache = EvaluationCache(enabled=False)
+    else:
+        share_retrieval(retrieval_cache, chat_service.chat_db, evaluator.chat_db)
+
+    if args.questions:
+        questions, ground_truths = load_questions(args.questions)
+    else:
+        questions, ground_truths = evaluator.question_for_multivideos, evaluator.answer_for_multivideos
+    video_mapping = broker_service.get_video_id_title_mapping(args.course) if args.course else None
+    pipelines = build_pipelines(evaluator, variants, video_id=args.video_id, video_mapping=video_mapping)
+
+    output_dir = os.path.join("results", args.run)
+    summaries = await run_matrix(evaluator, pipelines, questions, ground_truths, output_dir, args.concurrency,
+                                 cached=not args.no_cache)
+    print(format_table(summaries))
+    with open(os.path.join(output_dir, "latency.md"), encoding="utf-8") as f:
+        print(f.read())
+    print(f"retrieval cache: {retrieval_cache.stats}, evaluation cache: {evaluator.cache.stats}")
+    print(f"results written to {output_dir}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+import concurrent.futures
+import copy
+import functools
+import json
+import threading
+from typing import Callable, Dict, Iterable
+
+from loggingConfig import logger
+
+
+class RetrievalCache:
+    """
+    In-memory memo of retrieval and embedding calls shared by the pipelines of one evaluation run.
+
+    Several pipeline variants issue identical calls for the same question (e.g. the hybrid search of
+    Ragv3_only and of a non-temporal question in Ragv3_Temporal_only, or the query embedding of every
+    semantic search). `attach` replaces the given methods of an object with memoized versions, so each
+    distinct call hits Mongo or Azure OpenAI once per run. Concurrent callers of the same key wait for the
+    first one instead of issuing the call again, and every caller gets its own copy of the result.
+    """
+    def __init__(self):
+        self._entries: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(name: str, args: tuple, kwargs: dict) -> str:
+        return json.dumps([name, args, kwargs], sort_keys=True, default=str)
+
+    def call(self, name: str, function: Callable, *args, **kwargs):
+        key = self.key(name, args, kwargs)
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = self._entries[key] = concurrent.futures.Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["hits"] += 1
+        if owner:
+            try:
+                future.set_result(function(*args, **kwargs))
+            except Exception as e:
+                # Failures are not memoized, the next caller retries
+                with self._lock:
+                    self._entries.pop(key, None)
+                future.set_exception(e)
+        return copy.deepcopy(future.result())
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        @functools.wraps(function)
+        def memoized(*args, **kwargs):
+            return self.call(name, function, *args, **kwargs)
+        return memoized
+
+    def attach(self, target, method_names: Iterable[str], prefix: str = "") -> None:
+        """
+        Replace methods of `target` with memoized versions, for this instance only.
+
+        Args:
+            target: Object whose methods are memoized, e.g. a ChatDatabaseService. Required.
+            method_names (Iterable[str]): Names of the methods. Required.
+            prefix (str): Key prefix; use the same prefix for objects that return the same data. Default: "".
+        """
+        for name in method_names:
+            setattr(target, name, self.wrap(prefix + name, getattr(target, name)))
+        logger.debug("Retrieval cache attached to %s: %s", type(target).__name__, list(method_names))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Read-only retrieval calls of ChatDatabaseService used by the evaluated pipelines
+CHAT_DB_RETRIEVAL_METHODS = (
+    "retrieve_results_prompt_semantic",
+    "retrieve_results_prompt_text",
+    "retrieve_results_prompt_semantic_v2",
+    "retrieve_results_prompt_text_v2",
+    "retrieve_results_prompt_semantic_v2_multivid",
+    "retrieve_results_prompt_text_v2_multivid",
+    "retrieve_chunks_by_timestamp",
+)
+
+
+def share_retrieval(cache: RetrievalCache, *chat_dbs) -> None:
+    """Memoize the retrieval calls and query embeddings of the given ChatDatabaseService instances."""
+    for chat_db in {id(chat_db): chat_db for chat_db in chat_dbs}.values():
+        cache.attach(chat_db, CHAT_DB_RETRIEVAL_METHODS, prefix="chat_db.")
+        cache.attach(chat_db.embedding_function, ("embed_query",), prefix="embedding.")
@@ -0,0 +1,312 @@
+"""
+Offline sweep of the hybrid retrieval parameters: recall and MRR against labelled chunks, and latency.
+
+For every combination of the grid, the semantic half of `retrieve_results_prompt_clean_multivid` is run with the
+given $vectorSearch `limit` and `numCandidates`, fused with the keyword results using the given weights, and cut
+to `top_n`. The report gives per setting:
+    - recall@k: share of a question's labelled chunks found in the top_n fused results, averaged over questions
+    - mrr: mean reciprocal rank of the first labelled chunk in the fused results
+    - candidate_recall: share of labelled chunks in the semantic results before fusion (the ceiling of recall@k)
+    - vector p50/p95 and total p50/p95 latency (vector search + keyword search + fusion; embedding excluded)
+Settings on the recall / p95 latency Pareto front are marked, so operating points can be chosen with data and
+applied through VECTOR_SEARCH_LIMIT, VECTOR_NUM_CANDIDATES, FUSION_WEIGHTS and VECTOR_NUM_LISTS.
+
+num_lists other than the live index's value are measured on scratch copies of the evaluated videos' chunks
+(sweep_<collection>_nl<num_lists>) with their own IVF index, dropped at the end unless --keep-scratch. Recall on a
+copy of a few videos is indicative only: IVF quality depends on the number of vectors per list.
+
+Question file: JSON or JSONL list of
+    {"question": str, "video_ids": [str] (default: videos of --course),
+     "relevant_ids": [chunk _id], "relevant_texts": [substring of a relevant chunk]}
+
+Run from the backend directory:
+    python -m evaluationservice.retrievalSweep --questions labelled.json --course SC1007 \\
+        --limits 10,20,40 --num-candidates 20,50,100 --weights 1:0.2,1:0.5,1:1 --top-n 3,5,10
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from chatservice.utils import parse_fusion_weights
+from databaseservice.indexRegistry import VECTOR_NUM_CANDIDATES, VECTOR_NUM_LISTS, VECTOR_SEARCH_LIMIT
+from evaluationservice.latencyReport import percentile
+from loggingConfig import logger
+from stageTiming import collect_stages
+
+
+def load_labelled_questions(path: str) -> List[dict]:
+    """Read the labelled question file, see the module docstring for the layout."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data["questions"] if isinstance(data, dict) else data
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def label_matches(label: Tuple[str, str], doc: dict) -> bool:
+    kind, value = label
+    if kind == "id":
+        return doc["_id"] == value
+    return value in _normalize(doc["text"])
+
+
+def question_labels(item: dict) -> List[Tuple[str, str]]:
+    return ([("id", str(value)) for value in item.get("relevant_ids", [])] +
+            [("text", _normalize(value)) for value in item.get("relevant_texts", []) if value])
+
+
+def recall(labels: List[Tuple[str, str]], docs: List[dict]) -> float:
+    """Share of the labels matched by at least one of `docs`."""
+    return sum(1 for label in labels if any(label_matches(label, doc) for doc in docs)) / len(labels)
+
+
+def reciprocal_rank(labels: List[Tuple[str, str]], docs: List[dict]) -> float:
+    for rank, doc in enumerate(docs, start=1):
+        if any(label_matches(label, doc) for label in labels):
+            return 1 / rank
+    return 0.0
+
+
+def rank_list(docs) -> List[dict]:
+    """Repository results in the {"_id", "text", "score"} form used by weighted_reciprocal_rank."""
+    return [{"_id": str(doc["_id"]), "text": doc["textContent"], "score": doc.get("score")} for doc in docs or []]
+
+
+def pareto_front(rows: List[dict], quality: str = "recall@k", cost: str = "total_p95") -> None:
+    """Mark (row["pareto"] = True) the rows no other row beats on both quality and cost."""
+    valid = [row for row in rows if row.get(quality) is not None and row.get(cost) is not None]
+    for row in valid:
+        row["pareto"] = not any(
+            other[quality] >= row[quality] and other[cost] <= row[cost]
+            and (other[quality] > row[quality] or other[cost] < row[cost])
+            for other in valid)
+
+
+def create_scratch_collection(db, source: str, video_ids: List[str], num_lists: int) -> str:
+    """
+    Copy the chunks of `video_ids` into a scratch collection with an IVF index of `num_lists` lists.
+
+    Returns:
+        str: Scratch collection name.
+    """
+    from databaseservice.indexRegistry import IndexSpec, ensure_indexes, vector_index
+
+    name = f"sweep_{source}_nl{num_lists}"
+    db.drop_collection(name)
+    docs = list(db[source].find({"metadata.video_id": {"$in": video_ids}}))
+    for start in range(0, len(docs), 500):
+        db[name].insert_many(docs[start:start + 500])
+    # The IVF lists are trained on the documents present when the index is built
+    ensure_indexes(db, [IndexSpec(name, [("metadata.video_id", 1)]), vector_index(name, num_lists)])
+    logger.info("Scratch collection %s: %s chunks, %s lists", name, len(docs), num_lists)
+    return name
+
+
+def sweep(chat_db, questions: List[dict], limits: List[int], num_candidates: List[int],
+          weights: List[List[float]], top_ns: List[int], repeat: int = 1,
+          services: Optional[Dict[int, object]] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Run the retrieval grid.
+
+    Args:
+        chat_db: ChatDatabaseService of the live collections, used for the keyword search. Required.
+        questions (List[dict]): Labelled questions with "video_ids". Required.
+        limits (List[int]): $vectorSearch limit values. Required.
+        num_candidates (List[int]): $vectorSearch numCandidates values. Required.
+        weights (List[List[float]]): [semantic, keyword] fusion weights. Required.
+        top_ns (List[int]): Number of fused results kept. Required.
+        repeat (int): Searches per question and setting; latency percentiles use every repetition. Default: 1.
+        services (Dict[int, object]): ChatDatabaseService per num_lists value. Default: {VECTOR_NUM_LISTS: chat_db}.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: One summary row per setting, and one detail row per setting and question.
+    """
+    from chatservice.utils import weighted_reciprocal_rank
+
+    services = services or {VECTOR_NUM_LISTS: chat_db}
+    # Keyword results and query embeddings do not depend on the swept parameters: computed once per question
+    keyword = []
+    for item in questions:
+        start = time.perf_counter()
+        docs = rank_list(chat_db.retrieve_results_prompt_text_v2_multivid(item["video_ids"], item["question"]))
+        keyword.append((docs, time.perf_counter() - start))
+        chat_db.embedding_function.embed_query(item["question"])
+
+    rows, details = [], []
+    for num_lists, service in services.items():
+        for limit, candidates in itertools.product(limits, num_candidates):
+            semantic, vector_times, failure = [], [], None
+            for item in questions:
+                try:
+                    for _ in range(repeat):
+                        with collect_stages() as timings:
+                            docs = service.retrieve_results_prompt_semantic_v2_multivid(
+                                item["video_ids"], item["question"], limit=limit, num_candidates=candidates)
+                        vector_times.append(timings.durations.get("vector_search", 0.0))
+                    semantic.append(rank_list(docs))
+                except Exception as e:
+                    failure = str(e)
+                    break
+            if failure:
+                logger.warning("Sweep setting num_lists=%s limit=%s numCandidates=%s failed: %s",
+                               num_lists, limit, candidates, failure)
+                rows.append({"num_lists": num_lists, "limit": limit, "num_candidates": candidates, "error": failure})
+                continue
+
+            for weight, top_n in itertools.product(weights, top_ns):
+                setting = {"num_lists": num_lists, "limit": limit, "num_candidates": candidates,
+                           "weights": weight, "top_n": top_n}
+                recalls, ranks, candidate_recalls, totals = [], [], [], []
+                for index, item in enumerate(questions):
+                    labels = question_labels(item)
+                    start = time.perf_counter()
+                    fused = weighted_reciprocal_rank([semantic[index], keyword[index][0]], weight)[:top_n]
+                    fusion_time = time.perf_counter() - start
+                    vector_time = vector_times[index * repeat:(index + 1) * repeat]
+                    totals.extend(t + keyword[index][1] + fusion_time for t in vector_time)
+                    recalls.append(recall(labels, fused))
+                    ranks.append(reciprocal_rank(labels, fused))
+                    candidate_recalls.append(recall(labels, semantic[index]))
+                    details.append({**setting, "question": item["question"], "recall@k": recalls[-1],
+                                    "reciprocal_rank": ranks[-1], "candidate_recall": candidate_recalls[-1],
+                                    "retrieved_ids": [doc["_id"] for doc in fused]})
+                rows.append({
+                    **setting,
+                    "questions": len(questions),
+                    "recall@k": sum(recalls) / len(recalls),
+                    "mrr": sum(ranks) / len(ranks),
+                    "candidate_recall": sum(candidate_recalls) / len(candidate_recalls),
+                    "vector_p50": percentile(vector_times, 50),
+                    "vector_p95": percentile(vector_times, 95),
+                    "total_p50": percentile(totals, 50),
+                    "total_p95": percentile(totals, 95),
+                })
+    pareto_front(rows)
+    return rows, details
+
+
+def format_sweep(rows: List[dict]) -> str:
+    """Render the sweep as a markdown table, best recall and MRR first; '*' marks the Pareto front."""
+    columns = ["num_lists", "limit", "num_candidates", "weights", "top_n", "recall@k", "mrr", "candidate_recall",
+               "vector_p50", "vector_p95", "total_p50", "total_p95"]
+    ordered = sorted(rows, key=lambda row: (-(row.get("recall@k") or -1), -(row.get("mrr") or 0),
+                                            row.get("total_p95") or float("inf")))
+    lines = ["| | " + " | ".join(columns) + " |", "|" + "---|" * (len(columns) + 1)]
+    for row in ordered:
+        if "error" in row:
+            lines.append(f"| | {row['num_lists']} | {row['limit']} | {row['num_candidates']} | error: {row['error']} |")
+            continue
+        cells = []
+        for column in columns:
+            value = row[column]
+            if column.endswith(("_p50", "_p95")):
+                cells.append(f"{value * 1000:.1f}ms")
+            elif isinstance(value, float):
+                cells.append(f"{value:.3f}")
+            elif isinstance(value, list):
+                cells.append(":".join(f"{v:g}" for v in value))
+            else:
+                cells.append(str(value))
+        lines.append(f"| {'*' if row.get('pareto') else ''} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep hybrid retrieval parameters against labelled chunks")
+    parser.add_argument("--questions", required=True, help="Labelled question file (JSON or JSONL)")
+    parser.add_argument("--course", help="Course whose videos are searched for questions without video_ids")
+    parser.add_argument("--limits", default=f"10,{VECTOR_SEARCH_LIMIT},40", help="$vectorSearch limit values")
+    parser.add_argument("--num-candidates", default=f"{VECTOR_NUM_CANDIDATES},20,50,100",
+                        help="$vectorSearch numCandidates values")
+    parser.add_argument("--num-lists", default=str(VECTOR_NUM_LISTS),
+                        help="IVF list counts; values other than the live index use scratch collections")
+    parser.add_argument("--weights", default="1:0.2,1:0.5,1:1",
+                        help="Comma separated semantic:keyword fusion weights, the FUSION_WEIGHTS format")
+    parser.add_argument("--top-n", default="3,5,10", help="Fused results kept")
+    parser.add_argument("--repeat", type=int, default=3, help="Searches per question and setting")
+    parser.add_argument("--run", default=time.strftime("sweep-%Y%m%d-%H%M%S"), help="Output directory under results/")
+    parser.add_argument("--keep-scratch", action="store_true", help="Keep the scratch collections")
+    args = parser.parse_args()
+    try:
+        weights = [parse_fusion_weights(value) for value in args.weights.split(",")]
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Imported here so --help works without the Azure and Mongo configuration
+    from chatservice.bm25 import keyword_engine
+    from chatservice.repository import ChatDatabaseService
+    from evaluationservice.retrievalCache import RetrievalCache
+
+    chat_db = ChatDatabaseService()
+    # Same keyword retrieval as the server, which builds the BM25 index at start-up
+    if keyword_engine.enabled:
+        keyword_engine.build()
+    questions = load_labelled_questions(args.questions)
+    course_video_ids = None
+    if args.course:
+        course = chat_db.check_if_course_exist(args.course) or {}
+        course_video_ids = [video["video_id"] for video in
+                            chat_db.video_collection.find({"_id": {"$in": course.get("videos", [])}}, {"video_id": 1})]
+    for item in questions:
+        item.setdefault("video_ids", course_video_ids)
+    skipped = [item["question"] for item in questions if not question_labels(item) or not item["video_ids"]]
+    if skipped:
+        logger.warning("Skipping %s questions without labels or videos: %s", len(skipped), skipped)
+    questions = [item for item in questions if item["question"] not in skipped]
+    if not questions:
+        parser.error("no labelled questions with videos")
+
+    # One embedding per question across every setting and scratch collection
+    embeddings = RetrievalCache()
+    embeddings.attach(chat_db.embedding_function, ("embed_query",), prefix="embedding.")
+    db = chat_db.video_collection.database
+    source = chat_db.prompt_content_clean_index_collection.name
+    video_ids = sorted({video_id for item in questions for video_id in item["video_ids"]})
+    services, scratch = {}, []
+    for num_lists in _ints(args.num_lists):
+        if num_lists == VECTOR_NUM_LISTS:
+            services[num_lists] = chat_db
+            continue
+        name = create_scratch_collection(db, source, video_ids, num_lists)
+        scratch.append(name)
+        services[num_lists] = ChatDatabaseService(prompt_collection_clean_name=name)
+        services[num_lists].embedding_function = chat_db.embedding_function
+
+    try:
+        rows, details = sweep(chat_db, questions, _ints(args.limits), _ints(args.num_candidates),
+                              weights,
+                              _ints(args.top_n), args.repeat, services)
+    finally:
+        if not args.keep_scratch:
+            for name in scratch:
+                db.drop_collection(name)
+
+    output_dir = os.path.join("results", args.run)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "sweep.json"), "w", encoding="utf-8") as f:
+        json.dump({"questions": len(questions), "repeat": args.repeat, "settings": rows}, f, indent=4)
+    with open(os.path.join(output_dir, "sweep_questions.jsonl"), "w", encoding="utf-8") as f:
+        for detail in details:
+            f.write(json.dumps(detail) + "\n")
+    table = format_sweep(rows)
+    with open(os.path.join(output_dir, "sweep.md"), "w", encoding="utf-8") as f:
+        f.write(table + "\n")
+    print(table)
+    print(f"results written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from EmbeddingService import EmbeddingService
+from ingestionservice.embeddingStore import EmbeddingStore, embedding_store
+from llmservice.tokens import count_tokens
+from loggingConfig import logger
+
+load_dotenv()
+
+
+class BulkEmbedder:
+    """
+    BulkEmbedder embeds large numbers of sections at ingest time.
+    Sections are packed into token-bounded batches and embedded with bounded concurrency; callers write the
+    vectors themselves. Rate limiting and retries are left to the LLM gateway the embedding client goes through
+    (LLM_DEPLOYMENT_LIMITS and LLM_MAX_RETRIES), so a batch is throttled and retried in one place only.
+
+    Args:
+        embedding_service (EmbeddingService): Provides the Azure OpenAI client and model. Default: EmbeddingService().
+        store (EmbeddingStore): Content-hash store of previously computed embeddings. Default: shared embedding_store.
+        max_batch_tokens (int): Maximum tokens per embedding request. Default: EMBEDDING_BATCH_TOKENS or 60000.
+        max_batch_size (int): Maximum inputs per embedding request. Default: EMBEDDING_BATCH_SIZE or 16.
+        max_concurrency (int): Maximum embedding requests in flight. Default: EMBEDDING_CONCURRENCY or 4.
+    """
+    def __init__(
+            self,
+            embedding_service: Optional[EmbeddingService] = None,
+            store: Optional[EmbeddingStore] = None,
+            max_batch_tokens: int = int(os.environ.get("EMBEDDING_BATCH_TOKENS", 60000)),
+            max_batch_size: int = int(os.environ.get("EMBEDDING_BATCH_SIZE", 16)),
+            max_concurrency: int = int(os.environ.get("EMBEDDING_CONCURRENCY", 4))
+    ):
+        self._embedding_service = embedding_service
+        self.embedding_store = store or embedding_store
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+
+    def make_batches(self, texts: List[str]) -> List[tuple]:
+        """
+        Pack text indices into batches bounded by both token count and number of inputs.
+
+        Args:
+            texts (List[str]): Texts to embed. Required.
+
+        Returns:
+            List[tuple]: (indices into `texts`, total tokens) per batch.
+        """
+        batches = []
+        current, current_tokens = [], 0
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    def _embed_batch(self, batch_texts: List[str]) -> List[List[float]]:
+        response = self.embedding_service.client.embeddings.create(
+            input=batch_texts, model=self.embedding_service.embedding_model)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, reusing vectors from the embedding store and only calling Azure OpenAI for new content.
+        Texts repeated within the call are embedded once.
+
+        Args:
+            texts (List[str]): Texts to embed. Required.
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order.
+        """
+        model = self.embedding_service.embedding_model
+        keys = [self.embedding_store.key(text, model) for text in texts]
+        known = self.embedding_store.get_many(set(keys))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in known and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = dict(zip(missing.keys(), self._embed_uncached(list(missing.values()))))
+            self.embedding_store.put_many(new_vectors, model)
+            known.update(new_vectors)
+
+        logger.info("Embedding reuse: %s/%s texts served from the embedding store", len(texts) - len(missing), len(texts))
+        return [known[key] for key in keys]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in token-bounded batches with bounded concurrency."""
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        batches = self.make_batches(texts)
+        if not batches:
+            return []
+
+        def run(batch):
+            indices, _ = batch
+            return indices, self._embed_batch([texts[i] for i in indices])
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            for indices, embeddings in executor.map(run, batches):
+                for i, embedding in zip(indices, embeddings):
+                    vectors[i] = embedding
+        logger.info("Embedded %s texts in %s batches", len(texts), len(batches))
+        return vectors
+
+
+bulk_embedder = BulkEmbedder()
@@ -0,0 +1,76 @@
+import hashlib
+from typing import Dict, Iterable, List
+
+from pymongo import UpdateOne
+
+from databaseservice.databaseService import database_service
+
+
+class EmbeddingStore:
+    """
+    EmbeddingStore keeps every embedding computed at ingest time, keyed by hash(model, text).
+    Identical sections across the raw and clean indexes, and across re-ingestion of the same video,
+    reuse the stored vector instead of calling Azure OpenAI again.
+
+    Args:
+        collection_name (str): Collection holding the stored embeddings. Default: "embedding_store".
+    """
+    LOOKUP_BATCH_SIZE = 1000
+
+    def __init__(self, collection_name: str = "embedding_store"):
+        db = database_service.get_db()
+        self.collection = db[collection_name]
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        """
+        Content hash of a text for a given embedding model.
+
+        Args:
+            text (str): Embedded text. Required.
+            model (str): Embedding model or deployment name. Required.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored embeddings.
+
+        Args:
+            keys (Iterable[str]): Content hashes. Required.
+
+        Returns:
+            Dict[str, List[float]]: Embedding per key found in the store.
+        """
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), self.LOOKUP_BATCH_SIZE):
+            cursor = self.collection.find(
+                {"_id": {"$in": keys[start:start + self.LOOKUP_BATCH_SIZE]}},
+                {"vector": 1}
+            )
+            for doc in cursor:
+                found[doc["_id"]] = doc["vector"]
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]], model: str) -> None:
+        """
+        Store new embeddings. Keys already present are left untouched.
+
+        Args:
+            vectors (Dict[str, List[float]]): Embedding per content hash. Required.
+            model (str): Embedding model or deployment name. Required.
+        """
+        if not vectors:
+            return
+        operations = [
+            UpdateOne({"_id": key}, {"$setOnInsert": {"vector": vector, "model": model}}, upsert=True)
+            for key, vector in vectors.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+
+embedding_store = EmbeddingStore()
@@ -0,0 +1,107 @@
+import hashlib
+from typing import List, Optional
+
+from pymongo import DeleteMany, InsertOne, UpdateOne
+
+from ingestionservice.bulkEmbedder import BulkEmbedder, bulk_embedder
+from loggingConfig import logger
+
+
+def section_hash(text: str) -> str:
+    """
+    Content hash of a section text, stored as `metadata.content_hash`.
+
+    Args:
+        text (str): Section text. Required.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalIndexer:
+    """
+    IncrementalIndexer keeps the indexed sections of one video in sync with a new set of sections.
+    Sections are identified by their (start, end) time range. Unchanged sections keep their vectors,
+    changed sections are re-embedded and updated in place, new sections are inserted and sections
+    that no longer exist (or were duplicated by earlier appends) are deleted.
+
+    Args:
+        embedder (BulkEmbedder): Embedder used for changed and new sections. Default: shared bulk_embedder.
+    """
+    def __init__(self, embedder: Optional[BulkEmbedder] = None):
+        self.embedder = embedder or bulk_embedder
+
+    def sync_video_sections(self, collection, video_id: str, texts: List[str], metadatas: List[dict]) -> dict:
+        """
+        Diff the sections of a video against the documents already indexed and apply only the differences.
+
+        Args:
+            collection: PyMongo collection holding the indexed sections. Required.
+            video_id (str): Video Indexer ID, matched against `metadata.video_id`. Required.
+            texts (List[str]): New section texts. Required.
+            metadatas (List[dict]): Metadata per section, including "start" and "end". Required.
+
+        Returns:
+            dict: Number of sections inserted, updated, deleted and left unchanged.
+        """
+        existing = {}
+        for doc in collection.find({"metadata.video_id": video_id}, {"textContent": 1, "metadata": 1}):
+            metadata = doc.get("metadata", {})
+            key = (metadata.get("start"), metadata.get("end"))
+            content_hash = metadata.get("content_hash") or section_hash(doc.get("textContent", ""))
+            existing.setdefault(key, []).append((doc["_id"], content_hash))
+
+        to_delete = []
+        to_embed = []  # (index into texts, existing _id or None)
+        unchanged = 0
+        seen_keys = set()
+        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+            key = (metadata.get("start"), metadata.get("end"))
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            candidates = existing.pop(key, [])
+            content_hash = section_hash(text)
+            match = next((c for c in candidates if c[1] == content_hash), None)
+            if match is not None:
+                unchanged += 1
+                to_delete.extend(_id for _id, _ in candidates if _id != match[0])
+            elif candidates:
+                to_embed.append((i, candidates[0][0]))
+                to_delete.extend(_id for _id, _ in candidates[1:])
+            else:
+                to_embed.append((i, None))
+
+        # Whatever is left in existing no longer has a matching section
+        for candidates in existing.values():
+            to_delete.extend(_id for _id, _ in candidates)
+
+        vectors = self.embedder.embed_texts([texts[i] for i, _ in to_embed])
+        operations = []
+        inserted = updated = 0
+        for (i, doc_id), vector in zip(to_embed, vectors):
+            fields = {
+                "textContent": texts[i],
+                "vectorContent": vector,
+                "metadata": {**metadatas[i], "content_hash": section_hash(texts[i])}
+            }
+            if doc_id is None:
+                operations.append(InsertOne(fields))
+                inserted += 1
+            else:
+                operations.append(UpdateOne({"_id": doc_id}, {"$set": fields}))
+                updated += 1
+        if to_delete:
+            operations.append(DeleteMany({"_id": {"$in": to_delete}}))
+
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+
+        summary = {"inserted": inserted, "updated": updated, "deleted": len(to_delete), "unchanged": unchanged}
+        logger.info("Incremental index sync for video %s on %s: %s", video_id, collection.name, summary)
+        return summary
+
+
+incremental_indexer = IncrementalIndexer()
@@ -0,0 +1,518 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from llmservice.tokens import TokenBudget, count_tokens
+from loggingConfig import logger
+from stageTiming import record_tokens
+
+load_dotenv()
+
+# Header naming the service a request is made for; set on each client and removed before the request is sent
+CALLER_HEADER = "x-gateway-caller"
+DEPLOYMENT_PATTERN = re.compile(r"/deployments/([^/]+)/")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Completion tokens counted against the TPM budget when a chat request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def parse_deployment_limits(value: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse LLM_DEPLOYMENT_LIMITS, e.g. "gpt-4o=4:60000,text-embedding-3-small=8:350000".
+
+    Args:
+        value (str): Comma separated deployment=concurrency:tokens_per_minute entries. Required.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: (max concurrency, tokens per minute) per deployment.
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, limit = entry.partition("=")
+        concurrency, _, tpm = limit.partition(":")
+        limits[name.strip()] = (int(concurrency), int(tpm))
+    return limits
+
+
+def estimate_tokens(body: bytes) -> Tuple[int, bool]:
+    """
+    Estimate the tokens a chat or embedding request will consume.
+
+    Args:
+        body (bytes): JSON request body. Required.
+
+    Returns:
+        Tuple[int, bool]: Estimated tokens, and whether the response is streamed.
+    """
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return max(1, len(body) // 4), False
+    if not isinstance(payload, dict):
+        return max(1, len(body) // 4), False
+
+    tokens = 0
+    for message in payload.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            tokens += count_tokens(content)
+        elif isinstance(content, list):
+            tokens += sum(count_tokens(part.get("text", "")) for part in content if isinstance(part, dict))
+    if "messages" in payload:
+        tokens += payload.get("max_tokens") or payload.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+
+    inputs = payload.get("input")
+    if isinstance(inputs, str):
+        tokens += count_tokens(inputs)
+    elif isinstance(inputs, list):
+        for item in inputs:
+            tokens += count_tokens(item) if isinstance(item, str) else len(item) if isinstance(item, list) else 1
+    return max(1, tokens), bool(payload.get("stream"))
+
+
+def retry_delay(headers: Optional[httpx.Headers], attempt: int) -> float:
+    """Honour retry-after-ms / retry-after when present, otherwise back off exponentially with jitter."""
+    if headers is not None:
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000 + random.uniform(0, 0.5)
+            if headers.get("retry-after"):
+                return float(headers["retry-after"]) + random.uniform(0, 0.5)
+        except ValueError:
+            pass
+    return min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class DeploymentLimiter:
+    """
+    Concurrency cap and tokens-per-minute budget of one Azure OpenAI deployment, shared by every client
+    of the process. Usable from worker threads and from event loops.
+
+    Args:
+        name (str): Deployment name. Required.
+        max_concurrency (int): Maximum requests in flight. Required.
+        tokens_per_minute (int): Token quota of the deployment. Required.
+    """
+    def __init__(self, name: str, max_concurrency: int, tokens_per_minute: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.budget = TokenBudget(tokens_per_minute)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self, tokens: int) -> None:
+        self._slots.acquire()
+        self._enter()
+        try:
+            self.budget.acquire(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    async def acquire_async(self, tokens: int) -> None:
+        # Polling keeps the event loop free while the slots are held by other threads or loops
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(0.02)
+        self._enter()
+        try:
+            await self.budget.acquire_async(tokens)
+        except BaseException:
+            # Cancelled while waiting for budget (timeout, client disconnect): the caller never gets to release
+            self.release()
+            raise
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class LLMGateway:
+    """
+    Process-wide gateway for Azure OpenAI chat and embedding calls.
+
+    Every client built by the gateway shares one pooled HTTP transport that:
+        - caps concurrent requests and tokens per minute per deployment,
+        - retries 429 and 5xx responses and connection errors, honouring retry-after with jittered backoff,
+        - records requests, tokens, retries and throttling per caller (the service that made the call).
+
+    Clients are created with max_retries=0 so the SDK does not retry on top of the gateway.
+
+    Args:
+        max_concurrency (int): Default concurrency cap per deployment. Default: LLM_MAX_CONCURRENCY or 8.
+        tokens_per_minute (int): Default TPM budget per deployment. Default: LLM_TPM or 120000.
+        deployment_limits (str): Per-deployment overrides. Default: LLM_DEPLOYMENT_LIMITS.
+        max_retries (int): Retries per request. Default: LLM_MAX_RETRIES or 6.
+        max_connections (int): Pooled connections. Default: LLM_MAX_CONNECTIONS or 50.
+        timeout (float): Request timeout in seconds. Default: LLM_TIMEOUT or 120.
+    """
+    def __init__(
+            self,
+            max_concurrency: int = int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+            tokens_per_minute: int = int(os.environ.get("LLM_TPM", 120000)),
+            deployment_limits: str = os.environ.get("LLM_DEPLOYMENT_LIMITS", ""),
+            max_retries: int = int(os.environ.get("LLM_MAX_RETRIES", 6)),
+            max_connections: int = int(os.environ.get("LLM_MAX_CONNECTIONS", 50)),
+            timeout: float = float(os.environ.get("LLM_TIMEOUT", 120)),
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.deployment_limits = parse_deployment_limits(deployment_limits)
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self._limiters: Dict[str, DeploymentLimiter] = {}
+        self._usage: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._clients: Dict[tuple, object] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    # Limits and accounting
+
+    def limiter(self, deployment: str) -> DeploymentLimiter:
+        with self._lock:
+            limiter = self._limiters.get(deployment)
+            if limiter is None:
+                concurrency, tpm = self.deployment_limits.get(deployment, (self.max_concurrency, self.tokens_per_minute))
+                limiter = self._limiters[deployment] = DeploymentLimiter(deployment, concurrency, tpm)
+            return limiter
+
+    def _counters(self, caller: str, deployment: str) -> Dict[str, int]:
+        key = (caller, deployment)
+        if key not in self._usage:
+            self._usage[key] = {"requests": 0, "errors": 0, "retries": 0, "throttled": 0,
+                                "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        return self._usage[key]
+
+    def record_response(self, caller: str, deployment: str, response: httpx.Response, read_usage: bool) -> None:
+        usage = {}
+        if read_usage and response.status_code == 200:
+            try:
+                usage = response.json().get("usage") or {}
+            except Exception:
+                usage = {}
+        with self._lock:
+            counters = self._counters(caller, deployment)
+            counters["requests"] += 1
+            if response.status_code >= 400:
+                counters["errors"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                counters[field] += int(usage.get(field) or 0)
+        # Attributed to the chat request or evaluated question being timed, if any
+        record_tokens(int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0))
+
+    def record_retry(self, caller: str, deployment: str, status_code: Optional[int], delay: float) -> None:
+        with self._lock:
+            counters = self._counters(caller, deployment)
+            counters["retries"] += 1
+            if status_code == 429:
+                counters["throttled"] += 1
+        logger.info("LLM request to %s for %s failed (%s), retrying in %.1fs",
+                    deployment, caller, status_code or "connection error", delay)
+
+    def usage(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Usage since start-up.
+
+        Returns:
+            Dict: Counters per caller, then per deployment.
+        """
+        with self._lock:
+            result = {}
+            for (caller, deployment), counters in self._usage.items():
+                result.setdefault(caller, {})[deployment] = dict(counters)
+            return result
+
+    def deployment_stats(self) -> Dict[str, dict]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {
+            limiter.name: {
+                "in_flight": limiter.in_flight,
+                "max_concurrency": limiter.max_concurrency,
+                "tokens_per_minute": int(limiter.budget.capacity),
+            }
+            for limiter in limiters
+        }
+
+    # Shared HTTP clients
+
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                transport = GatewayTransport(self, httpx.HTTPTransport(limits=self.limits))
+                self._http_client = httpx.Client(transport=transport, timeout=self.timeout)
+            return self._http_client
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(transport=AsyncGatewayTransport(self), timeout=self.timeout)
+            return self._async_http_client
+
+    def close(self) -> None:
+        """Close the synchronous client. Use `aclose` from an event loop to close the async client as well."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    async def aclose(self) -> None:
+        """Close both shared HTTP clients and their connection pools."""
+        self.close()
+        with self._lock:
+            async_http_client, self._async_http_client = self._async_http_client, None
+        if async_http_client is not None:
+            await async_http_client.aclose()
+
+    # Client factories
+
+    @staticmethod
+    def _azure_settings() -> dict:
+        return {
+            "azure_endpoint": os.environ.get("AZURE_OPENAI_ENDPOINT"),
+            "api_key": os.environ.get("AZURE_OPENAI_API_KEY"),
+            "api_version": os.environ.get("OPENAI_API_VERSION"),
+        }
+
+    def openai_client(self, caller: str, **settings):
+        """
+        Shared synchronous AzureOpenAI client for a caller.
+
+        Args:
+            caller (str): Name of the calling service, used for usage accounting. Required.
+            **settings: azure_endpoint, api_key or api_version overrides.
+
+        Returns:
+            openai.AzureOpenAI: Client routed through the gateway.
+        """
+        from openai import AzureOpenAI
+
+        settings = {**self._azure_settings(), **settings}
+        key = ("openai", caller, tuple(sorted(settings.items())))
+        with self._lock:
+            client = self._clients.get(key)
+        if client is None:
+            client = AzureOpenAI(**settings, max_retries=0, http_client=self.http_client(),
+                                 default_headers={CALLER_HEADER: caller})
+            with self._lock:
+                client = self._clients.setdefault(key, client)
+        return client
+
+    def chat_model(self, caller: str, deployment_name: str, temperature: float = 0, **settings):
+        """
+        LangChain AzureChatOpenAI model routed through the gateway.
+
+        Args:
+            caller (str): Name of the calling service, used for usage accounting. Required.
+            deployment_name (str): Azure OpenAI deployment. Required.
+            temperature (float): Sampling temperature. Default: 0.
+            **settings: azure_endpoint, api_key or api_version overrides.
+
+        Returns:
+            AzureChatOpenAI: Chat model.
+        """
+        from langchain_openai import AzureChatOpenAI
+
+        return AzureChatOpenAI(
+            **{**self._azure_settings(), **{k: v for k, v in settings.items() if v is not None}},
+            azure_deployment=deployment_name,
+            temperature=temperature,
+            max_retries=0,
+            http_client=self.http_client(),
+            http_async_client=self.async_http_client(),
+            default_headers={CALLER_HEADER: caller},
+        )
+
+    def embeddings(self, caller: str, deployment_name: str, model: str = None, api_version: str = None):
+        """
+        LangChain AzureOpenAIEmbeddings routed through the gateway.
+
+        Args:
+            caller (str): Name of the calling service, used for usage accounting. Required.
+            deployment_name (str): Azure OpenAI embedding deployment. Required.
+            model (str): Model name. Default: deployment_name.
+            api_version (str): API version. Default: OPENAI_API_VERSION.
+
+        Returns:
+            AzureOpenAIEmbeddings: Embeddings model.
+        """
+        from langchain_openai.embeddings import AzureOpenAIEmbeddings
+
+        settings = self._azure_settings()
+        return AzureOpenAIEmbeddings(
+            azure_endpoint=settings["azure_endpoint"],
+            api_key=settings["api_key"],
+            openai_api_version=api_version or settings["api_version"],
+            azure_deployment=deployment_name,
+            model=model or deployment_name,
+            max_retries=0,
+            http_client=self.http_client(),
+            http_async_client=self.async_http_client(),
+            default_headers={CALLER_HEADER: caller},
+        )
+
+
+def _request_info(request: httpx.Request) -> Tuple[str, str, int, bool]:
+    caller = request.headers.get(CALLER_HEADER, "unknown")
+    if CALLER_HEADER in request.headers:
+        del request.headers[CALLER_HEADER]
+    match = DEPLOYMENT_PATTERN.search(request.url.path)
+    deployment = match.group(1) if match else "default"
+    tokens, streaming = estimate_tokens(request.content)
+    return caller, deployment, tokens, streaming
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Body of a streamed response that holds the deployment slot until the caller has consumed and closed it."""
+    def __init__(self, stream: httpx.SyncByteStream, limiter: DeploymentLimiter):
+        self.stream = stream
+        self.limiter = limiter
+        self.released = False
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            if not self.released:
+                self.released = True
+                self.limiter.release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async counterpart of _ReleasingStream."""
+    def __init__(self, stream: httpx.AsyncByteStream, limiter: DeploymentLimiter):
+        self.stream = stream
+        self.limiter = limiter
+        self.released = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.released:
+                self.released = True
+                self.limiter.release()
+
+
+def _streamed(response: httpx.Response, stream) -> httpx.Response:
+    return httpx.Response(response.status_code, headers=response.headers, stream=stream,
+                          extensions=response.extensions)
+
+
+class GatewayTransport(httpx.BaseTransport):
+    """
+    Synchronous transport applying the gateway's limits, retries and accounting around a pooled transport.
+    The deployment slot of a streamed response is released when its body is closed, not when the headers arrive.
+    """
+    def __init__(self, gateway: LLMGateway, transport: httpx.BaseTransport):
+        self.gateway = gateway
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        caller, deployment, tokens, streaming = _request_info(request)
+        limiter = self.gateway.limiter(deployment)
+        for attempt in range(self.gateway.max_retries + 1):
+            limiter.acquire(tokens)
+            handed_off = False
+            try:
+                response = self.transport.handle_request(request)
+                if response.status_code not in RETRY_STATUSES or attempt == self.gateway.max_retries:
+                    if streaming:
+                        response, handed_off = _streamed(response, _ReleasingStream(response.stream, limiter)), True
+                    else:
+                        response.read()
+                    self.gateway.record_response(caller, deployment, response, read_usage=not streaming)
+                    return response
+                response.read()
+                response.close()
+                status_code, delay = response.status_code, retry_delay(response.headers, attempt)
+            except (httpx.TimeoutException, httpx.NetworkError):
+                if attempt == self.gateway.max_retries:
+                    raise
+                status_code, delay = None, retry_delay(None, attempt)
+            finally:
+                if not handed_off:
+                    limiter.release()
+            self.gateway.record_retry(caller, deployment, status_code, delay)
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncGatewayTransport(httpx.AsyncBaseTransport):
+    """
+    Asynchronous counterpart of GatewayTransport. Connection pools are bound to an event loop, so one pooled
+    transport is kept per running loop (evaluation scripts call asyncio.run repeatedly).
+    """
+    def __init__(self, gateway: LLMGateway):
+        self.gateway = gateway
+        self._transports = weakref.WeakKeyDictionary()
+
+    def _transport(self) -> httpx.AsyncBaseTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.gateway.limits)
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        caller, deployment, tokens, streaming = _request_info(request)
+        limiter = self.gateway.limiter(deployment)
+        transport = self._transport()
+        for attempt in range(self.gateway.max_retries + 1):
+            await limiter.acquire_async(tokens)
+            handed_off = False
+            try:
+                response = await transport.handle_async_request(request)
+                if response.status_code not in RETRY_STATUSES or attempt == self.gateway.max_retries:
+                    if streaming:
+                        response, handed_off = _streamed(response, _AsyncReleasingStream(response.stream, limiter)), True
+                    else:
+                        await response.aread()
+                    self.gateway.record_response(caller, deployment, response, read_usage=not streaming)
+                    return response
+                await response.aread()
+                await response.aclose()
+                status_code, delay = response.status_code, retry_delay(response.headers, attempt)
+            except (httpx.TimeoutException, httpx.NetworkError):
+                if attempt == self.gateway.max_retries:
+                    raise
+                status_code, delay = None, retry_delay(None, attempt)
+            finally:
+                if not handed_off:
+                    limiter.release()
+            self.gateway.record_retry(caller, deployment, status_code, delay)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        for transport in list(self._transports.values()):
+            await transport.aclose()
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from llmservice.llmGateway import llm_gateway
+
+ROUTE_PREFIX = "/llm"
+
+router = APIRouter(prefix=ROUTE_PREFIX, tags=["llm-gateway"])
+
+
+@router.get("/usage")
+def get_usage():
+    """
+    Azure OpenAI usage since start-up through the LLM gateway.
+
+    Returns:
+        Dictionary with requests, errors, retries, throttled (429) responses and prompt/completion/total
+        tokens per caller and deployment, and the in-flight requests and limits of each deployment.
+    """
+    return {"usage": llm_gateway.usage(), "deployments": llm_gateway.deployment_stats()}
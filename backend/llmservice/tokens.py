@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count model tokens in a text with tiktoken, falling back to a 4 characters per token estimate.
+
+    Args:
+        text (str): Text to measure. Required.
+
+    Returns:
+        int: Number of tokens.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+class TokenBudget:
+    """
+    Thread-safe tokens-per-minute budget.
+    The bucket refills continuously; `acquire` blocks until enough tokens are available.
+
+    Args:
+        tokens_per_minute (int): Sustained token rate. Required.
+    """
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Take tokens if they are available.
+
+        Args:
+            tokens (int): Tokens needed. Required.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds to wait before trying again.
+        """
+        # A single request larger than the bucket can still go through once the bucket is full
+        tokens = min(float(tokens), self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.available >= tokens:
+                self.available -= tokens
+                return 0.0
+            return (tokens - self.available) / self.rate
+
+    def acquire(self, tokens: int) -> None:
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -1,9 +1,106 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import os
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Correlation ids attached to every record logged in the current request or ingestion task
+request_id_var = contextvars.ContextVar("request_id", default=None)
+video_id_var = contextvars.ContextVar("video_id", default=None)
+
+
+@contextmanager
+def log_context(request_id: str = None, video_id: str = None):
+    """
+    Attach a request ID and/or video ID to every record logged inside the block.
+
+    Args:
+        request_id (str): Request ID. Optional.
+        video_id (str): Video ID. Optional.
+    """
+    tokens = []
+    if request_id is not None:
+        tokens.append((request_id_var, request_id_var.set(str(request_id))))
+    if video_id is not None:
+        tokens.append((video_id_var, video_id_var.set(str(video_id))))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the correlation ids onto the record in the calling thread, before it is queued."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.video_id = video_id_var.get()
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Queue handler that formats the message and traceback in the calling thread but keeps the traceback
+    separate from the message, so the file handler can write it as its own JSON field.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and correlation ids."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record, TIMESTAMP_FORMAT) + f",{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "video_id", None):
+            entry["video_id"] = record.video_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def create_file_handler(path: str = "message.log") -> logging.Handler:
+    """
+    File handler rotating by size (LOG_ROTATION=size, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+    or by time (LOG_ROTATION=time, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT).
+    """
+    backup_count = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+    if os.environ.get("LOG_ROTATION", "size").lower() == "time":
+        return TimedRotatingFileHandler(path, when=os.environ.get("LOG_ROTATE_WHEN", "midnight"),
+                                        backupCount=backup_count, encoding="utf-8")
+    return RotatingFileHandler(path, maxBytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                               backupCount=backup_count, encoding="utf-8")
+
 
 class Logger:
     """
     Singleton Logger class.
-    Logs messages to both a file and console.
+    Logs messages to both a file and console without blocking the caller: records are put on an in-memory
+    queue and written by a background listener thread.
     """
     _instance = None
 
@@ -21,29 +118,59 @@ class Logger:
 
     def _initialize(self):
         """
-        Initialises the logger instance with file and stream handler.
-        Logs are written to 'message.log' file.
-        Logs are displayed in console
+        Initialises the logger instance with a queue handler and a background listener.
+        Logs are written to 'message.log' as JSON lines, rotated by size or time.
+        Logs are displayed in console.
+        The level is set by LOG_LEVEL (default: INFO).
         """
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+        self.logger.propagate = False
 
-        file_handler = logging.FileHandler("message.log")
-        file_handler.setFormatter(logging.Formatter('%(asctime)s: %(levelname)s: %(message)s'))
+        file_handler = create_file_handler("message.log")
+        file_handler.setFormatter(JsonFormatter())
 
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(logging.Formatter('%(asctime)s: %(levelname)s: %(message)s'))
 
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        log_queue = queue.SimpleQueue()
+        queue_handler = ContextQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        self.logger.addHandler(queue_handler)
+
+        self.listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
 
-    def info(self, message):
+    def debug(self, message, *args):
+        """
+        Logs a message at the DEBUG level. Arguments are only formatted when DEBUG is enabled.
+
+        Args:
+            message (str): Message to be logged, optionally with %-style placeholders.
+        """
+        self.logger.debug(message, *args)
+
+    def info(self, message, *args):
         """
         Logs a message at the INFO level.
 
         Args:
             message (str): Message to be logged.
         """
-        self.logger.info(message)
+        self.logger.info(message, *args)
+
+    def warning(self, message, *args):
+        self.logger.warning(message, *args)
+
+    def error(self, message, *args):
+        self.logger.error(message, *args)
+
+    def exception(self, message, *args):
+        """Logs a message at the ERROR level with the current exception traceback."""
+        self.logger.exception(message, *args)
 
 logger = Logger()
@@ -0,0 +1,175 @@
+import glob
+import json
+import os
+import re
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+# "2025-01-31 12:00:00,123: INFO: message", the plain text format of older log files.
+# Current files hold one JSON record per line (see loggingConfig.JsonFormatter).
+LINE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}): (\w+): ")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+BLOCK_SIZE = 64 * 1024
+
+
+def _parse_json(line: str) -> Optional[dict]:
+    if not line.startswith("{"):
+        return None
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) and "timestamp" in entry else None
+
+
+def parse_line(line: str) -> Tuple[Optional[datetime], Optional[str]]:
+    """
+    Parse the timestamp and level of a log line, either a JSON record or a plain text line.
+
+    Args:
+        line (str): Log line. Required.
+
+    Returns:
+        Tuple[datetime, str]: Timestamp and level, or (None, None) for continuation lines of multi-line messages.
+    """
+    entry = _parse_json(line)
+    if entry is not None:
+        try:
+            return datetime.strptime(entry["timestamp"], TIMESTAMP_FORMAT), entry.get("level")
+        except (TypeError, ValueError):
+            return None, None
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return None, None
+    return datetime.strptime(match.group(1), TIMESTAMP_FORMAT), match.group(2)
+
+
+def render_line(line: str) -> str:
+    """
+    Render a JSON record as "timestamp: LEVEL: message", the format the log viewer displays.
+    Plain text lines are returned unchanged.
+
+    Args:
+        line (str): Log line. Required.
+
+    Returns:
+        str: Display line.
+    """
+    entry = _parse_json(line)
+    if entry is None:
+        return line
+    rendered = f"{entry['timestamp']}: {entry.get('level', '')}: {entry.get('message', '')}"
+    if entry.get("exception"):
+        rendered += "\n" + entry["exception"]
+    return rendered
+
+
+class LogReader:
+    """
+    LogReader answers /logs queries without reading whole log files.
+
+    - Tail queries read blocks backwards from the end of the newest file until enough lines are found.
+    - `since` queries binary-search the byte offset of the first line at or after the timestamp, then
+      read backwards down to that offset only.
+    - Rotated files (message.log, message.log.1, ...) are read newest first.
+
+    Args:
+        path (str): Path of the active log file. Default: "message.log".
+        backup_count (int): Maximum number of rotated files to consider. Default: 20.
+    """
+    def __init__(self, path: str = "message.log", backup_count: int = 20):
+        self.path = path
+        self.backup_count = backup_count
+
+    def files(self) -> List[str]:
+        """Existing log files, newest first. Covers size (message.log.1) and time (message.log.2025-01-31) rotation."""
+        rotated = sorted(glob.glob(glob.escape(self.path) + ".*"), key=os.path.getmtime, reverse=True)
+        candidates = [self.path] + rotated[:self.backup_count]
+        return [path for path in candidates if os.path.exists(path)]
+
+    @staticmethod
+    def _reverse_lines(path: str, stop_offset: int = 0) -> Iterator[str]:
+        """Yield the lines of a file from the last one back to the line starting at `stop_offset`."""
+        with open(path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > stop_offset:
+                size = min(BLOCK_SIZE, position - stop_offset)
+                position -= size
+                f.seek(position)
+                block = f.read(size) + remainder
+                lines = block.split(b"\n")
+                # The first piece may be the end of a line that starts in the previous block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line.decode("utf-8", errors="replace").rstrip("\r")
+            if remainder.strip():
+                yield remainder.decode("utf-8", errors="replace").rstrip("\r")
+
+    @staticmethod
+    def _first_timestamp_after(f, offset: int) -> Tuple[Optional[datetime], int]:
+        """Timestamp and start offset of the first timestamped line starting at or after `offset`."""
+        f.seek(offset)
+        if offset > 0:
+            f.readline()  # skip the partial line
+        while True:
+            start = f.tell()
+            line = f.readline()
+            if not line:
+                return None, start
+            timestamp, _ = parse_line(line.decode("utf-8", errors="replace"))
+            if timestamp is not None:
+                return timestamp, start
+
+    def _offset_of(self, path: str, since: datetime) -> int:
+        """Byte offset of the first line of a file with a timestamp at or after `since` (binary search)."""
+        with open(path, "rb") as f:
+            lo, hi = 0, f.seek(0, os.SEEK_END)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                timestamp, start = self._first_timestamp_after(f, mid)
+                if timestamp is None or timestamp >= since:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return self._first_timestamp_after(f, lo)[1] if lo > 0 else 0
+
+    def read(self, lines: int = 100, since: Optional[datetime] = None, level: Optional[str] = None,
+             video_id: Optional[str] = None) -> Tuple[List[str], int]:
+        """
+        Read the most recent log lines matching the filters.
+
+        Args:
+            lines (int): Maximum number of lines to return. Default: 100.
+            since (datetime): Only lines logged at or after this local time. Optional.
+            level (str): Minimum level, e.g. "WARNING". Optional.
+            video_id (str): Only lines mentioning this video ID, in the message or the record's video_id. Optional.
+
+        Returns:
+            Tuple[List[str], int]: Matching lines oldest first, rendered as text, and the number of lines scanned.
+        """
+        min_level = LEVELS.get(level.upper(), 0) if level else 0
+        result, scanned = [], 0
+        for path in self.files():
+            stop_offset = 0
+            if since is not None:
+                stop_offset = self._offset_of(path, since)
+            for line in self._reverse_lines(path, stop_offset):
+                scanned += 1
+                if min_level:
+                    _, line_level = parse_line(line)
+                    if LEVELS.get(line_level, 0) < min_level:
+                        continue
+                if video_id and video_id not in line:
+                    continue
+                result.append(render_line(line))
+                if len(result) >= lines:
+                    return result[::-1], scanned
+            if since is not None and stop_offset > 0:
+                # The boundary is inside this file, older files are entirely before `since`
+                break
+        return result[::-1], scanned
@@ -1,27 +1,71 @@
 
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, BackgroundTasks, Query
+from fastapi import FastAPI, BackgroundTasks, Query, Depends, Request
 from starlette.middleware.cors import CORSMiddleware
 from typing import Optional
 import os
 from datetime import datetime
 
-from brokerservice.brokerService import BrokerService
+from dependencies import container, get_broker_service
+from loggingConfig import log_context, logger
+from logservice.logReader import LogReader
 from videoindexerclient.model import VideoList
 from videoindexerclient.router import router as video_indexer_router
+from chatservice.bm25 import keyword_engine
 from chatservice.router import router as chat_router
 from brokerservice.router import router as broker_router
 from userservice.router import router as user_router
+from progressservice.router import router as progress_router
+from llmservice.llmGateway import llm_gateway
+from llmservice.router import router as llm_router
+from userservice.auth import JWTAuthMiddleware
+from userservice.passwordHasher import password_hasher
 
 load_dotenv()
 relative_path = "backend/"
 
-app = FastAPI()
+
+def warm_up():
+    """
+    Pre-warm the MongoDB connection pool and build the services listed in WARM_SERVICES
+    (comma separated service names, or "all"). By default services are built on first use.
+    """
+    from databaseservice.databaseService import database_service
+
+    database_service.get_db().command("ping")
+    services = os.getenv("WARM_SERVICES", "").strip()
+    if services == "all":
+        container.warm_up()
+    elif services:
+        container.warm_up([name.strip() for name in services.split(",") if name.strip()])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        # The services are still built lazily on first use if warm up fails
+        logger.warning("Warm up failed: %s", e)
+    # Keyword search uses Mongo $text until the BM25 index is built
+    keyword_engine.start_background_build()
+    yield
+    password_hasher.shutdown()
+    await llm_gateway.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(video_indexer_router)
 app.include_router(chat_router)
 app.include_router(broker_router)
 app.include_router(user_router)
+app.include_router(progress_router)
+app.include_router(llm_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,28 +74,45 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all HTTP methods
     allow_headers=["*"],  # Allows all headers
 )
+app.add_middleware(JWTAuthMiddleware)
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Tag every log record of a request with its X-Request-ID (generated when the client sends none)."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    with log_context(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
-broker_service = BrokerService()
 
 @app.post("/upload", status_code=200)
-def upload_video(video_list: VideoList, background_tasks: BackgroundTasks):
+def upload_video(video_list: VideoList, background_tasks: BackgroundTasks, broker_service=Depends(get_broker_service)):
     background_tasks.add_task(broker_service.start_video_index_process, video_list)
     return {"message": "Video Index process started"}
 
 @app.get("/logs")
 def get_logs(
-    lines: Optional[int] = Query(default=100, description="Number of recent log lines to fetch"),
-    since: Optional[str] = Query(default=None, description="ISO timestamp to fetch logs since (optional)")
+    lines: Optional[int] = Query(default=100, ge=1, description="Number of recent log lines to fetch"),
+    since: Optional[str] = Query(default=None, description="ISO timestamp to fetch logs since (optional)"),
+    level: Optional[str] = Query(default=None, description="Minimum log level, e.g. WARNING (optional)"),
+    video_id: Optional[str] = Query(default=None, description="Only lines mentioning this video ID (optional)")
 ):
     """
-    Fetch recent log messages from message.log file.
+    Fetch recent log messages from message.log and its rotated files.
+
+    Lines are read backwards from the end of the log, and `since` is located by binary search,
+    so the cost depends on the number of lines returned rather than on the size of the log.
     
     Args:
         lines: Number of recent lines to fetch (default: 100)
         since: ISO timestamp string to fetch logs since (optional)
+        level: Minimum log level (optional)
+        video_id: Only lines mentioning this video ID (optional)
     
     Returns:
-        Dictionary with log entries and metadata
+        Dictionary with log entries and metadata. total_lines is the number of lines scanned to answer the query.
     """
     # Try multiple possible locations for the log file
     # The logger creates it in the current working directory
@@ -60,60 +121,31 @@ def get_logs(
         os.path.join(relative_path, "message.log"),  # backend/message.log
         os.path.join(os.path.dirname(__file__), "message.log"),  # Same directory as main.py
     ]
-    
-    log_file_path = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            log_file_path = path
-            break
-    
-    try:
-        if not log_file_path or not os.path.exists(log_file_path):
-            return {
-                "logs": [], 
-                "total_lines": 0, 
-                "error": f"Log file not found. Checked: {', '.join(possible_paths)}"
-            }
-        
-        # Try to read with UTF-8, fallback to latin-1 or error handling
+    log_file_path = next((path for path in possible_paths if os.path.exists(path)), None)
+    if not log_file_path:
+        return {
+            "logs": [],
+            "total_lines": 0,
+            "error": f"Log file not found. Checked: {', '.join(possible_paths)}"
+        }
+
+    since_dt = None
+    if since:
         try:
-            with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-                all_lines = f.readlines()
-        except UnicodeDecodeError:
-            # If UTF-8 fails, try with latin-1 encoding (handles most cases)
-            with open(log_file_path, 'r', encoding='latin-1', errors='replace') as f:
-                all_lines = f.readlines()
-        
-        total_lines = len(all_lines)
-        
-        # Filter by timestamp if provided
-        if since:
-            try:
-                since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
-                filtered_lines = []
-                for line in all_lines:
-                    # Extract timestamp from log line (format: YYYY-MM-DD HH:MM:SS,mmm)
-                    try:
-                        timestamp_str = line[:23]  # First 23 characters contain timestamp
-                        log_dt = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
-                        if log_dt >= since_dt:
-                            filtered_lines.append(line.strip())
-                    except:
-                        # If timestamp parsing fails, include the line anyway
-                        filtered_lines.append(line.strip())
-                log_entries = filtered_lines[-lines:] if len(filtered_lines) > lines else filtered_lines
-            except Exception as e:
-                return {"logs": [], "total_lines": total_lines, "error": f"Invalid timestamp format: {str(e)}"}
-        else:
-            # Get last N lines
-            log_entries = [line.strip() for line in all_lines[-lines:]]
-        
+            since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
+            # Log timestamps are naive local time
+            if since_dt.tzinfo is not None:
+                since_dt = since_dt.astimezone().replace(tzinfo=None)
+        except ValueError as e:
+            return {"logs": [], "total_lines": 0, "error": f"Invalid timestamp format: {str(e)}"}
+
+    try:
+        log_entries, scanned = LogReader(log_file_path).read(lines, since=since_dt, level=level, video_id=video_id)
         return {
             "logs": log_entries,
-            "total_lines": total_lines,
+            "total_lines": scanned,
             "returned_lines": len(log_entries)
         }
-    
     except Exception as e:
         return {"logs": [], "total_lines": 0, "error": str(e)}
 
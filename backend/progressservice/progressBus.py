@@ -0,0 +1,142 @@
+import asyncio
+import collections
+import threading
+import time
+from typing import Deque, List, Optional, Tuple
+
+from loggingConfig import logger
+
+
+class ProgressBus:
+    """
+    In-process publish/subscribe bus for ingestion progress events.
+
+    Publishers are the ingestion worker threads; subscribers are event-stream connections running on the
+    event loop. `publish` is thread-safe and hands every event to each subscriber's asyncio.Queue through
+    `call_soon_threadsafe`. The last events of each video are kept so a new subscriber sees the current stage;
+    only the most recently updated videos are kept, the others are evicted in least-recently-updated order.
+
+    Only `publish`, `subscribe`, `unsubscribe` and `recent` are used by callers, so the bus can be replaced by
+    one backed by a shared message broker when ingestion runs in several processes.
+
+    Args:
+        history_size (int): Events kept per video for late subscribers. Default: 50.
+        queue_size (int): Maximum pending events per subscriber; the oldest are dropped for slow clients. Default: 1000.
+        max_videos (int): Videos whose history is kept. Default: 500.
+    """
+    def __init__(self, history_size: int = 50, queue_size: int = 1000, max_videos: int = 500):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.max_videos = max_videos
+        self._history: "collections.OrderedDict[str, Deque[dict]]" = collections.OrderedDict()
+        self._subscribers: List[tuple] = []  # (loop, queue, video_id filter)
+        self._lock = threading.Lock()
+
+    def publish(self, video_id: str, stage: str, **details) -> dict:
+        """
+        Publish a stage transition of a video.
+
+        Args:
+            video_id (str): Identifier of the video (ObjectId of the video document as a string). Required.
+            stage (str): Stage name, e.g. "INDEXING" or "COMPLETED". Required.
+            **details: Extra event fields, e.g. progress or chunk counts.
+
+        Returns:
+            dict: Published event.
+        """
+        with self._lock:
+            # Stamped under the lock, so timestamps follow the order in which events enter the history
+            event = {"video_id": video_id, "stage": stage, "timestamp": time.time(), **details}
+            history = self._history.get(video_id)
+            if history is None:
+                history = self._history[video_id] = collections.deque(maxlen=self.history_size)
+                while len(self._history) > self.max_videos:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(video_id)
+            history.append(event)
+            subscribers = list(self._subscribers)
+
+        for loop, queue, video_filter in subscribers:
+            if video_filter is None or video_filter == video_id:
+                try:
+                    loop.call_soon_threadsafe(self._offer, queue, event)
+                except RuntimeError:
+                    # The subscriber's event loop is closed
+                    self.unsubscribe(queue)
+        return event
+
+    def _offer(self, queue: asyncio.Queue, event: dict) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def subscribe(self, video_id: Optional[str] = None) -> Tuple[asyncio.Queue, List[dict]]:
+        """
+        Subscribe to events. Must be called from the event loop that will read the queue.
+
+        The recent events are taken under the same lock that registers the queue, so every event is either in the
+        returned replay or delivered to the queue. An event published while the subscription is being registered can
+        be in both; callers skip queued events that are not newer than the last replayed one.
+
+        Args:
+            video_id (str): Only receive events of this video. Default: all videos.
+
+        Returns:
+            Tuple[asyncio.Queue, List[dict]]: Queue receiving the events and the recent events (see `recent`).
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            replay = self._recent(video_id)
+            self._subscribers.append((loop, queue, video_id))
+        return queue, replay
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    def recent(self, video_id: Optional[str] = None) -> List[dict]:
+        """
+        Latest known events, oldest first.
+
+        Args:
+            video_id (str): Only events of this video. Default: the last event of every video.
+
+        Returns:
+            List[dict]: Events.
+        """
+        with self._lock:
+            return self._recent(video_id)
+
+    def _recent(self, video_id: Optional[str]) -> List[dict]:
+        if video_id is not None:
+            return list(self._history.get(video_id, []))
+        return sorted((h[-1] for h in self._history.values() if h), key=lambda e: e["timestamp"])
+
+
+progress_bus = ProgressBus()
+
+
+class VideoProgress:
+    """
+    Publishes the stages of one video to the progress bus and mirrors them to the log.
+
+    Args:
+        video_id (str): Identifier of the video. Required.
+        video_name (str): Display name of the video. Default: None.
+        bus (ProgressBus): Bus to publish to. Default: shared progress_bus.
+    """
+    def __init__(self, video_id: str, video_name: str = None, bus: ProgressBus = progress_bus):
+        self.video_id = str(video_id)
+        self.video_name = video_name
+        self.bus = bus
+
+    def __call__(self, stage: str, **details) -> None:
+        if self.video_name:
+            details.setdefault("video_name", self.video_name)
+        try:
+            self.bus.publish(self.video_id, stage, **details)
+        except Exception as e:
+            # Progress reporting must never break ingestion
+            logger.warning("Progress publish failed for %s: %s", self.video_id, e)
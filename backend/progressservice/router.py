@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+from starlette.responses import StreamingResponse
+
+from progressservice.progressBus import progress_bus
+
+router = APIRouter(tags=["progress-service"])
+
+KEEP_ALIVE_SEC = 15
+
+
+def format_event(event: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/ingestion/events")
+async def ingestion_events(
+    request: Request,
+    video_id: Optional[str] = Query(default=None, description="Only stream events of this video (video document ID)")
+):
+    """
+    Streams ingestion progress as server-sent events.
+
+    Each event has the video ID, the stage (REGISTERED, UPLOADING, INDEXING, PROMPT_CONTENT, SLIDE_TEXT,
+    TRANSCRIPT, CLEANING, SECTION_INDEXING, REINDEXING, COMPLETED or ERROR), a timestamp and stage details
+    such as the indexing or cleaning progress in percent and the cleaned chunk number. The latest known events are sent
+    first, marked as replayed, so a client connecting mid-ingestion sees the current stage immediately.
+
+    Args:
+        video_id: Only stream events of this video (optional)
+
+    Returns:
+        StreamingResponse: text/event-stream of progress events
+    """
+    async def stream():
+        # Subscribe inside the body, so a client that disconnects before it starts leaves no queue behind
+        queue, replay = progress_bus.subscribe(video_id)
+        try:
+            last_replayed = replay[-1]["timestamp"] if replay else 0.0
+            for event in replay:
+                yield format_event({**event, "replayed": True})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEP_ALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["timestamp"] <= last_replayed:
+                    # Already sent in the replay
+                    continue
+                yield format_event(event)
+        finally:
+            progress_bus.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/ingestion/progress")
+def ingestion_progress(video_id: Optional[str] = Query(default=None, description="Video document ID (optional)")):
+    """
+    Returns the latest known ingestion events without streaming.
+
+    Args:
+        video_id: Return the recent events of this video instead of the last event of every video (optional)
+
+    Returns:
+        dict: List of progress events
+    """
+    return {"events": progress_bus.recent(video_id)}
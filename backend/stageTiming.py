@@ -0,0 +1,121 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Stages of the chat pipeline, in the order they usually run
+STAGES = ("routing", "temporal", "embedding", "vector_search", "text_search", "fusion", "generation")
+
+# Collector of the current chat request or evaluated question; None outside of `collect_stages`
+_timings_var = contextvars.ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """
+    Time spent per pipeline stage and LLM tokens used while handling one request.
+
+    Stages that run in parallel threads (e.g. the query variants of PreQRAG) are summed, so a stage
+    total is the work done in that stage rather than its share of the wall-clock time.
+    """
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.tokens_in += prompt_tokens
+            self.tokens_out += completion_tokens
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: {"stages": {stage: seconds}, "calls": {stage: count}, "tokens_in": int, "tokens_out": int}
+        """
+        with self._lock:
+            return {"stages": dict(self.durations), "calls": dict(self.calls),
+                    "tokens_in": self.tokens_in, "tokens_out": self.tokens_out}
+
+    def server_timing(self) -> str:
+        """Stage durations as a Server-Timing header value, in milliseconds."""
+        with self._lock:
+            return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.durations.items())
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect the stage timings of everything run inside the block, including worker threads started with
+    `asyncio.to_thread` or `run_in_context`.
+
+    Yields:
+        StageTimings: The collector.
+    """
+    timings = StageTimings()
+    token = _timings_var.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings_var.reset(token)
+
+
+def current_timings() -> Optional[StageTimings]:
+    return _timings_var.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time the block as stage `name`. Does nothing when no collector is active."""
+    timings = _timings_var.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function or coroutine function as stage `name`."""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    timings = _timings_var.get()
+    if timings is not None:
+        timings.add_tokens(prompt_tokens, completion_tokens)
+
+
+def run_in_context(function):
+    """
+    Bind `function` to a copy of the current context, for thread pools that do not propagate it
+    (unlike `asyncio.to_thread`), so stage timings and log correlation ids follow the work.
+    A context can only be entered by one thread at a time: bind once per submitted task.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, function)
@@ -6,38 +6,23 @@ import numpy as np
 from bson import ObjectId
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.documents import Document
-from langchain_openai import AzureChatOpenAI
 
 from langchain_core.prompts import PromptTemplate
 from langchain_text_splitters import CharacterTextSplitter
-from openai import AsyncAzureOpenAI
 
 from brokerservice.model import CourseDetails
+from llmservice.llmGateway import llm_gateway
 from loggingConfig import logger
+from transcriptservice.chunker import iter_transcript_chunks
 from transcriptservice.repository import TranscriptRepositoryService
 from utils import convert_seconds_to_mm_ss, process_file, get_prompt_template, get_clean_prompt_template, \
     timestamp_to_seconds, seconds_to_timestamp
 
-#this is where the chunking is done. No overlapping
-def break_transcript_to_chunks(transcript, max_length=10000):
-    chunks = []
-    items = re.findall(r'\[\d{1,2}:\d{2}:\d{2}.\d{1,2}] [^\[]+', transcript)
-    current_size = 0
-    current_items = []
-    for item in items:
-        current_size += len(item)
-        current_items.append(item)
-        if current_size > max_length:
-            chunks.append(''.join(current_items))
-            current_size = 0
-            current_items = []
-    if current_items:
-        chunks.append(''.join(current_items))
-    return chunks
 
 class TranscriptService:
     """
-    OpenAIService is a wrapper class of AsyncAzureOpenAI used for generating responses from Azure OpenAI LLM.
+    OpenAIService is a wrapper class of AzureChatOpenAI used for generating responses from Azure OpenAI LLM.
+    The model is created by the LLM gateway, which shares connections and rate limits with the other services.
     It provides the ability to add system message, grounding text, and a generic prompt template.
 
     Args:
@@ -56,47 +41,26 @@ class TranscriptService:
             deployment_name: str = os.environ.get("YOUR_DEPLOYMENT_NAME"),
             api_version : str = os.environ.get("OPENAI_API_VERSION"),
             temperature: float=0,
-            transcript_db: TranscriptRepositoryService = TranscriptRepositoryService(),
+            transcript_db: TranscriptRepositoryService = None,
     ):
         self.azure_endpoint = azure_endpoint
         self.api_key = api_key
         self.api_version = api_version
-        self.transcript_db = transcript_db
-        self.client = self.initiate_client()
+        self.transcript_db = transcript_db or TranscriptRepositoryService()
         try:
             self.prompt_template = get_clean_prompt_template()
         except Exception as e:
-            print(e)
+            logger.error("%s", e)
             self.prompt_template = ""
-        self.chat_model = AzureChatOpenAI(
+        self.chat_model = llm_gateway.chat_model(
+            "transcript",
+            deployment_name,
+            temperature=temperature,
             azure_endpoint=self.azure_endpoint,
             api_key=self.api_key,
             api_version=self.api_version,
-            azure_deployment=deployment_name,
-            temperature=temperature
         )
 
-    def initiate_client(self):
-        """
-        Initialises a AsyncAzureOpenAI instance to interact with Azure OpenAI services.
-        Uses provided Azure endpoint, API key, and API version.
-        If an error occurs during initialization, the Azure endpoint and the exception are printed for debugging.
-
-        Returns:
-            AsyncAzureOpenAI: An initialised instance of the AsyncAzureOpenAI class.
-
-        Raises:
-            Exception: For any errors that occur during initialization.
-        """
-        try:
-            return AsyncAzureOpenAI(
-                azure_endpoint=self.azure_endpoint,
-                api_key=self.api_key,
-                api_version=self.api_version,
-            )
-        except Exception as ex:
-            print(ex)
-
     def generate_clean_transcript(self, transcript: str, course_description: str, video_description: str):
         try:
             prompt = PromptTemplate(
@@ -112,19 +76,36 @@ class TranscriptService:
                 "context": [Document(page_content=transcript)]
             })
         except Exception as ex:
-            print(ex)
+            logger.error("%s", ex)
             return ex
 
-    def trigger_transcript_cleaning(self, video_id: ObjectId, course: dict, video_description: str):
+    def trigger_transcript_cleaning(self, video_id: ObjectId, course: dict, video_description: str, on_progress=None):
+        """
+        Clean the timestamped transcript of a video chunk by chunk with the LLM and save the result.
+
+        Args:
+            video_id (ObjectId): ObjectId of the video document. Required.
+            course (dict): Course document. Required.
+            video_description (str): Description of the video. Required.
+            on_progress (Callable): Called with "CLEANING", the chunk number and the percentage of the transcript
+                cleaned so far after every chunk. Optional.
+
+        Returns:
+            str: Cleaned transcript.
+        """
         transcript_object = self.transcript_db.find_transcript_given_video_reference_id(video_id)
         transcript = transcript_object["transcript_timestamp"]
-        transcript_chunks = break_transcript_to_chunks(transcript)
         course_outline = " ".join([course["course_code"], course["course_name"], course["course_description"]])
         responses_clean = []
-        for transcript_chunk in transcript_chunks:
+        # Chunks are produced lazily; progress is the share of the transcript consumed, so no chunk count is needed
+        consumed = 0
+        for i, transcript_chunk in enumerate(iter_transcript_chunks(transcript), start=1):
             response_clean = self.generate_clean_transcript(
                 transcript_chunk, course_outline, video_description)
             responses_clean.append(response_clean.replace("\n", "").replace("\r", ""))
+            consumed += len(transcript_chunk)
+            if on_progress:
+                on_progress("CLEANING", chunk=i, progress=min(100, round(100 * consumed / max(1, len(transcript)))))
         responses_clean = "".join(responses_clean)
         self.transcript_db.update_transcript(video_id, responses_clean)
         return responses_clean
@@ -156,13 +137,24 @@ class TranscriptService:
         return
 
     def update_prompt_with_clean_transcript(self, video_object_id, video_id):
+        """
+        Merge the cleaned transcript into the prompt content sections and re-index them incrementally.
+        Safe to call again after the cleaned transcript is edited: only changed sections are re-embedded.
+
+        Args:
+            video_object_id (ObjectId): ObjectId of the video document. Required.
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Number of sections inserted, updated, deleted and left unchanged.
+        """
         document = self.transcript_db.find_transcript_by_video_reference_id(video_object_id)
         logger.info("Transcript found for: " + str(video_object_id))
         document_prompt = self.transcript_db.prompt_context_raw_collection.find_one({"video_id": video_id})
 
         self.transform_transcript_timestamp(document, document_prompt)
 
-        self.transcript_db.insert_prompt_context_index(document_prompt, video_id)
+        return self.transcript_db.insert_prompt_context_index(document_prompt, video_id)
 
     def transform_transcript_timestamp(self, document, document_prompt):
         transcript = document['cleaned_transcript']
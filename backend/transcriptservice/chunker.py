@@ -0,0 +1,42 @@
+import os
+import re
+from typing import Iterator
+
+from dotenv import load_dotenv
+
+from llmservice.tokens import count_tokens
+
+load_dotenv()
+
+# One timestamped phrase of a transcript, e.g. "[0:01:02.35] some text ". Fractional seconds are optional.
+PHRASE_PATTERN = re.compile(r"\[\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\] [^\[]*")
+
+
+def iter_transcript_chunks(
+        transcript: str,
+        max_tokens: int = int(os.environ.get("TRANSCRIPT_CHUNK_TOKENS", 4000))
+) -> Iterator[str]:
+    """
+    Split a timestamped transcript into chunks for the cleaning model.
+    Phrases are streamed from the transcript and packed up to `max_tokens` model tokens; a phrase is never split,
+    so a single phrase longer than the target becomes a chunk of its own. Chunks do not overlap: the cleaned
+    chunks are concatenated, so repeated phrases would be repeated in the cleaned transcript.
+
+    Args:
+        transcript (str): Transcript with "[h:mm:ss.ff] text" phrases. Required.
+        max_tokens (int): Target tokens per chunk. Default: TRANSCRIPT_CHUNK_TOKENS or 4000.
+
+    Returns:
+        Iterator[str]: Transcript chunks, in order.
+    """
+    current, current_tokens = [], 0
+    for match in PHRASE_PATTERN.finditer(transcript):
+        phrase = match.group(0)
+        tokens = count_tokens(phrase)
+        if current and current_tokens + tokens > max_tokens:
+            yield "".join(current)
+            current, current_tokens = [], 0
+        current.append(phrase)
+        current_tokens += tokens
+    if current:
+        yield "".join(current)
@@ -3,14 +3,14 @@ import os
 import pymongo
 from bson import ObjectId
 from dotenv import load_dotenv
-from langchain_community.vectorstores.azure_cosmos_db import CosmosDBVectorSearchType, CosmosDBSimilarityType
 from langchain_core.documents import Document
 
 from EmbeddingService import EmbeddingService
-from langchain_community.vectorstores import AzureCosmosDBVectorSearch
-from langchain_openai import AzureOpenAIEmbeddings
+from chatservice.bm25 import keyword_engine
 
 from databaseservice.databaseService import DatabaseService, database_service
+from ingestionservice.incrementalIndexer import incremental_indexer
+from loggingConfig import logger
 
 load_dotenv()
 
@@ -40,36 +40,12 @@ class TranscriptRepositoryService:
         self.prompt_context_raw_collection = db[prompt_collection_name]
         self.prompt_collection_clean_collection = db[prompt_collection_clean_name]
 
-        self.azure_openai_embeddings: AzureOpenAIEmbeddings = AzureOpenAIEmbeddings(
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
-            openai_api_version=os.environ.get("OPENAI_API_VERSION"),
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            model=os.environ.get("EMBEDDING_MODEL")
-        )
-
-        self.vector_store: AzureCosmosDBVectorSearch = AzureCosmosDBVectorSearch.from_connection_string(
-            connection_string=database_service.get_mongo_connection_string(),
-            namespace=f"{database_service.get_database_name()}.{prompt_collection_clean_name}",
-            embedding=self.azure_openai_embeddings,
-        )
-
-        num_lists = 100
-        dimensions = 1536
-        similarity_algorithm = CosmosDBSimilarityType.COS
-        kind = CosmosDBVectorSearchType.VECTOR_IVF
-        m = 16
-        ef_construction = 64
-
-        self.vector_store.create_index(
-            num_lists, dimensions, similarity_algorithm, kind, m, ef_construction
-        )
-
     def save_transcript(self, document):
         try:
             self.transcript_collection.insert_one(document)
-            print("Transcript Collection Successfully inserted")
+            logger.debug("Transcript Collection Successfully inserted")
         except Exception as e:
-            print("Transcript Collection Failed: ", e)
+            logger.error("Transcript Collection Failed: %s", e)
 
     def find_transcript_given_video_reference_id(self, video_reference_id: ObjectId):
         return self.transcript_collection.find_one({"video_reference_id": video_reference_id})
@@ -81,30 +57,36 @@ class TranscriptRepositoryService:
         }
         result = self.transcript_collection.update_one(filter_query, update_data)
         if result.matched_count > 0:
-            print("Document updated successfully for Video ID: " + str(video_reference_id))
+            logger.debug("Document updated successfully for Video ID: " + str(video_reference_id))
         else:
-            print("No matching document found for Video ID: " + str(video_reference_id))
+            logger.debug("No matching document found for Video ID: " + str(video_reference_id))
 
     def insert_prompt_context_index(self, prompt_content_raw, video_id):
-        # print(prompt_content_raw)
-        formatted_documents = [Document(
-            page_content=doc["content"],
-            metadata={
+        """
+        Index the cleaned prompt content sections of a video. Only sections that changed since the
+        last run are re-embedded; stale and duplicated sections are removed.
+
+        Args:
+            prompt_content_raw (dict): Prompt content document with cleaned sections. Required.
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Number of sections inserted, updated, deleted and left unchanged.
+        """
+        sections = prompt_content_raw["result"]["sections"]
+        summary = incremental_indexer.sync_video_sections(
+            self.prompt_collection_clean_collection,
+            video_id,
+            [doc["content"] for doc in sections],
+            [{
                 "video_id": video_id,
                 "start": doc["start"],
                 "end": doc["end"]
-            }
-        ) for doc in prompt_content_raw["result"]["sections"]]
-
-        # print(formatted_documents)
-
-        AzureCosmosDBVectorSearch.from_documents(
-            formatted_documents,
-            self.azure_openai_embeddings,
-            collection=self.prompt_collection_clean_collection,
-            index_name="test",
+            } for doc in sections]
         )
-        print("Successfully inserted raw transcript to database")
+        logger.debug("Successfully inserted raw transcript to database")
+        keyword_engine.refresh_video(video_id)
+        return summary
 
     def find_transcript_by_video_reference_id(self, video_object_id: ObjectId):
         return self.transcript_collection.find_one({"video_reference_id": video_object_id})
@@ -0,0 +1,138 @@
+import collections
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import jwt
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+load_dotenv()
+
+# Secret key and JWT setup
+SECRET_KEY = os.getenv("SECRET_KEY", "mysecretkey")
+ALGORITHM = "HS256"
+JWT_EXPIRATION_TIME = 86400  # 1day
+
+
+def create_jwt_token(username: str, role: str):
+    expiration = datetime.now(timezone.utc) + timedelta(seconds=JWT_EXPIRATION_TIME)
+    payload = {
+        "sub": username,
+        "role": role,
+        "exp": expiration
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+class TokenCache:
+    """
+    LRU cache of decoded JWTs.
+    A browser sends the same token with every request, so the signature is checked once and later requests
+    only compare the cached expiry with the clock. Entries are dropped once the token expires.
+
+    Args:
+        max_entries (int): Maximum number of cached tokens. Default: TOKEN_CACHE_SIZE or 4096.
+    """
+    def __init__(self, max_entries: int = int(os.environ.get("TOKEN_CACHE_SIZE", 4096))):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify a token and return its payload.
+
+        Args:
+            token (str): Encoded JWT. Required.
+
+        Returns:
+            dict: Token payload.
+
+        Raises:
+            HTTPException: 401 if the token is expired or invalid.
+        """
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None:
+                if payload.get("exp", float("inf")) > time.time():
+                    self._entries.move_to_end(token)
+                    return payload
+                del self._entries[token]
+                raise HTTPException(status_code=401, detail="Token has expired")
+
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token has expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        with self._lock:
+            self._entries[token] = payload
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def verify_jwt_token(token: str):
+    return token_cache.decode(token)
+
+
+class JWTAuthMiddleware:
+    """
+    ASGI middleware that verifies the bearer token of every HTTP request.
+    The payload is stored in `request.state.user` (None for anonymous requests) and the reason a token was
+    rejected in `request.state.auth_error`. Requests are never rejected here; routes that need a user
+    depend on `get_current_user`.
+
+    Args:
+        app: Wrapped ASGI application. Required.
+        cache (TokenCache): Cache of decoded tokens. Default: shared token_cache.
+    """
+    def __init__(self, app, cache: TokenCache = token_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            state["user"], state["auth_error"] = None, None
+            token = self._bearer_token(scope)
+            if token:
+                try:
+                    state["user"] = self.cache.decode(token)
+                except HTTPException as e:
+                    state["auth_error"] = e.detail
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _bearer_token(scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                return token.strip() if scheme.lower() == "bearer" else None
+        return None
+
+
+def get_current_user(request: Request) -> dict:
+    """
+    FastAPI dependency returning the payload verified by JWTAuthMiddleware.
+
+    Raises:
+        HTTPException: 401 if the request has no valid token.
+    """
+    user = getattr(request.state, "user", None)
+    if user is None:
+        detail = getattr(request.state, "auth_error", None) or "Not authenticated"
+        raise HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+    return user
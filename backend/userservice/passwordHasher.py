@@ -0,0 +1,50 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool so password checks never block the event loop or the
+    shared request thread pool. bcrypt releases the GIL while hashing, so the threads use all cores
+    without the pickling and start-up cost of a process pool.
+
+    Args:
+        workers (int): Number of hashing threads. Default: BCRYPT_WORKERS or the number of CPU cores.
+    """
+    def __init__(self, workers: int = int(os.environ.get("BCRYPT_WORKERS", 0)) or os.cpu_count() or 1):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    @staticmethod
+    def verify(plain_password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    @staticmethod
+    def hash(plain_password: str, rounds: int = 12) -> str:
+        return bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Check a password on the hashing pool.
+
+        Args:
+            plain_password (str): Password sent by the user. Required.
+            hashed_password (str): Stored bcrypt hash. Required.
+
+        Returns:
+            bool: Whether the password matches.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.verify, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher()
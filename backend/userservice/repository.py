@@ -1,12 +1,13 @@
+import collections
 import os
+import threading
+import time
 
 import pymongo
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 
 from EmbeddingService import EmbeddingService
-from langchain_community.vectorstores import AzureCosmosDBVectorSearch
-from langchain_openai import AzureOpenAIEmbeddings
 
 from databaseservice.databaseService import DatabaseService, database_service
 
@@ -32,6 +33,45 @@ class UserRepositoryService:
     ):
         db = database_service.get_db()
         self.user_collection_name = db[user_collection_name]
+        # username -> (expiry, user document); short lived so role and password changes apply quickly.
+        # Every entry lives for the same TTL, so insertion order is expiry order and expired entries are at the front.
+        self.user_cache_ttl = float(os.environ.get("USER_CACHE_TTL", 60))
+        self.user_cache_size = int(os.environ.get("USER_CACHE_SIZE", 4096))
+        self._user_cache = collections.OrderedDict()
+        self._user_cache_lock = threading.Lock()
 
     def get_user(self, username: str):
-        return self.user_collection_name.find_one({"username": username})
\ No newline at end of file
+        """
+        Find a user by username. Up to USER_CACHE_SIZE found users are cached for USER_CACHE_TTL seconds;
+        unknown usernames are not.
+
+        Args:
+            username (str): Username. Required.
+
+        Returns:
+            dict: User document, or None.
+        """
+        now = time.monotonic()
+        with self._user_cache_lock:
+            entry = self._user_cache.get(username)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        user = self.user_collection_name.find_one({"username": username})
+        if user is not None and self.user_cache_ttl > 0:
+            with self._user_cache_lock:
+                self._user_cache[username] = (now + self.user_cache_ttl, user)
+                self._user_cache.move_to_end(username)
+                while self._user_cache:
+                    expiry = next(iter(self._user_cache.values()))[0]
+                    if expiry > now and len(self._user_cache) <= self.user_cache_size:
+                        break
+                    self._user_cache.popitem(last=False)
+        return user
+
+    def invalidate_user(self, username: str = None) -> None:
+        with self._user_cache_lock:
+            if username is None:
+                self._user_cache.clear()
+            else:
+                self._user_cache.pop(username, None)
\ No newline at end of file
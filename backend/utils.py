@@ -353,23 +353,6 @@ def get_prompt_preQrag():
     """
     
 
-def break_transcript_to_chunks(transcript, max_length=10000):
-    chunks = []
-    items = re.findall(r'\[\d{2}:\d{2}:\d{2}] [^\[]+', transcript)
-    current_size = 0
-    current_items = []
-    for item in items:
-        current_size += len(item)
-        current_items.append(item)
-        if current_size > max_length:
-            chunks.append(''.join(current_items))
-            current_size = 0
-            current_items = []
-    if current_items:
-        chunks.append(''.join(current_items))
-    return chunks
-
-
 # Function to convert timestamp string to seconds
 def timestamp_to_seconds(timestamp):
     parts = timestamp.split(":")
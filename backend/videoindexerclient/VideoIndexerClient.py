@@ -2,14 +2,11 @@ import base64
 import os
 import time
 from io import BytesIO
-from threading import Thread
 import requests
-from typing import Optional
-
-import schedule
+from typing import Callable, Optional
 
 from .Consts import Consts
-from .utils import get_arm_access_token, get_account_access_token_async
+from .tokenManager import token_manager
 from loggingConfig import logger
 
 
@@ -17,45 +14,39 @@ def get_file_name_no_extension(file_path):
     return os.path.splitext(os.path.basename(file_path))[0]
 
 
+def parse_processing_progress(video_result: dict) -> Optional[int]:
+    """Processing progress in percent of a Get Video Index response, e.g. "45%" -> 45."""
+    try:
+        return int(str(video_result["videos"][0]["processingProgress"]).rstrip("%"))
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
 class VideoIndexerClient:
     def __init__(self) -> None:
-        self.arm_access_token = ''
-        self.vi_access_token = ''
         self.account = None
         self.consts = None
-        self.token_expiration_time = None
 
-    def authenticate_async(self, consts:Consts) -> None:
-        self.consts = consts
-        # Get access tokens
-        self.arm_access_token = get_arm_access_token(self.consts)
-        self.vi_access_token = get_account_access_token_async(self.consts, self.arm_access_token)
-        # Set token expiration time (tokens typically expire in 1 hour, refresh every 50 minutes)
-        self.token_expiration_time = time.time() + (50 * 60)  # 50 minutes from now
+    @property
+    def arm_access_token(self) -> str:
+        return token_manager.get_arm_access_token(self.consts)
 
-    def schedule_authentication(self):
+    @property
+    def vi_access_token(self) -> str:
+        return token_manager.get_account_access_token(self.consts)
+
+    def authenticate_async(self, consts:Consts) -> None:
         """
-        Schedules authenticate_async to run every 50 minutes.
+        Sets the account constants. Tokens are fetched lazily by the shared token manager
+        and refreshed shortly before they expire.
         """
-        schedule.every(30).minutes.do(self.authenticate_async, self.consts)
-        while True:
-            schedule.run_pending()
-            time.sleep(30)
-
-    def start_authentication_scheduler(self) -> None:
-        scheduler_thread = Thread(target=self.schedule_authentication)
-        scheduler_thread.start()
+        self.consts = consts
 
     def refresh_token_if_needed(self) -> None:
         """
         Refreshes the access token if it's close to expiration (within 10 minutes).
         """
-        if self.token_expiration_time is None or time.time() >= (self.token_expiration_time - 600):  # 10 minutes before expiration
-            logger.info("Refreshing access token before expiration...")
-            self.arm_access_token = get_arm_access_token(self.consts)
-            self.vi_access_token = get_account_access_token_async(self.consts, self.arm_access_token)
-            self.token_expiration_time = time.time() + (50 * 60)  # Reset to 50 minutes from now
-            logger.info("Access token refreshed successfully.")
+        token_manager.get_account_access_token(self.consts)
 
     def get_account_async(self) -> None:
         """
@@ -78,7 +69,7 @@ class VideoIndexerClient:
         response.raise_for_status()
 
         self.account = response.json()
-        print(f'[Account Details] Id:{self.account["properties"]["accountId"]}, Location: {self.account["location"]}')
+        logger.info("[Account Details] Id:%s, Location: %s", self.account["properties"]["accountId"], self.account["location"])
 
     def file_upload_async(self, media: BytesIO, video_name:Optional[str]=None, excluded_ai:Optional[list[str]]=None,
                           video_description:str='', privacy='private', partition='') -> str:
@@ -129,7 +120,8 @@ class VideoIndexerClient:
 
         return video_id
 
-    def wait_for_index_async(self, video_id:str, language:str='English', timeout_sec:Optional[int]=None) -> None:
+    def wait_for_index_async(self, video_id:str, language:str='English', timeout_sec:Optional[int]=None,
+                             on_progress:Optional[Callable[[str, Optional[int]], None]]=None) -> None:
         '''
         Calls getVideoIndex API in 10 second intervals until the indexing state is 'processed'
         (https://api-portal.videoindexer.ai/api-details#api=Operations&operation=Get-Video-Index).
@@ -139,6 +131,7 @@ class VideoIndexerClient:
         :param video_id: The video ID to wait for
         :param language: The language to translate video insights
         :param timeout_sec: The timeout in seconds
+        :param on_progress: Called after every check with the index state and the processing progress in percent
         '''
         self.get_account_async() # if account is not initialized, get it
 
@@ -163,17 +156,20 @@ class VideoIndexerClient:
 
             video_result = response.json()
             video_state = video_result.get('state')
+            if on_progress is not None:
+                on_progress(video_state, parse_processing_progress(video_result))
 
             if video_state == 'Processed':
                 processing = False
-                logger.info(f'The video index has completed. Here is the full JSON of the index for video ID {video_id}: \n{video_result}')
+                logger.info("The video index has completed for video ID %s.", video_id)
+                logger.debug('Full JSON of the index for video ID %s: %s', video_id, video_result)
                 break
             elif video_state == 'Failed':
                 processing = False
                 logger.info(f"The video index failed for video ID {video_id}.")
                 break
 
-            logger.info(f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] The video index state is {video_state}')
+            logger.info("The video index state is %s", video_state)
 
             if timeout_sec is not None and time.time() - start_time > timeout_sec:
                 logger.info(f'Timeout of {timeout_sec} seconds reached. Exiting...')
@@ -222,7 +218,7 @@ class VideoIndexerClient:
 
             return search_result
         except Exception as e:
-            logger.info("get_video_async", e)
+            logger.info("get_video_async failed: " + str(e))
 
     def generate_prompt_content_async(self, video_id:str) -> None:
         """
@@ -249,7 +245,7 @@ class VideoIndexerClient:
         response = requests.post(url, headers=headers, params=params)
 
         response.raise_for_status()
-        print(f"Prompt content generation for {video_id=} started...")
+        logger.info("Prompt content generation for video_id=%s started...", video_id)
 
     def get_prompt_content_async(self, video_id:str, raise_on_not_found:bool=True) -> Optional[dict]:
         """
@@ -330,12 +326,11 @@ class VideoIndexerClient:
         '''
         self.get_account_async() # if account is not initialized, get it
 
-        # generate a new access token for the video scope
-        video_scope_access_token = get_account_access_token_async(self.consts, self.arm_access_token,
-                                                                  permission_type='Contributor', scope='Video',
-                                                                  video_id=video_id)
+        # get a cached access token for the video scope
+        video_scope_access_token = token_manager.get_account_access_token(self.consts, permission_type='Contributor',
+                                                                          scope='Video', video_id=video_id)
 
-        print(f'Getting the insights widget URL for video {video_id}')
+        logger.debug("Getting the insights widget URL for video %s", video_id)
 
         params = {
             'widgetType': widget_type,
@@ -351,7 +346,7 @@ class VideoIndexerClient:
         response.raise_for_status()
 
         insights_widget_url = response.url
-        print(f'Got the insights widget URL: {insights_widget_url}')
+        logger.debug("Got the insights widget URL: %s", insights_widget_url)
         return insights_widget_url
 
     def get_player_widget_url_async(self, video_id:str) -> str:
@@ -365,12 +360,11 @@ class VideoIndexerClient:
         """
         self.get_account_async()
 
-        # generate a new access token for the video scope
-        video_scope_access_token = get_account_access_token_async(self.consts, self.arm_access_token,
-                                                                  permission_type='Contributor', scope='Video',
-                                                                  video_id=video_id)
+        # get a cached access token for the video scope
+        video_scope_access_token = token_manager.get_account_access_token(self.consts, permission_type='Contributor',
+                                                                          scope='Video', video_id=video_id)
 
-        print(f'Getting the player widget URL for video {video_id}')
+        logger.debug("Getting the player widget URL for video %s", video_id)
 
         params = {
             'accessToken': video_scope_access_token
@@ -384,16 +378,15 @@ class VideoIndexerClient:
         response.raise_for_status()
 
         url = response.url
-        print(f'Got the player widget URL: {url}')
+        logger.debug("Got the player widget URL: %s", url)
         return url
 
     def get_video_thumbnail(self, video_id: str, thumbnail_id: str):
         self.get_account_async()
 
-        # generate a new access token for the video scope
-        video_scope_access_token = get_account_access_token_async(self.consts, self.arm_access_token,
-                                                                  permission_type='Contributor', scope='Video',
-                                                                  video_id=video_id)
+        # get a cached access token for the video scope
+        video_scope_access_token = token_manager.get_account_access_token(self.consts, permission_type='Contributor',
+                                                                          scope='Video', video_id=video_id)
 
         logger.info(f'Getting thumbnail for video {video_id}')
 
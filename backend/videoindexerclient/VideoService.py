@@ -1,11 +1,10 @@
 import base64
-import collections
-import heapq
 import io
 import json
 import logging
 import os
 
+import numpy as np
 from dotenv import load_dotenv
 
 from videoindexerclient.model import Video
@@ -29,17 +28,17 @@ class VideoService:
         consts = Consts(api_version, api_endpoint, azure_resource_manager, account_name, resource_group, subscription_id)
         self.client = VideoIndexerClient()
         self.client.authenticate_async(consts)
-        self.client.start_authentication_scheduler()
         self.database = VideoIndexerRepositoryService()
 
             
-    def index_video(self, video_base64_encoded: Video, excluded_ai: list=None) -> (str, dict):
+    def index_video(self, video_base64_encoded: Video, excluded_ai: list=None, on_progress=None) -> (str, dict):
         """
         Index Video using Azure AI Video Indexer.
 
         Args:
             video_base64_encoded (Video): Video to be indexed. Required.
             excluded_ai (list): AI Features to excluded from Azure Video Indexer. Optional.
+            on_progress (Callable): Called with a stage name and details as the video is uploaded and indexed. Optional.
         """
         if excluded_ai is None:
             excluded_ai = ['Faces', 'Labels', 'Emotions', 'ObservedPeople', 'RollingCredits', 'Celebrities', 'Clapperboard', 'FeaturedClothing', 'ShotType', 'PeopleDetectedClothing']
@@ -53,89 +52,94 @@ class VideoService:
         video_data = base64.b64decode(data)
         video_file = io.BytesIO(video_data)
         video_file.name = video_base64_encoded.video_name
+        if on_progress:
+            on_progress("UPLOADING", size=len(video_data))
         video_id = self.client.file_upload_async(video_file, video_name=video_file.name, excluded_ai=excluded_ai)
 
+        def index_progress(state, progress):
+            if on_progress:
+                on_progress("INDEXING", indexer_video_id=video_id, state=state, progress=progress)
 
-        self.client.wait_for_index_async(video_id) #keep checking every 10seconds until the index is processed 
+        self.client.wait_for_index_async(video_id, on_progress=index_progress) #keep checking every 10seconds until the index is processed
         
         
         insights = self.client.get_video_async(video_id)
-        with open(f"VI_insights_{video_id}.json", "w", encoding="utf-8") as f:
-            json.dump(insights, f, indent=4, ensure_ascii=False)
-        # print(insights)
-    
+
         if insights and video_id:
-            document = {
-                "video_indexer_id": video_id,
-                "insights": insights
-            }
-            self.database.insert_video_index_raw(document)
+            self.database.insert_video_index_raw(video_id, insights)
             return video_id, insights
         else:
             raise Exception("Indexing Video process failed.")
 
-    def map_insights_to_document(self, insights):
+    def map_insights_to_document(self, insights, video_id: str = None, top_tolerance: int = 1, max_lines: int = 4):
         """
-        Processes OCR insights from Azure Video Indexer and organizes them into structured documents.
-        
-        This function takes raw OCR (Optical Character Recognition) data from video analysis
-        and groups text elements by their spatial and temporal coordinates to create
-        meaningful document segments. It handles text that appears at similar times and
-        positions to create coherent text blocks.
-        
-        The function performs the following operations:
-        1. Groups OCR text by timestamp (converted to milliseconds)
-        2. Sorts text elements by their vertical position (top coordinate)
-        3. Groups text that appears at similar vertical positions (within 1 pixel tolerance)
-        4. Creates document segments with start time and associated text
-        5. Filters out segments with too many text elements (>5) to avoid clutter
-        6. Saves the structured data to a JSON file
-        
+        Group the OCR insights of a video into slide-text documents and store them in the frame collection.
+
+        The OCR instances of the whole video are flattened into arrays of (time, top, left) and grouped in one
+        vectorised pass:
+        1. Sort all instances by start time, then top, then left
+        2. Start a new line when the start time changes or the top coordinate jumps by more than `top_tolerance`
+        3. Order the words of each line by their left coordinate
+        4. Drop frames with more than `max_lines` lines to avoid clutter
+
+        Each stored document has numeric `start_ms` and `end_ms` so frames can be queried by time range.
+
         Args:
-            insights (dict): Raw insights data from Azure Video Indexer containing OCR information.
-                           Expected structure: insights["videos"][0]["insights"]["ocr"]
-        
+            insights (dict): Raw insights data from Azure Video Indexer. Expected structure: insights["videos"][0]["insights"]["ocr"]
+            video_id (str): Video Indexer ID of the video. Default: the "id" field of the insights.
+            top_tolerance (int): Maximum vertical distance in pixels between consecutive words of a line. Default: 1.
+            max_lines (int): Maximum number of lines for a frame to be kept. Default: 4.
+
         Returns:
-            None: The function saves the processed data to "frames.json" file
-        
-        Note:
-            This function is used for creating structured text documents from video content
-            that can be used for search, indexing, or further text analysis.
+            list: Slide-text documents stored in the frame collection.
         """
-        hash_map = collections.defaultdict(list)
+        video_id = video_id or insights.get("id")
+        ocr = insights["videos"][0]["insights"].get("ocr", [])
 
-        for insight in insights["videos"][0]["insights"]["ocr"]:
+        texts, starts, ends, tops, lefts = [], [], [], [], []
+        for insight in ocr:
             for instance in insight["instances"]:
-                heapq.heappush(hash_map[convert_timestamp_to_ms(instance["adjustedStart"])], (insight["top"], insight["left"], insight["id"], insight["text"]))
+                texts.append(insight["text"])
+                starts.append(convert_timestamp_to_ms(instance["adjustedStart"]))
+                ends.append(convert_timestamp_to_ms(instance["adjustedEnd"]))
+                tops.append(insight["top"])
+                lefts.append(insight["left"])
 
         documents = []
-
-        # Iterate through the items in the hashMap
-        for k, v in hash_map.items():
-            last_top = v[0][0]
-            same_top = []
-            same_time = []
-            while v:
-                if last_top-1 <= v[0][0] <= last_top+1:
-                    same_top.append(heapq.heappop(v)[3])
-                else:
-                    same_time.append(" ".join(same_top))
-                    last_top = v[0][0]
-                    same_top = []
-
-            if len(same_top) > 0:
-                same_time.append(" ".join(same_top))
-
-            if len(same_time) < 5:
+        if texts:
+            starts, ends = np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+            tops, lefts = np.asarray(tops, dtype=np.int64), np.asarray(lefts, dtype=np.int64)
+
+            order = np.lexsort((lefts, tops, starts))
+            starts, ends, tops, lefts = starts[order], ends[order], tops[order], lefts[order]
+            new_frame = np.r_[True, starts[1:] != starts[:-1]]
+            new_line = new_frame | np.r_[True, np.diff(tops) > top_tolerance]
+            line_ids = np.cumsum(new_line) - 1
+
+            # Within a line, words are read left to right regardless of small differences in top
+            in_line = np.lexsort((lefts, line_ids))
+            words = [texts[i] for i in order[in_line]]
+            line_bounds = np.flatnonzero(new_line)
+            lines = [" ".join(words[a:b]) for a, b in zip(line_bounds, np.r_[line_bounds[1:], len(words)])]
+
+            frame_bounds = np.flatnonzero(new_frame)
+            lines_per_frame = np.add.reduceat(new_line.astype(np.int64), frame_bounds)
+            first_line = np.r_[0, np.cumsum(lines_per_frame)[:-1]]
+            frame_ends = np.maximum.reduceat(ends, frame_bounds)
+            for frame, line_count in enumerate(lines_per_frame):
+                if line_count > max_lines:
+                    continue
+                frame_lines = lines[first_line[frame]:first_line[frame] + line_count]
                 documents.append({
-                    "start": k,
-                    "texts": same_time
+                    "video_id": video_id,
+                    "start_ms": int(starts[frame_bounds[frame]]),
+                    "end_ms": int(frame_ends[frame]),
+                    "texts": frame_lines,
+                    "textContent": "\n".join(frame_lines)
                 })
 
-        document = {"frames": documents}
-
-        self.save_to_file(document, "frames.json")
-
+        self.database.replace_frames(video_id, documents)
+        return documents
 
     def get_player_widget_url_async(self, video_id: str) -> str:
         result = self.client.get_player_widget_url_async(video_id)
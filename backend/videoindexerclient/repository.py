@@ -5,14 +5,14 @@ from typing import Dict, Any
 import pymongo
 from bson import ObjectId
 from dotenv import load_dotenv
-from langchain_community.vectorstores.azure_cosmos_db import CosmosDBSimilarityType, CosmosDBVectorSearchType
 from langchain_core.documents import Document
 
 from EmbeddingService import EmbeddingService
-from langchain_community.vectorstores import AzureCosmosDBVectorSearch
-from langchain_openai import AzureOpenAIEmbeddings
 
+from artifactservice.artifactService import artifact_store
 from databaseservice.databaseService import DatabaseService, database_service
+from ingestionservice.incrementalIndexer import incremental_indexer
+from loggingConfig import logger
 
 load_dotenv()
 
@@ -52,30 +52,6 @@ class VideoIndexerRepositoryService:
         self.course_collection = db[courses_collection_name]
         self.prompt_content_index_collection = db[prompt_content_index]
 
-        self.azure_openai_embeddings: AzureOpenAIEmbeddings = AzureOpenAIEmbeddings(
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY"),
-            openai_api_version=os.environ.get("OPENAI_API_VERSION"),
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-            model=os.environ.get("EMBEDDING_MODEL")
-        )
-
-        self.vector_store_prompt: AzureCosmosDBVectorSearch = AzureCosmosDBVectorSearch.from_connection_string(
-            connection_string=database_service.get_mongo_connection_string(),
-            namespace=f"{database_service.get_database_name()}.{prompt_content_index}",
-            embedding=self.azure_openai_embeddings,
-        )
-
-        num_lists = 100
-        dimensions = 1536
-        similarity_algorithm = CosmosDBSimilarityType.COS
-        kind = CosmosDBVectorSearchType.VECTOR_IVF
-        m = 16
-        ef_construction = 64
-
-        self.vector_store_prompt.create_index(
-            num_lists, dimensions, similarity_algorithm, kind, m, ef_construction
-        )
-
     def insert_video_entry(self, video_document):
         return self.video_collection.insert_one(video_document)
 
@@ -92,6 +68,18 @@ class VideoIndexerRepositoryService:
     def save_frames(self, document):
         self.frame_collection.insert_one(document)
 
+    def replace_frames(self, video_id: str, documents: list):
+        """
+        Replace the slide-text frame documents of a video.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+            documents (list): Frame documents with "start_ms", "end_ms" and "textContent". Required.
+        """
+        self.frame_collection.delete_many({"video_id": video_id})
+        if documents:
+            self.frame_collection.insert_many(documents, ordered=False)
+
     def insert_indexed_video(self, document):
         try:
             self.frame_collection.insert_one(document)
@@ -121,8 +109,37 @@ class VideoIndexerRepositoryService:
 
         return course_video_result
 
-    def insert_video_index_raw(self, insights):
-        self.video_indexer_raw_collection.insert_one(insights)
+    def insert_video_index_raw(self, video_id: str, insights: dict):
+        """
+        Store the raw Video Indexer insights in the artifact store and keep only a reference in MongoDB.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+            insights (dict): Raw insights returned by Video Indexer. Required.
+        """
+        insights_ref = artifact_store.put_json(insights)
+        return self.video_indexer_raw_collection.insert_one({
+            "video_indexer_id": video_id,
+            "insights_ref": insights_ref
+        })
+
+    def find_video_index_raw(self, video_id: str):
+        """
+        Load the raw Video Indexer insights of a video.
+        Documents written before the artifact store was introduced still hold the insights inline.
+
+        Args:
+            video_id (str): Video Indexer ID. Required.
+
+        Returns:
+            dict: Raw insights, or None if the video has not been indexed.
+        """
+        result = self.video_indexer_raw_collection.find_one({"video_indexer_id": video_id})
+        if not result:
+            return None
+        if "insights_ref" in result:
+            return artifact_store.load_json(result["insights_ref"])
+        return result.get("insights")
 
     def insert_prompt_content_raw(self, prompt_content, video_id):
         return self.prompt_content_raw_collection.insert_one({
@@ -131,19 +148,15 @@ class VideoIndexerRepositoryService:
         })
 
     def insert_prompt_context_index(self, prompt_content_raw, video_id):
-        formatted_documents = [Document(
-            page_content=doc.get("content"),
-            metadata={
+        sections = prompt_content_raw.get("sections", [])
+        incremental_indexer.sync_video_sections(
+            self.prompt_content_index_collection,
+            video_id,
+            [doc.get("content") for doc in sections],
+            [{
                 "video_id": video_id,
                 "start": doc.get("start"),
                 "end": doc.get("end")
-            }
-        ) for doc in prompt_content_raw.get("sections", [])]
-
-        AzureCosmosDBVectorSearch.from_documents(
-            formatted_documents,
-            self.azure_openai_embeddings,
-            collection=self.prompt_content_index_collection,
-            index_name="test",
+            } for doc in sections]
         )
-        print("Successfully inserted")
+        logger.debug("Successfully inserted")
@@ -1,19 +1,17 @@
 import base64
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from dotenv import load_dotenv
 
-from .VideoService import VideoService
+from dependencies import get_video_service
 
 load_dotenv()
 ROUTE_PREFIX = "/video_indexer"
 
 router = APIRouter(prefix=ROUTE_PREFIX, tags=["video-service"])
 
-video_service = VideoService()
-
 @router.get("/{video_id}", status_code=200)
-def get_video_widget(video_id: str):
+def get_video_widget(video_id: str, video_service=Depends(get_video_service)):
     video_widget_player_url = video_service.get_player_widget_url_async(video_id)
     if video_widget_player_url:
         return {"message": "Successfully Retrieve", "video_widget_url": video_widget_player_url}
@@ -21,7 +19,7 @@ def get_video_widget(video_id: str):
         return {"message": "No Records Found"}
 
 @router.get("/insights/{video_id}", status_code=200)
-def get_video_insights_widget(video_id: str):
+def get_video_insights_widget(video_id: str, video_service=Depends(get_video_service)):
     video_insights_widget_url = video_service.get_insights_widgets_url_async(video_id)
     if video_insights_widget_url:
         return {"message": "Successfully Retrieve", "video_insights_widget_url": video_insights_widget_url}
@@ -29,6 +27,6 @@ def get_video_insights_widget(video_id: str):
         return {"message": "No Records Found"}
 
 @router.get("/testing/{video_id}", status_code=200)
-def get_video_prompt(video_id: str):
+def get_video_prompt(video_id: str, video_service=Depends(get_video_service)):
     video_service.get_prompt_content(video_id)
 
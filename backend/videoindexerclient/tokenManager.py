@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from .Consts import Consts
+from .utils import get_account_access_token_async
+from loggingConfig import logger
+
+# Video Indexer access tokens are valid for one hour
+VI_TOKEN_LIFETIME_SEC = 60 * 60
+
+
+class AzureTokenManager:
+    """
+    Process-wide cache for Azure Resource Manager and Video Indexer access tokens.
+
+    - One DefaultAzureCredential is created lazily and reused for every refresh.
+    - Tokens are refreshed lazily when they are about to expire; there is no scheduler thread.
+    - Refreshes are single-flight: concurrent callers needing the same token wait for one fetch.
+
+    Args:
+        refresh_margin_sec (int): Refresh tokens this many seconds before they expire. Default: 600.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """Singleton pattern: every VideoIndexerClient shares the same tokens."""
+        if cls._instance is None:
+            cls._instance = super(AzureTokenManager, cls).__new__(cls)
+            cls._instance._initialize(*args, **kwargs)
+        return cls._instance
+
+    def _initialize(self, refresh_margin_sec: int = 600):
+        self.refresh_margin_sec = refresh_margin_sec
+        self._credential = None
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @property
+    def credential(self):
+        if self._credential is None:
+            with self._guard:
+                if self._credential is None:
+                    from azure.identity import DefaultAzureCredential
+                    self._credential = DefaultAzureCredential()
+        return self._credential
+
+    def _lock_for(self, key: Tuple) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _is_fresh(self, key: Tuple) -> bool:
+        cached = self._tokens.get(key)
+        return cached is not None and time.time() < cached[1] - self.refresh_margin_sec
+
+    def _get(self, key: Tuple, fetch: Callable[[], Tuple[str, float]]) -> str:
+        if self._is_fresh(key):
+            return self._tokens[key][0]
+        with self._lock_for(key):
+            # Another caller may have refreshed the token while we were waiting for the lock
+            if not self._is_fresh(key):
+                self._tokens[key] = fetch()
+                logger.info("Access token refreshed: %s", key[0])
+            return self._tokens[key][0]
+
+    def get_arm_access_token(self, consts: Consts) -> str:
+        """
+        Get a cached Azure Resource Manager access token.
+
+        Args:
+            consts (Consts): Video Indexer account constants. Required.
+
+        Returns:
+            str: ARM access token.
+        """
+        def fetch():
+            token = self.credential.get_token(f"{consts.AzureResourceManager}/.default")
+            return token.token, float(token.expires_on)
+
+        return self._get(("arm", consts.AzureResourceManager), fetch)
+
+    def get_account_access_token(self, consts: Consts, permission_type: str = 'Contributor', scope: str = 'Account',
+                                 video_id: Optional[str] = None) -> str:
+        """
+        Get a cached Video Indexer access token for the account or for a single video.
+
+        Args:
+            consts (Consts): Video Indexer account constants. Required.
+            permission_type (str): Permission type for the access token. Default: 'Contributor'.
+            scope (str): Scope for the access token. Default: 'Account'.
+            video_id (str): Video ID, if scope is Video. Optional.
+
+        Returns:
+            str: Video Indexer access token.
+        """
+        def fetch():
+            token = get_account_access_token_async(consts, self.get_arm_access_token(consts),
+                                                   permission_type=permission_type, scope=scope, video_id=video_id)
+            return token, time.time() + VI_TOKEN_LIFETIME_SEC
+
+        return self._get(("vi", consts.AccountName, permission_type, scope, video_id), fetch)
+
+    async def get_account_access_token_async(self, consts: Consts, permission_type: str = 'Contributor',
+                                             scope: str = 'Account', video_id: Optional[str] = None) -> str:
+        """
+        Async variant of `get_account_access_token`. Cached tokens are returned without leaving the event loop;
+        refreshes run in a worker thread.
+        """
+        key = ("vi", consts.AccountName, permission_type, scope, video_id)
+        if self._is_fresh(key):
+            return self._tokens[key][0]
+        return await asyncio.to_thread(self.get_account_access_token, consts, permission_type, scope, video_id)
+
+
+token_manager = AzureTokenManager()
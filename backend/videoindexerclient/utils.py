@@ -1,5 +1,4 @@
 import requests
-from azure.identity import DefaultAzureCredential
 
 from .Consts import Consts
 
@@ -8,15 +7,14 @@ def get_arm_access_token(consts: Consts) -> str:
     """
     Get an access token for the Azure Resource Manager
     Make sure you're logged in with `az` first
+    The token comes from the shared token manager, which caches the credential and the token
 
     :param consts: Consts object
     :return: Access token for the Azure Resource Manager
     """
-    credential = DefaultAzureCredential()
-    scope = f"{consts.AzureResourceManager}/.default"
-    token = credential.get_token(scope)
-    print(token)
-    return token.token
+    from .tokenManager import token_manager
+
+    return token_manager.get_arm_access_token(consts)
 
 
 def get_account_access_token_async(consts, arm_access_token, permission_type='Contributor', scope='Account',
@@ -57,6 +55,15 @@ def get_account_access_token_async(consts, arm_access_token, permission_type='Co
 
     return access_token
 
-def convert_timestamp_to_ms(timestamp: str):
+def convert_timestamp_to_ms(timestamp: str) -> int:
+    """
+    Convert a Video Indexer timestamp ("h:mm:ss" or "h:mm:ss.fffffff") to milliseconds.
+
+    Args:
+        timestamp (str): Timestamp. Required.
+
+    Returns:
+        int: Milliseconds.
+    """
     hours, minutes, seconds = timestamp.split(":")
-    return int(hours) * 60 * 60 * 1000 + int(minutes) * 60 * 1000 + round(int(seconds), 0) * 60
\ No newline at end of file
+    return int(hours) * 60 * 60 * 1000 + int(minutes) * 60 * 1000 + round(float(seconds) * 1000)
\ No newline at end of file
@@ -1,7 +1,19 @@
 import type { NextConfig } from "next";
 
+// Thumbnails are served by the backend from /thumbnails/<video_id>
+const serverUrl = process.env.NEXT_PUBLIC_SERVER_URL ? new URL(process.env.NEXT_PUBLIC_SERVER_URL) : null;
+
 const nextConfig: NextConfig = {
-  /* config options here */
+  images: {
+    remotePatterns: serverUrl
+      ? [{
+          protocol: serverUrl.protocol.replace(":", "") as "http" | "https",
+          hostname: serverUrl.hostname,
+          port: serverUrl.port,
+          pathname: "/thumbnails/**",
+        }]
+      : [],
+  },
 };
 
 export default nextConfig;
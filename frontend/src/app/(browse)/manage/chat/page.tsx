@@ -10,6 +10,7 @@ import video_api from "@/api/video-indexer-widget";
 import { Course, Video } from "@/model/Course";
 import { BookCheck, Upload } from "lucide-react";
 import { useRouter } from "next/navigation";
+import Cookies from "js-cookie";
 
 type ChatMessage = {
   id: string;
@@ -194,9 +195,14 @@ export default function ChatPage() {
         ? selectedChatVideos 
         : courseVideos.map(v => v.videoId);
       
+      // Chat requests are rate limited per signed-in user, anonymous requests get a much smaller budget
+      const token = Cookies.get("token");
       const res = await fetch(`${BASE_URL}/chat/`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: {
+          "Content-Type": "application/json",
+          ...(token ? { Authorization: `Bearer ${token}` } : {})
+        },
         body: JSON.stringify({ 
           previous_messages, 
           message: userMsg.content,
@@ -1,21 +1,49 @@
 "use client";
 
 import { useEffect, useRef, useState } from "react";
-import { fetchLogs } from "@/api/logs";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 
+const BASE_URL = process.env.NEXT_PUBLIC_SERVER_URL || "";
+
 interface LogViewerProps {
   isActive: boolean;
   onComplete?: () => void;
 }
 
+// Ingestion progress event pushed by /ingestion/events
+interface ProgressEvent {
+  video_id: string;
+  video_name?: string;
+  stage: string;
+  timestamp: number;
+  replayed?: boolean;
+  progress?: number;
+  chunk?: number;
+  error?: string;
+}
+
+const formatEvent = (event: ProgressEvent): string => {
+  const time = new Date(event.timestamp * 1000);
+  const pad = (n: number, width = 2) => String(n).padStart(width, "0");
+  const timestamp = `${time.getFullYear()}-${pad(time.getMonth() + 1)}-${pad(time.getDate())} ` +
+    `${pad(time.getHours())}:${pad(time.getMinutes())}:${pad(time.getSeconds())},${pad(time.getMilliseconds(), 3)}`;
+  const level = event.stage === "ERROR" ? "ERROR" : "INFO";
+  const details = [
+    event.progress !== undefined ? `${event.progress}%` : "",
+    event.chunk !== undefined ? `chunk ${event.chunk}` : "",
+    event.error ?? ""
+  ].filter(Boolean).join(", ");
+  return `${timestamp}: ${level}: ${event.video_name ?? event.video_id} ${event.stage}${details ? ` (${details})` : ""}`;
+};
+
 export function LogViewer({ isActive, onComplete }: LogViewerProps) {
   const [logs, setLogs] = useState<string[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const scrollAreaRef = useRef<HTMLDivElement>(null);
-  const lastFetchTimeRef = useRef<string | null>(null);
-  const pollingIntervalRef = useRef<NodeJS.Timeout | null>(null);
+  const completedRef = useRef(false);
+  const onCompleteRef = useRef(onComplete);
+  onCompleteRef.current = onComplete;
 
   // Auto-scroll to bottom when new logs arrive
   useEffect(() => {
@@ -24,93 +52,43 @@ export function LogViewer({ isActive, onComplete }: LogViewerProps) {
     }
   }, [logs]);
 
-  // Fetch logs function
-  const fetchLogMessages = async () => {
-    if (!isActive) return;
+  // Progress is pushed by the server as stages change, instead of polling the log file
+  useEffect(() => {
+    if (!isActive) {
+      setLogs([]);
+      completedRef.current = false;
+      return;
+    }
 
     setIsLoading(true);
     setError(null);
+    const source = new EventSource(`${BASE_URL}/ingestion/events`);
 
-    try {
-      const since = lastFetchTimeRef.current || undefined;
-      const response = await fetchLogs(200, since);
-      
-      if (response.error) {
-        setError(response.error);
-        return;
-      }
+    source.onopen = () => {
+      setIsLoading(false);
+      setError(null);
+    };
 
-      if (response.logs && response.logs.length > 0) {
-        // Update last fetch time to current time (ISO format)
-        lastFetchTimeRef.current = new Date().toISOString();
-        
-        // If we have existing logs, only add new ones
-        if (logs.length > 0 && since) {
-          // Find the index where new logs start
-          const lastLog = logs[logs.length - 1];
-          const newLogsStartIndex = response.logs.findIndex(log => log === lastLog);
-          
-          if (newLogsStartIndex !== -1 && newLogsStartIndex < response.logs.length - 1) {
-            // Add only the new logs
-            setLogs(prev => [...prev, ...response.logs.slice(newLogsStartIndex + 1)]);
-          } else {
-            // If we can't find the last log, replace all (might be a new session)
-            setLogs(response.logs);
-          }
-        } else {
-          // First fetch or no since parameter - set all logs
-          setLogs(response.logs);
-        }
-
-        // Check if indexing is complete
-        const hasStatusUpdate = response.logs.some(log => 
-          log.includes("Video Status updated successfully")
-        );
-        
-        if (hasStatusUpdate && onComplete) {
-          // Use a simple flag to prevent multiple calls
-          const completionFlag = "log_status_updated";
-          if (!sessionStorage.getItem(completionFlag)) {
-            sessionStorage.setItem(completionFlag, "true");
-            // Small delay to ensure all logs are visible
-            setTimeout(() => {
-              onComplete();
-            }, 1000);
-          }
-        }
+    source.addEventListener("progress", (message) => {
+      const event: ProgressEvent = JSON.parse((message as MessageEvent).data);
+      setLogs(prev => [...prev, formatEvent(event)]);
+
+      // Replayed events are the state of earlier ingestions, only live ones finish this upload
+      const finished = event.stage === "COMPLETED" || event.stage === "ERROR";
+      if (finished && !event.replayed && !completedRef.current && onCompleteRef.current) {
+        completedRef.current = true;
+        // Small delay to ensure all logs are visible
+        setTimeout(() => onCompleteRef.current?.(), 1000);
       }
-    } catch (err) {
-      setError(err instanceof Error ? err.message : "Failed to fetch logs");
-    } finally {
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects on its own
       setIsLoading(false);
-    }
-  };
+      setError("Connection to the progress stream lost, reconnecting...");
+    };
 
-  // Start polling when active
-  useEffect(() => {
-    if (isActive) {
-      // Initial fetch
-      fetchLogMessages();
-      
-      // Set up polling every 2 seconds
-      pollingIntervalRef.current = setInterval(() => {
-        fetchLogMessages();
-      }, 2000);
-
-      return () => {
-        if (pollingIntervalRef.current) {
-          clearInterval(pollingIntervalRef.current);
-        }
-      };
-    } else {
-      // Reset when inactive
-      setLogs([]);
-      lastFetchTimeRef.current = null;
-      sessionStorage.removeItem("log_status_updated");
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
-      }
-    }
+    return () => source.close();
   }, [isActive]);
 
   // Format log line for display
@@ -174,8 +152,8 @@ export function LogViewer({ isActive, onComplete }: LogViewerProps) {
                 </div>
               );
             })}
-            {isLoading && logs.length > 0 && (
-              <div className="text-gray-500 text-xs mt-2">Loading new logs...</div>
+            {isLoading && (
+              <div className="text-gray-500 text-xs mt-2">Connecting to the progress stream...</div>
             )}
           </div>
         </div>